@@ -69,11 +69,20 @@ async function solveHcaptcha(req, res) {
 
         console.log(`🐍 [${requestId}] 准备调用Python解决器，参数:`, params);
         
+        // 客户端断开时取消 Python 解决器，避免继续消耗 Gemini 配额和浏览器
+        const abortController = new AbortController();
+        res.on('close', () => {
+            if (!res.writableEnded) {
+                console.log(`🔌 [${requestId}] 客户端已断开，取消Python解决器`);
+                abortController.abort();
+            }
+        });
+
         let result;
         try {
             // 调用 Python 解决器
             console.log(`⏰ [${requestId}] 开始调用Python解决器: ${new Date().toISOString()}`);
-            result = await callHcaptchaSolver(params);
+            result = await callHcaptchaSolver(params, abortController.signal);
             console.log(`✅ [${requestId}] Python解决器返回结果: ${new Date().toISOString()}`, result);
             
             // 请求成功
@@ -150,9 +159,10 @@ async function solveHcaptcha(req, res) {
 /**
  * 调用 hCaptcha 解决器
  * @param {Object} params - 参数对象
+ * @param {AbortSignal} [signal] - 中止时向 Python 进程发送 SIGTERM，由其取消求解并关闭浏览器
  * @returns {Promise<Object>} 解决结果
  */
-function callHcaptchaSolver(params) {
+function callHcaptchaSolver(params, signal) {
     return new Promise((resolve) => {
         const solverDir = path.join(__dirname);
         const solverPath = path.join(solverDir, 'solver.py');
@@ -174,6 +184,8 @@ function callHcaptchaSolver(params) {
         const pythonProcess = spawn(pythonCommand, [solverPath, paramsJson], {
             stdio: ['pipe', 'pipe', devNull], // 重定向stderr到/dev/null
             cwd: solverDir,
+            signal,
+            killSignal: 'SIGTERM',
             env: { 
                 ...process.env, 
                 LOG_LEVEL: 'CRITICAL',
@@ -301,6 +313,13 @@ function callHcaptchaSolver(params) {
 
         // 处理进程错误
         pythonProcess.on('error', (error) => {
+            if (error.name === 'AbortError') {
+                return resolve({
+                    code: 499,
+                    message: 'hCaptcha solving cancelled by the client',
+                    token: null
+                });
+            }
             console.error('💥 启动hCaptcha解决器失败:', error.message);
             console.error('🔍 错误详情:', error);
             resolve({
@@ -0,0 +1,57 @@
+"""
+Microbenchmarks of the per-crumb CPU work of the agent, run with pytest-benchmark.
+
+Compare against the stored baseline, failing on a regression of the mean:
+
+    pytest benchmarks --benchmark-storage=benchmarks/baselines \
+        --benchmark-compare --benchmark-compare-fail=mean:25%
+
+Store a new baseline after an intended change, on the release machine:
+
+    pytest benchmarks --benchmark-storage=benchmarks/baselines --benchmark-save=baseline
+"""
+
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+PROJECT_DIR = Path(__file__).parent.parent
+CHALLENGE_VIEW = PROJECT_DIR.joinpath("tests", "challenge_view")
+FUNCAPTCHA_DIR = PROJECT_DIR.joinpath("tests", "funcaptcha", "compare_entity_orientation")
+JOBS_DIR = PROJECT_DIR.joinpath("examples", "jobs")
+
+# Challenges and model answers per challenge of the synthetic dataset
+DATASET_CHALLENGES = 200
+DATASET_ANSWERS = 3
+
+
+@pytest.fixture(autouse=True)
+def _seeded_random():
+    # The trajectory helpers draw control points and jitter from `random`
+    random.seed(0)
+
+
+@pytest.fixture(scope="session")
+def dataset_tree(tmp_path_factory) -> Path:
+    """A dataset in the file tree layout, with model answers of priced and unpriced models"""
+    root = tmp_path_factory.mktemp("dataset")
+    models = ["gemini-2.5-pro-preview-03-25", "gemini-2.0-flash", "gemini-2.5-flash"]
+    for i in range(DATASET_CHALLENGES):
+        challenge_dir = root.joinpath("image_label_area_select", f"challenge_{i:04d}")
+        challenge_dir.mkdir(parents=True)
+        for j in range(DATASET_ANSWERS):
+            answer = {
+                "candidates": [{"content": {"role": "model", "parts": [{"text": "{}"}]}}],
+                "model_version": models[(i + j) % len(models)],
+                "usage_metadata": {
+                    "prompt_token_count": 1200 + i,
+                    "candidates_token_count": 300 + j,
+                    "total_token_count": 1500 + i + j,
+                },
+            }
+            challenge_dir.joinpath(f"{j}_model_answer.json").write_text(json.dumps(answer))
+    return root
@@ -0,0 +1,125 @@
+import json
+
+import cv2
+import pytest
+
+from conftest import CHALLENGE_VIEW, FUNCAPTCHA_DIR, JOBS_DIR
+from hcaptcha_challenger.agent.challenger import (
+    _build_drag_input_events,
+    _generate_bezier_trajectory,
+    _generate_dynamic_delays,
+)
+from hcaptcha_challenger.helper.cost_calculator import calculate_model_cost
+from hcaptcha_challenger.helper.create_comparison_image import create_comparison_image
+from hcaptcha_challenger.helper.create_coordinate_grid import (
+    FloatRect,
+    _create_adaptive_contrast_grid,
+    create_coordinate_grid,
+)
+from hcaptcha_challenger.helper.rasterization import overlay_grid_on_image
+from hcaptcha_challenger.models import CaptchaPayload
+from hcaptcha_challenger.tools.common import extract_json_blocks
+
+# The challenge view of the stored screenshots, in page coordinates
+CHALLENGE_BBOX = FloatRect(x=0, y=0, width=501, height=431)
+
+SCREENSHOTS = {
+    challenge: next(CHALLENGE_VIEW.joinpath(challenge).glob("single_1.png")).read_bytes()
+    for challenge in ["image_drag_drop", "image_label_area_select"]
+}
+
+JOBS = {path.stem: json.loads(path.read_text(encoding="utf8")) for path in JOBS_DIR.glob("*.json")}
+
+MODEL_ANSWER = """
+The object that differs is in the lower left of the canvas.
+
+```json
+{"challenge_prompt": "Please click on the object that is different", "points": [{"x": 280, "y": 458}]}
+```
+
+Alternative reading of the grid, if the first one is rejected:
+
+```json
+{"challenge_prompt": "Please click on the object that is different", "points": [{"x": 131, "y": 302}]}
+```
+"""
+
+
+@pytest.mark.parametrize("challenge", sorted(SCREENSHOTS))
+@pytest.mark.parametrize("adaptive_contrast", [False, True])
+def test_create_coordinate_grid(benchmark, challenge, adaptive_contrast):
+    benchmark.group = "spatial_helper"
+    # The arguments of `AgentV` drawing the spatial helper of a crumb
+    benchmark(
+        create_coordinate_grid,
+        SCREENSHOTS[challenge],
+        CHALLENGE_BBOX,
+        x_line_space_num=15,
+        y_line_space_num=20,
+        color="gray",
+        adaptive_contrast=adaptive_contrast,
+    )
+
+
+def test_create_adaptive_contrast_grid(benchmark):
+    benchmark.group = "spatial_helper"
+    image = cv2.cvtColor(
+        cv2.imread(str(CHALLENGE_VIEW.joinpath("image_label_area_select", "single_1.png"))),
+        cv2.COLOR_BGR2RGB,
+    )
+    benchmark(
+        _create_adaptive_contrast_grid,
+        image,
+        CHALLENGE_BBOX,
+        x_line_space_num=15,
+        y_line_space_num=20,
+    )
+
+
+def test_overlay_grid_on_image(benchmark):
+    benchmark.group = "spatial_helper"
+    image = cv2.imread(str(CHALLENGE_VIEW.joinpath("image_drag_drop", "single_1.png")))
+    height, width = image.shape[:2]
+    benchmark(overlay_grid_on_image, image, ((0, 0), (width - 1, height - 1)), 10)
+
+
+def test_create_comparison_image(benchmark):
+    benchmark.group = "spatial_helper"
+    image = FUNCAPTCHA_DIR.joinpath("002.png").read_bytes()
+    benchmark(create_comparison_image, image, 135)
+
+
+def test_generate_drag_trajectory(benchmark):
+    benchmark.group = "drag_drop"
+
+    # The defaults of `RoboticArm._perform_drag_drop`
+    def _trajectory():
+        points = _generate_bezier_trajectory((499, 307), (131, 302), 25)
+        delays = _generate_dynamic_delays(25, base_delay=15)
+        return _build_drag_input_events(points, delays)
+
+    benchmark(_trajectory)
+
+
+@pytest.mark.parametrize("job", sorted(JOBS))
+def test_captcha_payload_model_validate(benchmark, job):
+    benchmark.group = "captcha_payload"
+    benchmark(CaptchaPayload.model_validate, JOBS[job])
+
+
+def test_get_requester_question(benchmark):
+    benchmark.group = "captcha_payload"
+    payload = CaptchaPayload.model_validate(JOBS["image_label_binary"])
+    benchmark(payload.get_requester_question)
+
+
+def test_extract_json_blocks(benchmark):
+    benchmark.group = "model_answer"
+    blocks = benchmark(extract_json_blocks, MODEL_ANSWER)
+    assert len(blocks) == 2
+
+
+def test_calculate_model_cost(benchmark, dataset_tree):
+    benchmark.group = "model_answer"
+    stats = benchmark(calculate_model_cost, dataset_tree, detailed=True)
+    assert stats.total_files > 0
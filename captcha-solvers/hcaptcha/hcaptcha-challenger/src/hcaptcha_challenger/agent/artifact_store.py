@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Tuple
+
+import msgpack
+from loguru import logger
+
+STORE_DIRNAME = "_segments"
+SEGMENT_SUFFIX = ".seg"
+INDEX_SUFFIX = ".idx"
+
+
+class ArtifactRecord(NamedTuple):
+    group: str
+    """Challenge directory relative to the store root, e.g. `image_drag_drop/question/20250101/...`"""
+
+    name: str
+    """File name the artifact would have had, e.g. `{cache_key}_0_model_answer.json`"""
+
+    kind: str | None
+    timestamp: float
+    segment: str
+    offset: int
+    length: int
+
+
+class ArtifactStore:
+    """
+    Append-only artifact store packed into rotating segment files.
+
+    Replaces the `request_type/question/date/time/*` file tree with a handful of files:
+
+    - `{root}/_segments/{writer}-{n:06d}.seg` -- msgpack frames `[group, name, kind, ts, data]`
+    - `{root}/_segments/{writer}.idx` -- msgpack entries `[group, name, kind, ts, segment, offset, length]`
+
+    `writer` is the process id, so several solver processes can share one root.
+    Each write is flushed to the segment before it is indexed, so a crash can only lose
+    the index entry being written.
+
+    Args:
+        root: The directory the file tree would have been created in (e.g. `challenge_dir`)
+        segment_max_bytes: Rotate to a new segment once the current one exceeds this size
+    """
+
+    def __init__(self, root: Path | str, *, segment_max_bytes: int = 64 * 1024 * 1024):
+        self.root = Path(root)
+        self.directory = self.root.joinpath(STORE_DIRNAME)
+        self.segment_max_bytes = segment_max_bytes
+
+        self._writer = str(os.getpid())
+        self._lock = threading.Lock()
+        self._segment_no = 0
+        self._segment_fp: BinaryIO | None = None
+        self._index_fp: BinaryIO | None = None
+
+    @classmethod
+    def exists(cls, root: Path | str) -> bool:
+        directory = Path(root).joinpath(STORE_DIRNAME)
+        return directory.is_dir() and any(directory.glob(f"*{INDEX_SUFFIX}"))
+
+    @classmethod
+    def discover(cls, root: Path | str, max_depth: int = 2) -> List[ArtifactStore]:
+        """
+        Find stores at `root` or a few levels below it (e.g. `tmp` -> `tmp/.challenge`)
+        without walking the challenge trees themselves.
+        """
+        root = Path(root)
+        stores, layer = [], [root]
+        for _ in range(max_depth + 1):
+            next_layer = []
+            for directory in layer:
+                if directory.name == STORE_DIRNAME:
+                    continue
+                if cls.exists(directory):
+                    stores.append(cls(directory))
+                    continue
+                if directory.is_dir():
+                    next_layer.extend(p for p in directory.iterdir() if p.is_dir())
+            layer = next_layer
+        return stores
+
+    def key_of(self, path: Path) -> Tuple[str, str]:
+        """(group, name) of a path that would have been written to the file tree"""
+        path = Path(path)
+        try:
+            group = path.parent.relative_to(self.root).as_posix()
+        except ValueError:
+            group = path.parent.as_posix()
+        return group, path.name
+
+    # == Writer == #
+
+    def append(self, path: Path, data: bytes | str, kind: str | None = None) -> ArtifactRecord:
+        if isinstance(data, str):
+            data = data.encode("utf8")
+
+        group, name = self.key_of(path)
+        timestamp = time.time()
+        frame = msgpack.packb([group, name, kind, timestamp, data], use_bin_type=True)
+
+        with self._lock:
+            segment_fp = self._open_segment(len(frame))
+            offset = segment_fp.tell()
+            segment_fp.write(frame)
+            segment_fp.flush()
+
+            segment = Path(segment_fp.name).name
+            entry = [group, name, kind, timestamp, segment, offset, len(frame)]
+            self._index_fp.write(msgpack.packb(entry, use_bin_type=True))
+            self._index_fp.flush()
+
+        return ArtifactRecord(group, name, kind, timestamp, segment, offset, len(frame))
+
+    def close(self):
+        with self._lock:
+            for fp in (self._segment_fp, self._index_fp):
+                if fp is not None:
+                    fp.close()
+            self._segment_fp = self._index_fp = None
+
+    def _segment_path(self, segment_no: int) -> Path:
+        return self.directory.joinpath(f"{self._writer}-{segment_no:06d}{SEGMENT_SUFFIX}")
+
+    def _open_segment(self, incoming: int) -> BinaryIO:
+        if self._segment_fp is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            existing = sorted(self.directory.glob(f"{self._writer}-*{SEGMENT_SUFFIX}"))
+            if existing:
+                self._segment_no = int(existing[-1].stem.rsplit("-", 1)[-1])
+            self._segment_fp = self._segment_path(self._segment_no).open("ab")
+            self._index_fp = self.directory.joinpath(f"{self._writer}{INDEX_SUFFIX}").open("ab")
+
+        if self._segment_fp.tell() and self._segment_fp.tell() + incoming > self.segment_max_bytes:
+            self._segment_fp.close()
+            self._segment_no += 1
+            self._segment_fp = self._segment_path(self._segment_no).open("ab")
+
+        return self._segment_fp
+
+    # == Reader == #
+
+    def records(
+        self, *, kind: str | None = None, suffix: str | None = None
+    ) -> Iterator[ArtifactRecord]:
+        """
+        Iterate the index, oldest first per writer.
+
+        Args:
+            kind: Only records of this artifact class (see `ArtifactKind`)
+            suffix: Only records whose name ends with it, e.g. `_model_answer.json`
+        """
+        if not self.directory.is_dir():
+            return
+        for index_path in sorted(self.directory.glob(f"*{INDEX_SUFFIX}")):
+            with index_path.open("rb") as fp:
+                unpacker = msgpack.Unpacker(fp, raw=False)
+                try:
+                    for entry in unpacker:
+                        record = ArtifactRecord(*entry)
+                        if kind is not None and record.kind != kind:
+                            continue
+                        if suffix is not None and not record.name.endswith(suffix):
+                            continue
+                        yield record
+                except (ValueError, TypeError, msgpack.UnpackException) as err:
+                    logger.warning(f"Truncated artifact index - {index_path=} {err=}")
+
+    def groups(self, **filters) -> Dict[str, List[ArtifactRecord]]:
+        """Records grouped by challenge, i.e. what used to be one directory"""
+        groups = defaultdict(list)
+        for record in self.records(**filters):
+            groups[record.group].append(record)
+        return groups
+
+    def read(self, record: ArtifactRecord) -> bytes:
+        with self.directory.joinpath(record.segment).open("rb") as fp:
+            fp.seek(record.offset)
+            frame = fp.read(record.length)
+        return msgpack.unpackb(frame, raw=False)[-1]
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import atexit
+import queue
+import random
+import threading
+import weakref
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+from loguru import logger
+
+from hcaptcha_challenger.agent.artifact_store import ArtifactStore
+
+ArtifactData = Union[bytes, str, Callable[[], Union[bytes, str, None]]]
+
+
+class ArtifactKind(str, Enum):
+    PAYLOAD = "payload"
+    """{cache_key}_captcha.json"""
+
+    SCREENSHOT = "screenshot"
+    """challenge-view screenshots, including the router artifacts"""
+
+    SPATIAL_HELPER = "spatial_helper"
+    """challenge-view screenshots with the coordinate grid overlay"""
+
+    MODEL_ANSWER = "model_answer"
+    """{cache_key}_{crumb_id}_model_answer.json"""
+
+    CAPTCHA_RESPONSE = "captcha_response"
+    """Validated captcha responses in `captcha_response_dir`"""
+
+    PROFILE = "profile"
+    """{cache_key}_{signal}_profile_{view}.folded, see `AgentConfig.PROFILE_SAMPLING`"""
+
+
+_STOP = object()
+
+_live_writers: weakref.WeakSet[ArtifactWriter] = weakref.WeakSet()
+
+
+@atexit.register
+def _close_live_writers():
+    for writer in list(_live_writers):
+        writer.close()
+
+
+class ArtifactWriter:
+    """
+    Bounded write-behind queue for challenge artifacts.
+
+    Writes are drained by a background thread so that disk latency never stalls the solve coroutine.
+    When the queue is full the caller writes inline (backpressure), nothing is dropped silently.
+
+    Args:
+        maxsize: Maximum number of pending writes
+        sampling: Sampling rate per `ArtifactKind` in [0, 1], 0 disables the kind, default 1
+        write_behind: If False, every artifact is written inline
+        store: Append artifacts to a packed `ArtifactStore` instead of creating one file each
+        idle_timeout: Seconds without work after which the writer thread exits, it is restarted
+            on the next submit
+    """
+
+    _shared_instances: Dict[Tuple[Any, ...], ArtifactWriter] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        *,
+        maxsize: int = 256,
+        sampling: Dict[ArtifactKind | str, float] | None = None,
+        write_behind: bool = True,
+        idle_timeout: float = 30,
+        store: ArtifactStore | None = None,
+    ):
+        self._queue: queue.Queue = queue.Queue(maxsize=max(maxsize, 1))
+        self._sampling = {ArtifactKind(k): float(v) for k, v in (sampling or {}).items()}
+        self._write_behind = write_behind
+        self._idle_timeout = idle_timeout
+        self.store = store
+
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+        self.written = 0
+        self.skipped = 0
+        self.inline = 0
+        self.failed = 0
+
+    @classmethod
+    def shared(
+        cls,
+        *,
+        maxsize: int = 256,
+        sampling: Dict[ArtifactKind | str, float] | None = None,
+        write_behind: bool = True,
+        store_root: Path | None = None,
+    ) -> ArtifactWriter:
+        """
+        Return the process-scoped writer for this configuration.
+
+        Every agent of the process shares its background thread, and with `store_root`,
+        its `ArtifactStore`, which must have a single writer per process.
+        """
+        sampling_key = tuple(
+            sorted((ArtifactKind(k).value, v) for k, v in (sampling or {}).items())
+        )
+        key = (maxsize, sampling_key, write_behind, Path(store_root) if store_root else None)
+        with cls._shared_lock:
+            if key not in cls._shared_instances:
+                cls._shared_instances[key] = cls(
+                    maxsize=maxsize,
+                    sampling=sampling,
+                    write_behind=write_behind,
+                    store=ArtifactStore(store_root) if store_root else None,
+                )
+            return cls._shared_instances[key]
+
+    def should_write(self, kind: ArtifactKind | str) -> bool:
+        rate = self._sampling.get(ArtifactKind(kind), 1.0)
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        return random.random() < rate
+
+    def submit(self, kind: ArtifactKind | str, path: Path, data: ArtifactData) -> bool:
+        """
+        Schedule an artifact write.
+
+        Args:
+            kind: Artifact class, used for sampling
+            path: Destination file, parent directories are created as needed
+            data: Content, or a callable producing it. Callables are evaluated on the writer
+                thread, so serialization (e.g. `json.dumps`) is moved off the event loop too.
+
+        Returns:
+            Whether the artifact was accepted (False when it is sampled out)
+        """
+        if not self.should_write(kind):
+            self.skipped += 1
+            return False
+
+        kind = ArtifactKind(kind)
+
+        if not self._write_behind:
+            self._write(kind, path, data)
+            self.inline += 1
+            return True
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="hcaptcha-artifact-writer", daemon=True
+                )
+                self._thread.start()
+                _live_writers.add(self)
+            try:
+                self._queue.put_nowait((kind, path, data))
+                return True
+            except queue.Full:
+                pass
+
+        # Backpressure: the producer pays for the write instead of growing the queue
+        logger.debug(f"Artifact queue is full, writing inline - {path=}")
+        self._write(kind, path, data)
+        self.inline += 1
+        return True
+
+    def flush(self, timeout: float | None = None):
+        """Block until every pending artifact has been written"""
+        if self._thread is None:
+            return
+        if timeout is None:
+            self._queue.join()
+            return
+        done = threading.Event()
+
+        def _join():
+            self._queue.join()
+            done.set()
+
+        threading.Thread(target=_join, daemon=True).start()
+        done.wait(timeout)
+
+    def close(self, timeout: float | None = 10):
+        """Drain the queue and stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        if self.store is not None:
+            self.store.close()
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self._idle_timeout)
+            except queue.Empty:
+                with self._lock:
+                    # `submit` enqueues under the same lock, nothing can slip in between
+                    if self._queue.empty() and self._thread is threading.current_thread():
+                        self._thread = None
+                        return
+                continue
+            try:
+                if item is _STOP:
+                    with self._lock:
+                        if self._thread is threading.current_thread():
+                            self._thread = None
+                    return
+                self._write(*item)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, kind: ArtifactKind, path: Path, data: ArtifactData):
+        try:
+            if callable(data):
+                data = data()
+            if data is None:
+                return
+            if self.store is not None:
+                self.store.append(path, data, kind=kind.value)
+                self.written += 1
+                return
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if isinstance(data, str):
+                path.write_text(data, encoding="utf8")
+            else:
+                path.write_bytes(data)
+            self.written += 1
+        except Exception as err:
+            self.failed += 1
+            logger.error(f"Failed to write artifact - {path=} {err=}")
+
+
+class ForensicBuffer:
+    """
+    The artifacts of one solve, kept in memory until the outcome of the solve is known.
+
+    It takes the place of the agent's `ArtifactWriter` during a solve: `commit` hands the
+    buffered artifacts to the writer, e.g. once the solve failed, `discard` forgets them.
+    Callables are never evaluated for a discarded artifact. Validated captcha responses and
+    profiles are not debugging context, they go to the writer at once.
+
+    Captcha payloads are always kept. Beyond `capacity`, the buffer keeps the first half of
+    the other artifacts, i.e. how the solve started, and drops the oldest of the rest, so
+    the latest artifacts before the failure are kept too.
+
+    Args:
+        writer: Writer the committed artifacts are submitted to, with its sampling
+        capacity: Artifacts kept apart from the payloads
+    """
+
+    PASSTHROUGH = frozenset({ArtifactKind.CAPTCHA_RESPONSE, ArtifactKind.PROFILE})
+    PINNED = frozenset({ArtifactKind.PAYLOAD})
+
+    def __init__(self, writer: ArtifactWriter, *, capacity: int = 64):
+        self.writer = writer
+        self.capacity = max(capacity, 1)
+        self._entries: List[Tuple[ArtifactKind, Path, ArtifactData]] = []
+        self._evictable = 0
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._entries)
+
+    def submit(self, kind: ArtifactKind | str, path: Path, data: ArtifactData) -> bool:
+        """Buffer an artifact, see `ArtifactWriter.submit`"""
+        kind = ArtifactKind(kind)
+        if kind in self.PASSTHROUGH:
+            return self.writer.submit(kind, path, data)
+        if kind not in self.PINNED:
+            if self._evictable >= self.capacity:
+                self._evict()
+            self._evictable += 1
+        self._entries.append((kind, path, data))
+        return True
+
+    def _evict(self):
+        # The first unpinned artifact past the kept head of the solve
+        head = self.capacity // 2
+        for index, (kind, _, _) in enumerate(self._entries):
+            if kind in self.PINNED:
+                continue
+            if head == 0:
+                del self._entries[index]
+                self._evictable -= 1
+                self.dropped += 1
+                return
+            head -= 1
+
+    def commit(self) -> int:
+        """Submit the buffered artifacts to the writer, returns how many it accepted"""
+        entries, self._entries, self._evictable = self._entries, [], 0
+        return sum(self.writer.submit(*entry) for entry in entries)
+
+    def discard(self) -> int:
+        discarded = len(self._entries)
+        self._entries.clear()
+        self._evictable = 0
+        return discarded
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from loguru import logger
+from playwright.async_api import Response, Route
+
+HCAPTCHA_ASSET_PATTERN = re.compile(
+    r"^https://(?:js|newassets|assets)\.hcaptcha\.com/"
+    r"[^?#]*\.(?:js|css|html|woff2?|ttf|svg|png|json)(?:[?#]|$)"
+)
+"""Static hCaptcha assets: `api.js`, `hsw.js`, frame HTML, CSS, fonts and icons"""
+
+VERSIONED_PATH_PATTERN = re.compile(r"/(?:captcha/v1|c|i)/[0-9a-f]{7,}/")
+"""Paths that embed the release hash, their content never changes"""
+
+_STORED_HEADERS = {
+    "content-type",
+    "etag",
+    "last-modified",
+    "access-control-allow-origin",
+    "cross-origin-resource-policy",
+    "timing-allow-origin",
+}
+
+
+class CachedAsset:
+    """An asset served from the cache, with the subset of `APIResponse` used to fulfill a route"""
+
+    def __init__(self, url: str, status: int, headers: Dict[str, str], body: bytes):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self._body = body
+
+    async def body(self) -> bytes:
+        return self._body
+
+    async def text(self) -> str:
+        return self._body.decode("utf8")
+
+    async def json(self) -> Any:
+        return json.loads(self._body)
+
+    async def dispose(self):
+        return
+
+
+class AssetCache:
+    """
+    On-disk cache for static hCaptcha assets, shared by every context and process
+    using the same directory.
+
+    Only hits are served from disk. On a miss, the page downloads the asset itself, through
+    its own network stack and proxy, and the cache is filled from that response: the cache
+    never issues a request the browser would not have sent.
+
+    - Versioned assets (the path embeds the release hash, e.g. `/c/{hash}/hsw.js`) are
+      served from disk until evicted.
+    - Other assets (e.g. `https://js.hcaptcha.com/1/api.js`) are served from disk for `ttl`
+      seconds, then downloaded again by the next page that needs them.
+    - Bodies are checked against their recorded SHA-256 before they are served.
+
+    Args:
+        root: Cache directory, e.g. `AgentConfig.asset_cache_dir`
+        ttl: Freshness of unversioned assets in seconds
+        max_bytes: Evict the least recently used assets beyond this size
+    """
+
+    _shared_instances: Dict[Tuple[Any, ...], AssetCache] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, root: Path | str, *, ttl: float = 600, max_bytes: int = 256 * 1024 * 1024):
+        self.root = Path(root)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def shared(cls, root: Path | str, *, ttl: float = 600, max_bytes: int = 256 * 1024 * 1024):
+        key = (Path(root), ttl, max_bytes)
+        with cls._shared_lock:
+            if key not in cls._shared_instances:
+                cls._shared_instances[key] = cls(root, ttl=ttl, max_bytes=max_bytes)
+            return cls._shared_instances[key]
+
+    @staticmethod
+    def accepts(route: Route) -> bool:
+        request = route.request
+        return request.method == "GET" and bool(HCAPTCHA_ASSET_PATTERN.search(request.url))
+
+    async def lookup(self, url: str) -> CachedAsset | None:
+        """The fresh cached asset of `url`, None on a miss or once it is stale"""
+        url = url.split("#", 1)[0]
+        entry = await asyncio.to_thread(self.load, url)
+        if entry is None or not self.is_fresh(url, entry[0]):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._as_asset(url, *entry)
+
+    async def fill(self, response: Response):
+        """Store an asset the page downloaded itself"""
+        if response.status != 200:
+            return
+        headers = await response.all_headers()
+        if "no-store" in headers.get("cache-control", ""):
+            return
+        body = await response.body()
+        await asyncio.to_thread(self.store, response.url.split("#", 1)[0], headers, body)
+
+    def is_fresh(self, url: str, meta: Dict[str, Any]) -> bool:
+        if VERSIONED_PATH_PATTERN.search(url):
+            return True
+        return time.time() - meta["stored_at"] < self.ttl
+
+    # == Disk == #
+
+    def _paths(self, url: str) -> Tuple[Path, Path]:
+        digest = hashlib.sha1(url.encode("utf8")).hexdigest()
+        directory = self.root.joinpath(digest[:2])
+        return directory.joinpath(f"{digest}.bin"), directory.joinpath(f"{digest}.json")
+
+    def load(self, url: str) -> Tuple[Dict[str, Any], bytes] | None:
+        body_path, meta_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf8"))
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+
+        if meta.get("url") != url or hashlib.sha256(body).hexdigest() != meta.get("sha256"):
+            logger.warning(f"Discard corrupted asset cache entry - {url=}")
+            for path in (body_path, meta_path):
+                path.unlink(missing_ok=True)
+            return None
+
+        # Access time for the LRU eviction
+        os.utime(meta_path)
+        return meta, body
+
+    def store(self, url: str, headers: Dict[str, str], body: bytes):
+        body_path, meta_path = self._paths(url)
+        meta = {
+            "url": url,
+            "status": 200,
+            "headers": {k: v for k, v in headers.items() if k.lower() in _STORED_HEADERS},
+            "sha256": hashlib.sha256(body).hexdigest(),
+            "size": len(body),
+            "stored_at": time.time(),
+        }
+        try:
+            body_path.parent.mkdir(parents=True, exist_ok=True)
+            # The metadata is written last, a reader never sees a partial body
+            tmp_path = body_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_bytes(body)
+            os.replace(tmp_path, body_path)
+            self._write_meta(url, meta)
+            self._evict()
+        except OSError as err:
+            logger.warning(f"Failed to cache asset - {url=} {err=}")
+
+    def _write_meta(self, url: str, meta: Dict[str, Any]):
+        _, meta_path = self._paths(url)
+        tmp_path = meta_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(meta), encoding="utf8")
+        os.replace(tmp_path, meta_path)
+
+    def _evict(self):
+        entries = []
+        for meta_path in self.root.glob("*/*.json"):
+            body_path = meta_path.with_suffix(".bin")
+            try:
+                entries.append((meta_path.stat().st_mtime, body_path.stat().st_size, meta_path))
+            except OSError:
+                continue
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, meta_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            meta_path.unlink(missing_ok=True)
+            meta_path.with_suffix(".bin").unlink(missing_ok=True)
+            total -= size
+
+    @staticmethod
+    def _as_asset(url: str, meta: Dict[str, Any], body: bytes) -> CachedAsset:
+        return CachedAsset(url, meta["status"], meta["headers"], body)
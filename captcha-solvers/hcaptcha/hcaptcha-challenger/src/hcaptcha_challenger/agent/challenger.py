@@ -4,27 +4,46 @@
 # GitHub     : https://github.com/QIN2DIM
 # Description:
 import asyncio
+import functools
+import io
 import json
 import math
 import os
 import random
 import re
 from asyncio import Queue
-from contextlib import suppress
+from contextlib import nullcontext, suppress
 from datetime import datetime
 from pathlib import Path
 from typing import Any
-from typing import List, Tuple
+from typing import List, Tuple, Dict, Literal
 from uuid import uuid4
 
 import matplotlib.pyplot as plt
 import msgpack
 from loguru import logger
-from playwright.async_api import Locator, expect, Page, Response, TimeoutError, FrameLocator, Frame
+from playwright.async_api import (
+    Locator,
+    expect,
+    Page,
+    Response,
+    TimeoutError,
+    FrameLocator,
+    Frame,
+    CDPSession,
+)
 from pydantic import Field, field_validator, SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-from hcaptcha_challenger.helper import create_coordinate_grid
+from hcaptcha_challenger.agent.artifacts import ArtifactKind, ArtifactWriter, ForensicBuffer
+from hcaptcha_challenger.agent.asset_cache import AssetCache
+from hcaptcha_challenger.agent.interception import ResponseInterceptor
+from hcaptcha_challenger.agent.validator import (
+    CanvasGeometry,
+    validate_area_select_answer,
+    validate_drag_drop_answer,
+)
+from hcaptcha_challenger.helper import create_coordinate_grid, FloatRect
 from hcaptcha_challenger.models import (
     CaptchaResponse,
     RequestType,
@@ -34,11 +53,15 @@ from hcaptcha_challenger.models import (
     DEFAULT_FAST_SHOT_MODEL,
     FastShotModelType,
     SpatialPath,
+    PointCoordinate,
     CaptchaPayload,
+    CaptchaTask,
+    DragDestinationCountError,
     IGNORE_REQUEST_TYPE_LITERAL,
     INV,
 )
 from hcaptcha_challenger.models import ChallengeTypeEnum
+from hcaptcha_challenger.profiling import SamplingProfiler
 from hcaptcha_challenger.prompts import match_user_prompt
 from hcaptcha_challenger.tools import (
     ImageClassifier,
@@ -47,6 +70,8 @@ from hcaptcha_challenger.tools import (
     SpatialPointReasoner,
 )
 from hcaptcha_challenger.tools.challenge_classifier import ChallengeRouter
+from hcaptcha_challenger.tracing import configure_file_tracing, current_span, span, traced
+from hcaptcha_challenger.utils import Deadline
 
 
 def _generate_bezier_trajectory(
@@ -111,6 +136,56 @@ def _generate_dynamic_delays(steps: int, base_delay: int) -> List[float]:
     return delays
 
 
+def _build_drag_input_events(
+    points: List[Tuple[float, float]], delays: List[float]
+) -> List[Tuple[dict, float]]:
+    """
+    Converts a pre-computed drag trajectory into CDP `Input.dispatchMouseEvent` params.
+
+    Events carry no timestamp, the browser stamps each one when it is received, so the
+    caller must wait the paired delay after sending an event to keep the velocity profile.
+
+    Args:
+        points: Trajectory points, the first one is where the button is pressed
+        delays: Delay after each point in milliseconds, aligned with `points`
+
+    Returns:
+        Ordered (event params, seconds to wait after sending it) pairs:
+        mousePressed, mouseMoved..., mouseReleased
+    """
+    start_x, start_y = points[0]
+    press = {
+        "type": "mousePressed",
+        "x": start_x,
+        "y": start_y,
+        "button": "left",
+        "buttons": 1,
+        "clickCount": 1,
+    }
+    events = [(press, 0.0)]
+
+    for i, ((x, y), delay) in enumerate(zip(points, delays)):
+        move = {"type": "mouseMoved", "x": x, "y": y, "button": "left", "buttons": 1}
+        wait = delay / 1000
+        if i == len(points) - 1:
+            # Small pause before releasing (human precision adjustment)
+            wait += random.uniform(0.05, 0.1)
+        events.append((move, wait))
+
+    end_x, end_y = points[-1]
+    release = {
+        "type": "mouseReleased",
+        "x": end_x,
+        "y": end_y,
+        "button": "left",
+        "buttons": 0,
+        "clickCount": 1,
+    }
+    events.append((release, 0.0))
+
+    return events
+
+
 SINGLE_IGNORE_TYPE = IGNORE_REQUEST_TYPE_LITERAL | RequestType | ChallengeTypeEnum
 IGNORE_REQUEST_TYPE_LIST = List[SINGLE_IGNORE_TYPE]
 
@@ -135,6 +210,12 @@ class AgentConfig(BaseSettings):
         "the custom Bessel track generator of hcaptcha-challenger "
         "and use Camoufox(humanize=True)",
     )
+    CDP_DRAG_DISPATCH: bool = Field(
+        default=True,
+        description="Send the Bessel track as raw CDP `Input.dispatchMouseEvent` commands "
+        "instead of `page.mouse` moves, one command and one wait per step either way. "
+        "Only available on Chromium, other browsers fall back to `page.mouse` moves.",
+    )
 
     EXECUTION_TIMEOUT: float = Field(
         default=120,
@@ -152,9 +233,95 @@ class AgentConfig(BaseSettings):
         description="When your local network is poor, increase this value appropriately [unit: millisecond]",
     )
 
+    ARTIFACT_WRITE_BEHIND: bool = Field(
+        default=True,
+        description="Write payloads, screenshots and model answers from a background thread "
+        "instead of the solve coroutine",
+    )
+    ARTIFACT_QUEUE_SIZE: int = Field(
+        default=256,
+        description="Maximum number of pending artifact writes. "
+        "When the queue is full, the solver writes inline until it drains.",
+    )
+    ARTIFACT_SAMPLING: Dict[ArtifactKind, float] = Field(
+        default_factory=dict,
+        description="Sampling rate per artifact class in [0, 1], 0 disables the class. "
+        "Classes: payload, screenshot, spatial_helper, model_answer, captcha_response, profile. "
+        'e.g. {"screenshot": 0.1, "spatial_helper": 0}',
+    )
+    ARTIFACT_CAPTURE: Literal["always", "failures"] = Field(
+        default="always",
+        description="`always`: write the artifacts of every solve. "
+        "`failures`: keep the artifacts of a solve in memory, see `ARTIFACT_BUFFER_SIZE`, "
+        "and write them only if the solve fails, or is sampled by `ARTIFACT_SUCCESS_SAMPLING`. "
+        "Validated captcha responses and profiles are written either way.",
+    )
+    ARTIFACT_BUFFER_SIZE: int = Field(
+        default=64,
+        ge=1,
+        description="Artifacts of a solve kept in memory with `failures` capture, captcha "
+        "payloads aside. Beyond it, the first half is kept and the oldest of the rest dropped",
+    )
+    ARTIFACT_SUCCESS_SAMPLING: float = Field(
+        default=0.0,
+        ge=0,
+        le=1,
+        description="Share of successful solves whose artifacts are written with `failures` capture",
+    )
+    ARTIFACT_STORE: Literal["files", "packed"] = Field(
+        default="files",
+        description="`files`: one file per artifact in a `challenge_dir` tree. "
+        "`packed`: append artifacts to rotating segment files in `challenge_dir/_segments`, "
+        "readable with `ArtifactStore`",
+    )
+
+    ASSET_CACHE: bool = Field(
+        default=False,
+        description="Serve static hCaptcha assets (api.js, hsw.js, frame HTML, CSS, fonts) "
+        "from `cache_dir/assets` instead of downloading them in every new browser context",
+    )
+    ASSET_CACHE_TTL: float = Field(
+        default=600,
+        description="Seconds an unversioned asset (e.g. api.js) is served from the cache, "
+        "the page then downloads it again. Assets whose path embeds the release hash are "
+        "served until evicted. [unit: second]",
+    )
+    ASSET_CACHE_MAX_MB: int = Field(
+        default=256, description="Least recently used assets are evicted beyond this size"
+    )
+
+    PROFILE_SAMPLING: float = Field(
+        default=0,
+        ge=0,
+        le=1,
+        description="Fraction of `wait_for_challenge` calls recorded by the sampling profiler, "
+        "0 disables it. Wall-clock and CPU profiles (folded stacks, for flamegraph.pl or "
+        "speedscope) are written next to the challenge artifacts.",
+    )
+    PROFILE_INTERVAL_MS: float = Field(
+        default=5, gt=0, description="Sampling interval of the profiler [unit: millisecond]"
+    )
+
+    TRACE_EXPORT_PATH: Path | None = Field(
+        default=None,
+        description="Record tracing spans (page actions, reasoner calls with model, token counts "
+        "and retry attempts, `/checkcaptcha/` waits) to this JSON Lines file. Off if not set.",
+    )
+
     CONSTRAINT_RESPONSE_SCHEMA: bool = Field(
         default=True, description="Whether to enable constraint encoding"
     )
+    DERIVE_DRAG_START_POINTS: bool = Field(
+        default=True,
+        description="For `image_drag_drop`, compute the start points from the payload entities "
+        "and only ask the model for the destinations",
+    )
+    ANSWER_REASK_LIMIT: int = Field(
+        default=1,
+        description="How many times to re-ask the reasoner when its answer fails the geometric "
+        "pre-validation (points outside the canvas, wrong point count, ...). "
+        "The last answer is executed anyway once the limit is reached.",
+    )
     CHALLENGE_CLASSIFIER_MODEL: FastShotModelType = Field(
         default=DEFAULT_FAST_SHOT_MODEL,
         description="For the challenge classification task \n"
@@ -199,11 +366,16 @@ class AgentConfig(BaseSettings):
     def spatial_grid_cache(self):
         return self.cache_dir.joinpath("spatial_grid")
 
+    @property
+    def asset_cache_dir(self):
+        return self.cache_dir.joinpath("assets")
+
     def create_cache_key(
         self,
         captcha_payload: CaptchaPayload | None = None,
         request_type: str = "type",
         prompt: str = "unknown",
+        artifact_writer: ArtifactWriter | ForensicBuffer | None = None,
     ) -> Path:
         """
 
@@ -211,6 +383,7 @@ class AgentConfig(BaseSettings):
             captcha_payload:
             request_type:
             prompt:
+            artifact_writer: Persist the payload in the background, written inline if not provided
 
         Returns: ./.challenge / require_type / prompt / current_time
 
@@ -229,14 +402,19 @@ class AgentConfig(BaseSettings):
             current_time,
         )
 
-        try:
-            _cache_path_captcha = cache_key.joinpath(f"{cache_key.name}_captcha.json")
-            _cache_path_captcha.parent.mkdir(parents=True, exist_ok=True)
+        _cache_path_captcha = cache_key.joinpath(f"{cache_key.name}_captcha.json")
 
+        def _dump_payload():
             _unpacked_data = captcha_payload.model_dump(mode="json")
-            _cache_path_captcha.write_text(
-                json.dumps(_unpacked_data, indent=2, ensure_ascii=False), encoding="utf8"
-            )
+            return json.dumps(_unpacked_data, indent=2, ensure_ascii=False)
+
+        if artifact_writer:
+            artifact_writer.submit(ArtifactKind.PAYLOAD, _cache_path_captcha, _dump_payload)
+            return cache_key
+
+        try:
+            _cache_path_captcha.parent.mkdir(parents=True, exist_ok=True)
+            _cache_path_captcha.write_text(_dump_payload(), encoding="utf8")
         except Exception as e:
             logger.error(f"Failed to write captcha payload to cache: {e}")
 
@@ -245,29 +423,38 @@ class AgentConfig(BaseSettings):
 
 class RoboticArm:
 
-    def __init__(self, page: Page, config: AgentConfig):
+    def __init__(
+        self, page: Page, config: AgentConfig, artifact_writer: ArtifactWriter | None = None
+    ):
         self.page = page
         self.config = config
 
-        self._challenge_classifier = ChallengeClassifier(
+        self.artifact_writer = artifact_writer or ArtifactWriter.shared(
+            maxsize=config.ARTIFACT_QUEUE_SIZE,
+            sampling=config.ARTIFACT_SAMPLING,
+            write_behind=config.ARTIFACT_WRITE_BEHIND,
+            store_root=config.challenge_dir if config.ARTIFACT_STORE == "packed" else None,
+        )
+
+        self._challenge_classifier = ChallengeClassifier.shared(
             gemini_api_key=self.config.GEMINI_API_KEY.get_secret_value(),
             model=self.config.CHALLENGE_CLASSIFIER_MODEL,
         )
-        self._challenge_router = ChallengeRouter(
+        self._challenge_router = ChallengeRouter.shared(
             gemini_api_key=self.config.GEMINI_API_KEY.get_secret_value(),
             model=self.config.CHALLENGE_CLASSIFIER_MODEL,
         )
-        self._image_classifier = ImageClassifier(
+        self._image_classifier = ImageClassifier.shared(
             gemini_api_key=self.config.GEMINI_API_KEY.get_secret_value(),
             model=self.config.IMAGE_CLASSIFIER_MODEL,
             constraint_response_schema=self.config.CONSTRAINT_RESPONSE_SCHEMA,
         )
-        self._spatial_path_reasoner = SpatialPathReasoner(
+        self._spatial_path_reasoner = SpatialPathReasoner.shared(
             gemini_api_key=self.config.GEMINI_API_KEY.get_secret_value(),
             model=self.config.SPATIAL_PATH_REASONER_MODEL,
             constraint_response_schema=self.config.CONSTRAINT_RESPONSE_SCHEMA,
         )
-        self._spatial_point_reasoner = SpatialPointReasoner(
+        self._spatial_point_reasoner = SpatialPointReasoner.shared(
             gemini_api_key=self.config.GEMINI_API_KEY.get_secret_value(),
             model=self.config.SPATIAL_POINT_REASONER_MODEL,
             constraint_response_schema=self.config.CONSTRAINT_RESPONSE_SCHEMA,
@@ -276,9 +463,21 @@ class RoboticArm:
         self.captcha_payload: CaptchaPayload | None = None
         self._challenge_prompt: str | None = None
 
+        # Budget of the current solve, set by `AgentV.wait_for_challenge`
+        self.deadline = Deadline()
+
+        self._cdp_session: CDPSession | None = None
+        self._cdp_unavailable = False
+
         self._checkbox_selector = "//iframe[starts-with(@src,'https://newassets.hcaptcha.com/captcha/v1/') and contains(@src, 'frame=checkbox')]"
         self._challenge_selector = "//iframe[starts-with(@src,'https://newassets.hcaptcha.com/captcha/v1/') and contains(@src, 'frame=challenge')]"
 
+    def reset(self):
+        """Forget the state of the previous challenge, the page and its CDP session are kept"""
+        self.signal_crumb_count = None
+        self.captcha_payload = None
+        self._challenge_prompt = None
+
     @property
     def checkbox_selector(self) -> str:
         return self._checkbox_selector
@@ -362,6 +561,7 @@ class RoboticArm:
 
         return user_prompt
 
+    @traced("robotic_arm.click")
     async def click_by_mouse(self, locator: Locator):
         bbox = await locator.bounding_box()
 
@@ -372,11 +572,13 @@ class RoboticArm:
 
         await self.page.mouse.click(center_x, center_y, delay=150)
 
+    @traced("robotic_arm.click_checkbox")
     async def click_checkbox(self):
         checkbox_frame = self.page.frame_locator(self.checkbox_selector)
         checkbox_element = checkbox_frame.locator("//div[@id='checkbox']")
         await self.click_by_mouse(checkbox_element)
 
+    @traced("robotic_arm.refresh_challenge")
     async def refresh_challenge(self):
         try:
             refresh_frame = await self.get_challenge_frame_locator()
@@ -385,6 +587,18 @@ class RoboticArm:
         except TimeoutError as err:
             logger.warning(f"Failed to click refresh button - {err=}")
 
+    async def read_challenge_prompt(self) -> str | None:
+        """Prompt of the visible challenge view, None if no challenge is shown"""
+        frame = self._find_challenge_frame_recursive(self.page.main_frame, max_depth=4)
+        if not frame:
+            return None
+        with suppress(Exception):
+            if not await frame.locator("//div[@class='challenge-view']").is_visible():
+                return None
+            prompt = frame.locator(".prompt-text").first
+            return (await prompt.inner_text(timeout=500)).strip() or None
+        return None
+
     async def check_crumb_count(self):
         """Page turn in tasks"""
         # Determine the number of tasks based on hsw
@@ -397,6 +611,7 @@ class RoboticArm:
         crumbs = frame_challenge.locator("//div[@class='Crumb']")
         return 2 if await crumbs.first.is_visible() else 1
 
+    @traced("robotic_arm.check_challenge_type")
     async def check_challenge_type(self) -> RequestType | ChallengeTypeEnum | None:
         # fixme
         with suppress(Exception):
@@ -410,13 +625,13 @@ class RoboticArm:
             return RequestType.IMAGE_LABEL_BINARY
         if isinstance(count, int) and count == 0:
             tms = self.config.WAIT_FOR_CHALLENGE_VIEW_TO_RENDER_MS * 1.5
-            await self.page.wait_for_timeout(tms)
+            await self.page.wait_for_timeout(self.deadline.cap_ms(tms))
             challenge_view = frame_challenge.locator("//div[@class='challenge-view']")
             cache_path = self.config.cache_dir.joinpath(f"challenge_view/_artifacts/{uuid4()}.png")
-            cache_path.parent.mkdir(parents=True, exist_ok=True)
-            await challenge_view.screenshot(type="png", path=cache_path)
+            screenshot = await challenge_view.screenshot(type="png")
+            self.artifact_writer.submit(ArtifactKind.SCREENSHOT, cache_path, screenshot)
             router_result = await self._challenge_router.invoke_async(
-                challenge_screenshot=cache_path
+                challenge_screenshot=screenshot, deadline=self.deadline
             )
             self._challenge_prompt = router_result.challenge_prompt
             return router_result.challenge_type
@@ -426,7 +641,9 @@ class RoboticArm:
         """Wait for all loading indicators to complete (become invisible)"""
         frame_challenge = await self.get_challenge_frame_locator()
 
-        await self.page.wait_for_timeout(self.config.WAIT_FOR_CHALLENGE_VIEW_TO_RENDER_MS)
+        await self.page.wait_for_timeout(
+            self.deadline.cap_ms(self.config.WAIT_FOR_CHALLENGE_VIEW_TO_RENDER_MS)
+        )
 
         loading_indicators = frame_challenge.locator("//div[@class='loading-indicator']")
         count = await loading_indicators.count()
@@ -439,7 +656,7 @@ class RoboticArm:
             loader = loading_indicators.nth(i)
             try:
                 await expect(loader).to_have_attribute(
-                    "style", re.compile(r"opacity:\s*0"), timeout=30000
+                    "style", re.compile(r"opacity:\s*0"), timeout=self.deadline.cap_ms(30000)
                 )
                 await loading_indicators.nth(i).get_attribute("style")  # It cannot be removed
             except TimeoutError:
@@ -450,19 +667,22 @@ class RoboticArm:
 
         return True
 
-    @staticmethod
     async def _capture_spatial_mapping(
-        frame_challenge: FrameLocator | Frame, cache_key: Path, crumb_id: int | str
-    ):
+        self, frame_challenge: FrameLocator | Frame, cache_key: Path, crumb_id: int | str
+    ) -> Tuple[bytes, bytes]:
         # Capture challenge-view
         challenge_view = frame_challenge.locator("//div[@class='challenge-view']")
-        challenge_screenshot = cache_key.joinpath(f"{cache_key.name}_{crumb_id}_challenge_view.png")
-        await challenge_view.screenshot(type="png", path=challenge_screenshot)
+        challenge_screenshot = await challenge_view.screenshot(type="png")
+        self.artifact_writer.submit(
+            ArtifactKind.SCREENSHOT,
+            cache_key.joinpath(f"{cache_key.name}_{crumb_id}_challenge_view.png"),
+            challenge_screenshot,
+        )
 
         challenge_view = frame_challenge.locator("//div[@class='challenge-view']")
         bbox = await challenge_view.bounding_box()
 
-        # Save grid field
+        # Draw grid field
         result = create_coordinate_grid(
             challenge_screenshot,
             bbox,
@@ -471,13 +691,114 @@ class RoboticArm:
             color="gray",
             adaptive_contrast=False,
         )
-
-        grid_divisions = cache_key.joinpath(f"{cache_key.name}_{crumb_id}_spatial_helper.png")
-        grid_divisions.parent.mkdir(parents=True, exist_ok=True)
-        plt.imsave(str(grid_divisions.resolve()), result)
+        buffer = io.BytesIO()
+        plt.imsave(buffer, result, format="png")
+        grid_divisions = buffer.getvalue()
+        self.artifact_writer.submit(
+            ArtifactKind.SPATIAL_HELPER,
+            cache_key.joinpath(f"{cache_key.name}_{crumb_id}_spatial_helper.png"),
+            grid_divisions,
+        )
 
         return challenge_screenshot, grid_divisions
 
+    @staticmethod
+    async def _get_canvas_geometry(
+        frame_challenge: FrameLocator | Frame,
+    ) -> CanvasGeometry | FloatRect:
+        """
+        Locate the challenge canvas and the coordinate space it is drawn in.
+
+        Falls back to the challenge-view bounding box when there is no canvas,
+        in which case only the canvas-bounds checks can be applied.
+        """
+        challenge_view = frame_challenge.locator("//div[@class='challenge-view']")
+
+        with suppress(Exception):
+            canvas = challenge_view.locator("canvas").first
+            bbox = await canvas.bounding_box(timeout=1000)
+            natural_size = await canvas.evaluate(
+                "(el) => [el.width / (window.devicePixelRatio || 1), "
+                "el.height / (window.devicePixelRatio || 1)]"
+            )
+            if bbox and natural_size and natural_size[0] > 0 and natural_size[1] > 0:
+                return CanvasGeometry(
+                    bbox=bbox, natural_width=natural_size[0], natural_height=natural_size[1]
+                )
+
+        return await challenge_view.bounding_box()
+
+    def _get_crumb_task(self, crumb_id: int) -> CaptchaTask | None:
+        if not self.captcha_payload or crumb_id >= len(self.captcha_payload.tasklist):
+            return None
+        return self.captcha_payload.tasklist[crumb_id]
+
+    def _derive_drag_start_points(
+        self, canvas: CanvasGeometry | FloatRect, task: CaptchaTask | None
+    ) -> List[PointCoordinate] | None:
+        """Centers of the draggable entities in page coordinates, if the payload provides them"""
+        if not self.config.DERIVE_DRAG_START_POINTS:
+            return None
+        if not isinstance(canvas, CanvasGeometry) or not task or not task.entities:
+            return None
+
+        start_points = []
+        for entity in task.entities:
+            rect = canvas.entity_rect(entity)
+            start_points.append(
+                PointCoordinate(
+                    x=round(rect["x"] + rect["width"] / 2), y=round(rect["y"] + rect["height"] / 2)
+                )
+            )
+        return start_points
+
+    @staticmethod
+    def _model_answer_name(cache_key: Path, crumb_id: int, attempt: int) -> str:
+        if attempt == 0:
+            return f"{cache_key.name}_{crumb_id}_model_answer.json"
+        return f"{cache_key.name}_{crumb_id}_reask{attempt}_model_answer.json"
+
+    @staticmethod
+    def _with_rejection_feedback(user_prompt: str, problems: List[str]) -> str:
+        feedback = "\n".join(f"- {p}" for p in problems)
+        return (
+            f"{user_prompt}\n\n"
+            f"Your previous answer was rejected for the following reasons, "
+            f"please re-examine the challenge and answer again:\n{feedback}"
+        ).strip()
+
+    async def _get_cdp_session(self) -> CDPSession | None:
+        if self._cdp_unavailable or not self.config.CDP_DRAG_DISPATCH:
+            return None
+
+        if self._cdp_session is None:
+            try:
+                self._cdp_session = await self.page.context.new_cdp_session(self.page)
+            except Exception as err:
+                # Firefox / WebKit (e.g. Camoufox) do not expose CDP sessions
+                logger.debug(f"CDP session is unavailable, fallback to mouse moves - {err=}")
+                self._cdp_unavailable = True
+
+        return self._cdp_session
+
+    async def _dispatch_drag_events(
+        self, cdp_session: CDPSession, points: List[Tuple[float, float]], delays: List[float]
+    ):
+        """
+        Sends the trajectory as raw CDP input events, one at a time with real delays.
+
+        The browser stamps `event.timeStamp` on arrival, so pacing has to happen on the wire.
+        The button state travels with every move, as it would from a real mouse.
+        """
+        for event, wait in _build_drag_input_events(points, delays):
+            await cdp_session.send("Input.dispatchMouseEvent", event)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+        # Small pause between drag operations
+        await asyncio.sleep(random.uniform(0.08, 0.12))
+
+    @traced("robotic_arm.drag_drop")
     async def _perform_drag_drop(self, path: SpatialPath, steps: int = 25, delay_ms: int = 15):
         """
         Performs a human-like drag and drop operation using bezier curve trajectory.
@@ -503,30 +824,45 @@ class RoboticArm:
         # Small random delay before pressing down (human reaction time)
         await asyncio.sleep(random.uniform(0.05, 0.15))
 
-        # Press the mouse button down
-        await self.page.mouse.down()
-
         # Generate a bezier curve path with a control point
         points = _generate_bezier_trajectory((start_x, start_y), (end_x, end_y), steps)
 
         # Add velocity variation (slow start, fast middle, slow end)
         delays = _generate_dynamic_delays(steps, base_delay=delay_ms)
 
-        # Perform the drag with human-like movement
-        for i, ((current_x, current_y), delay) in enumerate(zip(points, delays)):
-            # Add slight "noise" to the path (more pronounced near the end)
+        # Add slight "noise" to the path (more pronounced near the end)
+        for i, (current_x, current_y) in enumerate(points):
             if i > steps * 0.7:  # In the last 30% of the movement
                 # More micro-adjustments near the end
                 noise_factor = 0.5 if i > steps * 0.9 else 0.2
                 current_x += random.uniform(-noise_factor, noise_factor)
                 current_y += random.uniform(-noise_factor, noise_factor)
+                points[i] = (current_x, current_y)
+
+        # Ensure we end exactly at the target position
+        points.append((end_x, end_y))
+        delays.append(0)
+
+        if cdp_session := await self._get_cdp_session():
+            try:
+                await self._dispatch_drag_events(cdp_session, points, delays)
+                return
+            except Exception as err:
+                logger.warning(f"CDP drag dispatch failed, fallback to mouse moves - {err=}")
+                self._cdp_unavailable = True
+                # Release the button in case the drag was interrupted after mousePressed
+                with suppress(Exception):
+                    await self.page.mouse.up()
+                await self.page.mouse.move(start_x, start_y)
+
+        # Press the mouse button down
+        await self.page.mouse.down()
 
+        # Perform the drag with human-like movement
+        for (current_x, current_y), delay in zip(points, delays):
             await self.page.mouse.move(current_x, current_y)
             await asyncio.sleep(delay / 1000)
 
-        # Ensure we end exactly at the target position
-        await self.page.mouse.move(end_x, end_y)
-
         # Small pause before releasing (human precision adjustment)
         await asyncio.sleep(random.uniform(0.05, 0.1))
 
@@ -536,28 +872,40 @@ class RoboticArm:
         # Small pause between drag operations
         await asyncio.sleep(random.uniform(0.08, 0.12))
 
+    @traced("robotic_arm.challenge")
     async def challenge_image_label_binary(self):
         frame_challenge = await self.get_challenge_frame_locator()
         crumb_count = await self.check_crumb_count()
-        cache_key = self.config.create_cache_key(self.captcha_payload)
+        current_span().set_attributes(
+            challenge_type=RequestType.IMAGE_LABEL_BINARY.value, crumbs=crumb_count
+        )
+        cache_key = self.config.create_cache_key(
+            self.captcha_payload, artifact_writer=self.artifact_writer
+        )
 
         for cid in range(crumb_count):
             await self._wait_for_all_loaders_complete()
 
             # Get challenge-view
             challenge_view = frame_challenge.locator("//div[@class='challenge-view']")
-            challenge_screenshot = cache_key.joinpath(f"{cache_key.name}_{cid}_challenge_view.png")
-            await challenge_view.screenshot(type="png", path=challenge_screenshot)
+            challenge_screenshot = await challenge_view.screenshot(type="png")
+            self.artifact_writer.submit(
+                ArtifactKind.SCREENSHOT,
+                cache_key.joinpath(f"{cache_key.name}_{cid}_challenge_view.png"),
+                challenge_screenshot,
+            )
 
             # Image classification
             response = await self._image_classifier.invoke_async(
-                challenge_screenshot=challenge_screenshot
+                challenge_screenshot=challenge_screenshot, deadline=self.deadline
             )
             boolean_matrix = response.convert_box_to_boolean_matrix()
 
             logger.debug(f'[{cid+1}/{crumb_count}]ToolInvokeMessage: {response.log_message}')
-            self._image_classifier.cache_response(
-                path=cache_key.joinpath(f"{cache_key.name}_{cid}_model_answer.json")
+            self.artifact_writer.submit(
+                ArtifactKind.MODEL_ANSWER,
+                cache_key.joinpath(f"{cache_key.name}_{cid}_model_answer.json"),
+                self._image_classifier.dump_response(),
             )
 
             # drive the browser to work on the challenge
@@ -577,28 +925,59 @@ class RoboticArm:
                 submit_btn = frame_challenge.locator("//div[@class='button-submit button']")
                 await self.click_by_mouse(submit_btn)
 
+    @traced("robotic_arm.challenge")
     async def challenge_image_drag_drop(self, job_type: ChallengeTypeEnum):
         frame_challenge = await self.get_challenge_frame_locator()
         crumb_count = await self.check_crumb_count()
-        cache_key = self.config.create_cache_key(self.captcha_payload)
+        current_span().set_attributes(challenge_type=job_type.value, crumbs=crumb_count)
+        cache_key = self.config.create_cache_key(
+            self.captcha_payload, artifact_writer=self.artifact_writer
+        )
 
         for cid in range(crumb_count):
-            await self.page.wait_for_timeout(self.config.WAIT_FOR_CHALLENGE_VIEW_TO_RENDER_MS)
+            await self.page.wait_for_timeout(
+                self.deadline.cap_ms(self.config.WAIT_FOR_CHALLENGE_VIEW_TO_RENDER_MS)
+            )
 
             raw, projection = await self._capture_spatial_mapping(frame_challenge, cache_key, cid)
+            canvas = await self._get_canvas_geometry(frame_challenge)
+            task = self._get_crumb_task(cid)
+            start_points = self._derive_drag_start_points(canvas, task)
 
             user_prompt = self._match_user_prompt(job_type)
 
-            response = await self._spatial_path_reasoner.invoke_async(
-                challenge_screenshot=raw,
-                grid_divisions=projection,
-                auxiliary_information=user_prompt,
-            )
-            logger.debug(f'[{cid+1}/{crumb_count}]ToolInvokeMessage: {response.log_message}')
-            self._spatial_path_reasoner.cache_response(
-                path=cache_key.joinpath(f"{cache_key.name}_{cid}_model_answer.json")
-            )
+            for attempt in range(self.config.ANSWER_REASK_LIMIT + 1):
+                try:
+                    response = await self._spatial_path_reasoner.invoke_async(
+                        challenge_screenshot=raw,
+                        grid_divisions=projection,
+                        auxiliary_information=user_prompt,
+                        start_points=start_points,
+                        deadline=self.deadline,
+                    )
+                except DragDestinationCountError as err:
+                    # Pairing them anyway would submit a partial answer
+                    response, problems = None, [str(err)]
+                else:
+                    logger.debug(
+                        f'[{cid+1}/{crumb_count}]ToolInvokeMessage: {response.log_message}'
+                    )
+                    problems = validate_drag_drop_answer(response, canvas=canvas, task=task)
+                self.artifact_writer.submit(
+                    ArtifactKind.MODEL_ANSWER,
+                    cache_key.joinpath(self._model_answer_name(cache_key, cid, attempt)),
+                    self._spatial_path_reasoner.dump_response(),
+                )
+
+                if not problems or attempt >= self.config.ANSWER_REASK_LIMIT:
+                    break
+                logger.warning(f"[{cid+1}/{crumb_count}]Answer rejected, re-ask - {problems=}")
+                user_prompt = self._with_rejection_feedback(
+                    self._match_user_prompt(job_type), problems
+                )
 
+            if response is None:
+                raise DragDestinationCountError(f"Unusable drag answer - {problems=}")
             for path in response.paths:
                 await self._perform_drag_drop(path)
 
@@ -607,30 +986,54 @@ class RoboticArm:
                 submit_btn = frame_challenge.locator("//div[@class='button-submit button']")
                 await self.click_by_mouse(submit_btn)
 
+    @traced("robotic_arm.challenge")
     async def challenge_image_label_select(self, job_type: ChallengeTypeEnum):
         frame_challenge = await self.get_challenge_frame_locator()
         crumb_count = await self.check_crumb_count()
-        cache_key = self.config.create_cache_key(self.captcha_payload)
+        current_span().set_attributes(challenge_type=job_type.value, crumbs=crumb_count)
+        cache_key = self.config.create_cache_key(
+            self.captcha_payload, artifact_writer=self.artifact_writer
+        )
+
+        request_config = self.captcha_payload.request_config if self.captcha_payload else None
 
         for cid in range(crumb_count):
-            await self.page.wait_for_timeout(self.config.WAIT_FOR_CHALLENGE_VIEW_TO_RENDER_MS)
+            await self.page.wait_for_timeout(
+                self.deadline.cap_ms(self.config.WAIT_FOR_CHALLENGE_VIEW_TO_RENDER_MS)
+            )
 
             raw, projection = await self._capture_spatial_mapping(frame_challenge, cache_key, cid)
+            canvas = await self._get_canvas_geometry(frame_challenge)
 
             user_prompt = self._match_user_prompt(job_type)
 
-            response = await self._spatial_point_reasoner.invoke_async(
-                challenge_screenshot=raw,
-                grid_divisions=projection,
-                auxiliary_information=user_prompt,
-            )
-            logger.debug(f'[{cid+1}/{crumb_count}]ToolInvokeMessage: {response.log_message}')
-            self._spatial_point_reasoner.cache_response(
-                path=cache_key.joinpath(f"{cache_key.name}_{cid}_model_answer.json")
-            )
+            for attempt in range(self.config.ANSWER_REASK_LIMIT + 1):
+                response = await self._spatial_point_reasoner.invoke_async(
+                    challenge_screenshot=raw,
+                    grid_divisions=projection,
+                    auxiliary_information=user_prompt,
+                    deadline=self.deadline,
+                )
+                logger.debug(f'[{cid+1}/{crumb_count}]ToolInvokeMessage: {response.log_message}')
+                self.artifact_writer.submit(
+                    ArtifactKind.MODEL_ANSWER,
+                    cache_key.joinpath(self._model_answer_name(cache_key, cid, attempt)),
+                    self._spatial_point_reasoner.dump_response(),
+                )
+
+                problems = validate_area_select_answer(
+                    response, canvas=canvas, request_config=request_config
+                )
+                if not problems or attempt >= self.config.ANSWER_REASK_LIMIT:
+                    break
+                logger.warning(f"[{cid+1}/{crumb_count}]Answer rejected, re-ask - {problems=}")
+                user_prompt = self._with_rejection_feedback(
+                    self._match_user_prompt(job_type), problems
+                )
 
             for point in response.points:
-                await self.page.mouse.click(point.x, point.y, delay=180)
+                with span("robotic_arm.click", x=point.x, y=point.y):
+                    await self.page.mouse.click(point.x, point.y, delay=180)
                 await self.page.wait_for_timeout(500)
 
             # {{< Verify >}}
@@ -645,14 +1048,45 @@ class AgentV:
         self.page = page
         self.config = agent_config
 
+        if agent_config.TRACE_EXPORT_PATH:
+            configure_file_tracing(agent_config.TRACE_EXPORT_PATH)
+
         self.robotic_arm = RoboticArm(page=page, config=agent_config)
+        self.artifact_writer = self.robotic_arm.artifact_writer
 
         self._captcha_payload: CaptchaPayload | None = None
         self._captcha_payload_queue: Queue[CaptchaPayload | None] = Queue()
         self._captcha_response_queue: Queue[CaptchaResponse] = Queue()
         self.cr_list: List[CaptchaResponse] = []
 
-        self.page.on("response", self._task_handler)
+        # Set when a `/getcaptcha/` payload arrives after the current one was consumed,
+        # i.e. hCaptcha served a new challenge
+        self._fresh_payload = asyncio.Event()
+
+        # Only hCaptcha responses reach the handler, see `ResponseInterceptor`
+        asset_cache = None
+        if agent_config.ASSET_CACHE:
+            asset_cache = AssetCache.shared(
+                agent_config.asset_cache_dir,
+                ttl=agent_config.ASSET_CACHE_TTL,
+                max_bytes=agent_config.ASSET_CACHE_MAX_MB * 1024 * 1024,
+            )
+        self._interception = ResponseInterceptor.attach(page, self._task_handler, asset_cache)
+
+    def reset(self):
+        """
+        Prepare the agent for the next solve on the same page.
+
+        Clears the payloads and responses left over from the previous challenge,
+        reasoners, the artifact writer and the page listener are reused.
+        """
+        self._captcha_payload = None
+        for q in (self._captcha_payload_queue, self._captcha_response_queue):
+            while not q.empty():
+                q.get_nowait()
+        self._fresh_payload.clear()
+        self.cr_list.clear()
+        self.robotic_arm.reset()
 
     def _cache_validated_captcha_response(self, cr: CaptchaResponse):
         if not cr.is_pass:
@@ -660,15 +1094,20 @@ class AgentV:
 
         self.cr_list.append(cr)
 
-        try:
+        current_time = datetime.now().strftime("%Y%m%d/%Y%m%d%H%M%S%f")
+        cache_path = self.config.captcha_response_dir.joinpath(f"{current_time}.json")
+
+        def _dump_captcha_response():
             captcha_response = cr.model_dump(mode="json", by_alias=True)
-            current_time = datetime.now().strftime("%Y%m%d/%Y%m%d%H%M%S%f")
-            cache_path = self.config.captcha_response_dir.joinpath(f"{current_time}.json")
-            cache_path.parent.mkdir(parents=True, exist_ok=True)
-            t = json.dumps(captcha_response, indent=2, ensure_ascii=False)
-            cache_path.write_text(t, encoding="utf-8")
-        except Exception as err:
-            logger.error(f"Saving captcha response failed - {err}")
+            return json.dumps(captcha_response, indent=2, ensure_ascii=False)
+
+        self.artifact_writer.submit(
+            ArtifactKind.CAPTCHA_RESPONSE, cache_path, _dump_captcha_response
+        )
+
+    def _put_captcha_payload(self, captcha_payload: CaptchaPayload | None):
+        self._captcha_payload_queue.put_nowait(captcha_payload)
+        self._fresh_payload.set()
 
     @logger.catch
     async def _task_handler(self, response: Response):
@@ -699,7 +1138,7 @@ class AgentV:
                     return
                 if data.get("request_config"):
                     captcha_payload = CaptchaPayload(**data)
-                    self._captcha_payload_queue.put_nowait(captcha_payload)
+                    self._put_captcha_payload(captcha_payload)
                     return
 
             # Content-Type: stream
@@ -735,16 +1174,16 @@ class AgentV:
                     ):
                         unpacked_data = msgpack.unpackb(bytes(result))
                         captcha_payload = CaptchaPayload(**unpacked_data)
-                        self._captcha_payload_queue.put_nowait(captcha_payload)
+                        self._put_captcha_payload(captcha_payload)
 
                         return
                 # If the reverse fails, fall back to the original process
                 else:
                     logger.warning("HSW reverse failed, fallback to regular processing")
-                    self._captcha_payload_queue.put_nowait(None)
+                    self._put_captcha_payload(None)
             except Exception as err:
                 logger.error(f"Reverse processing getcaptcha failed: {err}")
-                self._captcha_payload_queue.put_nowait(None)
+                self._put_captcha_payload(None)
         elif "/checkcaptcha/" in response.url:
             try:
                 metadata = await response.json()
@@ -752,11 +1191,14 @@ class AgentV:
             except Exception as err:
                 logger.exception(err)
 
+    @traced("agent.review_challenge_type")
     async def _review_challenge_type(self) -> RequestType | ChallengeTypeEnum:
         try:
             self._captcha_payload = await asyncio.wait_for(
-                self._captcha_payload_queue.get(), timeout=30.0
+                self._captcha_payload_queue.get(), timeout=self.robotic_arm.deadline.cap(30.0)
             )
+            if self._captcha_payload_queue.empty():
+                self._fresh_payload.clear()
             await self.page.wait_for_timeout(500)
         except asyncio.TimeoutError:
             logger.error("Wait for captcha payload to timeout")
@@ -802,6 +1244,10 @@ class AgentV:
         return await self.robotic_arm.check_challenge_type()
 
     async def _solve_captcha(self):
+        deadline = self.robotic_arm.deadline
+        if deadline.expired:
+            raise asyncio.TimeoutError("The execution deadline was exceeded")
+
         challenge_type = await self._review_challenge_type()
         logger.debug(
             f"Start Challenge - type={challenge_type.value} count={self.robotic_arm.signal_crumb_count}"
@@ -813,7 +1259,7 @@ class AgentV:
                 if self.config.ignore_request_questions and self._captcha_payload:
                     for q in self.config.ignore_request_questions:
                         if q in self._captcha_payload.get_requester_question():
-                            await self.page.wait_for_timeout(2000)
+                            await self.page.wait_for_timeout(deadline.cap_ms(2000))
                             await self.robotic_arm.refresh_challenge()
                             return await self._solve_captcha()
 
@@ -856,23 +1302,158 @@ class AgentV:
                     logger.warning(f"Unknown types of challenges: {challenge_type}")
             # {{< challenge end >}}
 
-            await self.page.wait_for_timeout(2000)
+            await self.page.wait_for_timeout(deadline.cap_ms(2000))
             await self.robotic_arm.refresh_challenge()
             return await self._solve_captcha()
         except Exception as err:
             # This is an execution error inside the challenge,
             # hcaptcha challenge does not automatically refresh
             logger.exception(f"ChallengeException - type={challenge_type.value} {err=}")
-            await self.page.wait_for_timeout(5000)
+            await self.page.wait_for_timeout(deadline.cap_ms(5000))
             await self.robotic_arm.refresh_challenge()
             return await self._solve_captcha()
 
-    async def wait_for_challenge(self) -> ChallengeSignal:
+    async def _wait_for_new_challenge(self, prompt: str | None, interval: float = 0.5):
+        """
+        Return once hCaptcha serves another challenge instead of accepting the answer.
+
+        The fresh `/getcaptcha/` payload is the primary signal. The challenge prompt is
+        polled as a fallback for payloads the handler could not decode.
+        """
+        while True:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._fresh_payload.wait(), timeout=interval)
+                logger.debug("A new challenge payload arrived after submit")
+                return
+            current = await self.robotic_arm.read_challenge_prompt()
+            if prompt and current and current != prompt:
+                logger.debug(f"The challenge view shows a new prompt - {current=}")
+                return
+
+    async def _wait_for_captcha_response(self, timeout: float | None) -> CaptchaResponse | None:
+        """
+        Wait for the `/checkcaptcha/` result, or fail fast when a new challenge appears first.
+
+        Returns:
+            The captcha response, or None if hCaptcha served a new challenge
+
+        Raises:
+            asyncio.TimeoutError: Neither happened within `timeout`
+        """
+        with span("agent.wait_for_captcha_response") as wait_span:
+            prompt = await self.robotic_arm.read_challenge_prompt()
+            cr_task = asyncio.ensure_future(self._captcha_response_queue.get())
+            new_challenge_task = asyncio.ensure_future(self._wait_for_new_challenge(prompt))
+            try:
+                done, _ = await asyncio.wait(
+                    {cr_task, new_challenge_task},
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            finally:
+                for task in (cr_task, new_challenge_task):
+                    if not task.done():
+                        task.cancel()
+
+            # Prefer the verdict if both are ready
+            if cr_task in done:
+                cr = cr_task.result()
+                wait_span.set_attributes(outcome="response", is_pass=cr.is_pass)
+                return cr
+            if new_challenge_task in done:
+                new_challenge_task.result()
+                wait_span.set_attribute("outcome", "new_challenge")
+                return None
+            wait_span.set_attribute("outcome", "timeout")
+            raise asyncio.TimeoutError
+
+    async def wait_for_challenge(self, deadline: Deadline | None = None) -> ChallengeSignal:
+        """
+        Args:
+            deadline: Budget of the whole call, retries on failure included.
+                Each attempt is further limited by `EXECUTION_TIMEOUT` and `RESPONSE_TIMEOUT`.
+
+        Cancelling the call cancels the pending page waits, uploads and reasoner calls,
+        and re-raises `asyncio.CancelledError` once they are cancelled. The page is left
+        as it is, close it or its context rather than solving on it again.
+
+        With `ARTIFACT_CAPTURE="failures"`, the artifacts of the call are buffered in memory
+        and written once it returns anything but success, see `ForensicBuffer`.
+        """
+        deadline = deadline or Deadline()
+        await self._interception
+
+        profiler = None
+        if random.random() < self.config.PROFILE_SAMPLING:
+            profiler = SamplingProfiler(interval=self.config.PROFILE_INTERVAL_MS / 1000)
+
+        buffer = None
+        if self.config.ARTIFACT_CAPTURE == "failures":
+            buffer = ForensicBuffer(self.artifact_writer, capacity=self.config.ARTIFACT_BUFFER_SIZE)
+            self.artifact_writer = self.robotic_arm.artifact_writer = buffer
+
+        signal = None
+        try:
+            with profiler or nullcontext():
+                signal = await self._wait_for_challenge(deadline)
+            return signal
+        except asyncio.CancelledError:
+            logger.warning("Challenge cancelled by the caller")
+            signal = ChallengeSignal.CANCELLED
+            raise
+        finally:
+            if profiler is not None:
+                self._save_profile(profiler, signal)
+            if buffer is not None:
+                self._settle_artifacts(buffer, signal)
+
+    def _settle_artifacts(self, buffer: ForensicBuffer, signal: ChallengeSignal | None):
+        """Write the buffered artifacts of a failed or sampled solve, forget the others"""
+        self.artifact_writer = self.robotic_arm.artifact_writer = buffer.writer
+        if (
+            signal == ChallengeSignal.SUCCESS
+            and not random.random() < self.config.ARTIFACT_SUCCESS_SAMPLING
+        ):
+            buffer.discard()
+            return
+        logger.debug(
+            f"Writing the artifacts of the solve - signal={signal and signal.value} "
+            f"buffered={buffer.pending} dropped={buffer.dropped}"
+        )
+        buffer.commit()
+
+    def _save_profile(self, profiler: SamplingProfiler, signal: ChallengeSignal | None):
+        request_type, prompt = "unknown", "unknown"
+        if self._captcha_payload:
+            request_type = self._captcha_payload.request_type.value
+            prompt = self._captcha_payload.get_requester_question()
+        cache_key = self.config.create_cache_key(request_type=request_type, prompt=prompt)
+
+        signal_name = signal.value if signal else "error"
+        for view in ("wall", "cpu"):
+            if view == "cpu" and not profiler.cpu_available:
+                continue
+            self.artifact_writer.submit(
+                ArtifactKind.PROFILE,
+                cache_key.joinpath(f"{cache_key.name}_{signal_name}_profile_{view}.folded"),
+                functools.partial(profiler.folded, view),
+            )
+        logger.debug(
+            f"Profiled challenge - elapsed={profiler.elapsed:.1f}s samples={profiler.samples} "
+            f"top={[(label, round(share, 3)) for label, share in profiler.top(3)]}"
+        )
+
+    @traced("agent.wait_for_challenge")
+    async def _wait_for_challenge(self, deadline: Deadline) -> ChallengeSignal:
+
         # Assigning human-computer challenge tasks to the main thread coroutine.
         # ----------------------------------------------------------------------
+        self.robotic_arm.deadline = deadline.child(self.config.EXECUTION_TIMEOUT)
         try:
             if self._captcha_response_queue.empty():
-                await asyncio.wait_for(self._solve_captcha(), timeout=self.config.EXECUTION_TIMEOUT)
+                await asyncio.wait_for(
+                    self._solve_captcha(), timeout=self.robotic_arm.deadline.remaining
+                )
         except asyncio.TimeoutError:
             logger.error("Challenge execution timed out", timeout=self.config.EXECUTION_TIMEOUT)
             return ChallengeSignal.EXECUTION_TIMEOUT
@@ -883,9 +1464,7 @@ class AgentV:
         # it is expected to obtain a signal indicating whether the challenge was successful in the cr_queue.
         logger.debug("Start checking captcha response")
         try:
-            cr = await asyncio.wait_for(
-                self._captcha_response_queue.get(), timeout=self.config.RESPONSE_TIMEOUT
-            )
+            cr = await self._wait_for_captcha_response(deadline.cap(self.config.RESPONSE_TIMEOUT))
         except asyncio.TimeoutError:
             logger.error(f"Wait for captcha response timeout {self.config.RESPONSE_TIMEOUT}s")
             return ChallengeSignal.EXECUTION_TIMEOUT
@@ -893,9 +1472,14 @@ class AgentV:
             # Match: Timeout / Loss
             if not cr or not cr.is_pass:
                 if self.config.RETRY_ON_FAILURE:
+                    if deadline.expired:
+                        logger.error("Failed to challenge, no budget left to retry")
+                        return ChallengeSignal.EXECUTION_TIMEOUT
                     logger.warning("Failed to challenge, try to retry the strategy")
-                    await self.page.wait_for_timeout(2000)
-                    return await self.wait_for_challenge()
+                    # A new challenge is already on screen, no need to wait for it
+                    if cr is not None:
+                        await self.page.wait_for_timeout(deadline.cap_ms(2000))
+                    return await self._wait_for_challenge(deadline)
                 return ChallengeSignal.FAILURE
             # Match: Success
             if cr.is_pass:
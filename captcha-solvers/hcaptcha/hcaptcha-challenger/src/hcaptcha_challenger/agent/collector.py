@@ -1,4 +1,5 @@
 import asyncio
+import fnmatch
 import json
 import re
 import time
@@ -14,6 +15,8 @@ from loguru import logger
 from playwright.async_api import Page, Response, Locator, TimeoutError, expect
 from pydantic import Field, BaseModel
 
+from hcaptcha_challenger.agent.artifact_store import ArtifactStore
+from hcaptcha_challenger.agent.interception import ResponseInterceptor
 from hcaptcha_challenger.models import RequestType, CaptchaPayload, CaptchaResponse
 from hcaptcha_challenger.utils import SiteKey
 
@@ -37,6 +40,11 @@ class CollectorConfig(BaseModel):
     WAIT_FOR_TIMEOUT_CHALLENGE_VIEW: float = Field(
         default=2000, description="Waiting for the challenge view to render (millisecond)"
     )
+    PACKED_STORE: bool = Field(
+        default=False,
+        description="Append samples to segment files in `dataset_dir/_segments` "
+        "instead of creating one file per image",
+    )
 
 
 class Collector:
@@ -51,9 +59,19 @@ class Collector:
         self._startup_time = time.time()
         self._current_request_type = None
 
+        self._store = ArtifactStore(self.config.dataset_dir) if self.config.PACKED_STORE else None
+
         self._init_loop_control()
 
-        self.page.on("response", self._task_handler)
+        self._interception = ResponseInterceptor.attach(page, self._task_handler)
+
+    def _save(self, path: Path, content: bytes | str):
+        if self._store:
+            self._store.append(path, content)
+        elif isinstance(content, str):
+            path.write_text(content, encoding="utf8")
+        else:
+            path.write_bytes(content)
 
     def _init_loop_control(self):
         count = max(self.config.MAX_LOOP_COUNT, 1)
@@ -230,7 +248,10 @@ class Collector:
 
             challenge_view = frame_challenge.locator("//div[@class='challenge-view']")
             cache_path = cache_key.joinpath(f"{crt}_{cid}_challenge_view.png")
-            await challenge_view.screenshot(type="png", path=cache_path)
+            if self._store:
+                self._save(cache_path, await challenge_view.screenshot(type="png"))
+            else:
+                await challenge_view.screenshot(type="png", path=cache_path)
 
             if signal_crumb_count > 1:
                 with suppress(TimeoutError):
@@ -246,12 +267,11 @@ class Collector:
         self._current_request_type = cp.request_type.value if cp.request_type else "unknown"
 
         cache_path_captcha = cache_key.joinpath(f"{crt}_captcha.json")
-        cache_path_captcha.parent.mkdir(parents=True, exist_ok=True)
+        if not self._store:
+            cache_path_captcha.parent.mkdir(parents=True, exist_ok=True)
 
         unpacked_data = cp.model_dump(mode="json")
-        cache_path_captcha.write_text(
-            json.dumps(unpacked_data, indent=2, ensure_ascii=False), encoding="utf8"
-        )
+        self._save(cache_path_captcha, json.dumps(unpacked_data, indent=2, ensure_ascii=False))
 
         match cp.request_type:
             case RequestType.IMAGE_LABEL_BINARY:
@@ -260,41 +280,41 @@ class Collector:
                     j = j if j <= 8 else j - 9
                     image_response = await client.get(task.datapoint_uri)
                     cache_path_challenge = cache_key.joinpath(f"{crt}_{i}_{j}_task.png")
-                    cache_path_challenge.write_bytes(image_response.content)
+                    self._save(cache_path_challenge, image_response.content)
                     if cp.requester_question_example:
                         if isinstance(cp.requester_question_example, str):
                             example_response = await client.get(cp.requester_question_example)
                             cache_path_example = cache_key.joinpath(f"{crt}_0_example.png")
-                            cache_path_example.write_bytes(example_response.content)
+                            self._save(cache_path_example, example_response.content)
                         elif isinstance(cp.requester_question_example, list):
                             for j, example_uri in enumerate(cp.requester_question_example):
                                 example_response = await client.get(example_uri)
                                 cache_path_example = cache_key.joinpath(f"{crt}_{j}_example.png")
-                                cache_path_example.write_bytes(example_response.content)
+                                self._save(cache_path_example, example_response.content)
             case RequestType.IMAGE_LABEL_AREA_SELECT:
                 for i, task in enumerate(cp.tasklist):
                     canvas_response = await client.get(task.datapoint_uri)
                     cache_path_canvas = cache_key.joinpath(f"{crt}_{i}_canvas.png")
-                    cache_path_canvas.write_bytes(canvas_response.content)
+                    self._save(cache_path_canvas, canvas_response.content)
                 if cp.requester_question_example:
                     if isinstance(cp.requester_question_example, str):
                         example_response = await client.get(cp.requester_question_example)
                         cache_path_example = cache_key.joinpath(f"{crt}_0_example.png")
-                        cache_path_example.write_bytes(example_response.content)
+                        self._save(cache_path_example, example_response.content)
                     elif isinstance(cp.requester_question_example, list):
                         for j, example_uri in enumerate(cp.requester_question_example):
                             example_response = await client.get(example_uri)
                             cache_path_example = cache_key.joinpath(f"{crt}_{j}_example.png")
-                            cache_path_example.write_bytes(example_response.content)
+                            self._save(cache_path_example, example_response.content)
             case RequestType.IMAGE_DRAG_DROP:
                 for i, task in enumerate(cp.tasklist):
                     canvas_response = await client.get(task.datapoint_uri)
                     cache_path_canvas = cache_key.joinpath(f"{crt}_{i}_canvas.png")
-                    cache_path_canvas.write_bytes(canvas_response.content)
+                    self._save(cache_path_canvas, canvas_response.content)
                     for j, entity in enumerate(task.entities):
                         entity_response = await client.get(entity.entity_uri)
                         cache_path_entity = cache_key.joinpath(f"{crt}_{i}_{j}_entity.png")
-                        cache_path_entity.write_bytes(entity_response.content)
+                        self._save(cache_path_entity, entity_response.content)
             case _:
                 logger.warning("Unsupported request type")
 
@@ -308,6 +328,8 @@ class Collector:
             logger.error("No focus types specified")
             return
 
+        await self._interception
+
         site_link = SiteKey.as_site_link(self.config.site_key)
         await self.page.goto(site_link)
 
@@ -364,7 +386,14 @@ class Collector:
 
 def check_dataset(captcha_path: Path):
     cp = CaptchaPayload.model_validate_json(captcha_path.read_bytes())
-    root = captcha_path.parent
+    check_dataset_files(cp, [p.name for p in captcha_path.parent.iterdir()])
+
+
+def check_dataset_files(cp: CaptchaPayload, names: List[str]):
+    """Verify the files of one sample, `names` come from a directory or an `ArtifactStore` group"""
+
+    def _glob(pattern: str) -> List[str]:
+        return fnmatch.filter(names, pattern)
 
     # 确定信号面包屑数量
     signal_crumb_count = len(cp.tasklist)
@@ -372,7 +401,7 @@ def check_dataset(captcha_path: Path):
         signal_crumb_count = int(len(cp.tasklist) / 9)
 
     # 验证challenge_view数量
-    cv_paths = list(root.glob("*_challenge_view.png"))
+    cv_paths = _glob("*_challenge_view.png")
     _verify_file_count(
         actual=len(cv_paths), expected=signal_crumb_count, file_type="challenge_view"
     )
@@ -380,11 +409,11 @@ def check_dataset(captcha_path: Path):
     # 根据请求类型验证不同文件
     if cp.request_type == RequestType.IMAGE_LABEL_BINARY:
         _verify_file_count(
-            actual=len(list(root.glob("*_task.png"))), expected=len(cp.tasklist), file_type="task"
+            actual=len(_glob("*_task.png")), expected=len(cp.tasklist), file_type="task"
         )
     elif cp.request_type in [RequestType.IMAGE_LABEL_AREA_SELECT, RequestType.IMAGE_DRAG_DROP]:
         _verify_file_count(
-            actual=len(list(root.glob("*_canvas.png"))),
+            actual=len(_glob("*_canvas.png")),
             expected=len(cp.tasklist),
             file_type="canvas",
         )
@@ -393,7 +422,7 @@ def check_dataset(captcha_path: Path):
         if cp.request_type == RequestType.IMAGE_DRAG_DROP:
             for i, task in enumerate(cp.tasklist):
                 _verify_file_count(
-                    actual=len(list(root.glob(f"*{i}_entity.png"))),
+                    actual=len(_glob(f"*{i}_entity.png")),
                     expected=len(task.entities),
                     file_type="entity",
                 )
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import weakref
+from contextlib import suppress
+from typing import Any, Awaitable, Callable, Dict
+
+from loguru import logger
+from playwright.async_api import BrowserContext, Page, Response, Route
+
+from hcaptcha_challenger.agent.asset_cache import HCAPTCHA_ASSET_PATTERN, AssetCache
+
+ResponseHandler = Callable[[Response], Awaitable[Any]]
+
+HCAPTCHA_RESPONSE_PATTERN = re.compile(
+    r"^https://(?:[\w-]+\.)*hcaptcha\.com(?:/[^?#]*)?/(?:hsw\.js(?:$|[?#])|getcaptcha/|checkcaptcha/)"
+)
+"""The only responses the agents read: `hsw.js`, `/getcaptcha/` and `/checkcaptcha/`"""
+
+
+class ResponseInterceptor:
+    """
+    One route per browser context for the hCaptcha responses the agents consume.
+
+    The route matches `HCAPTCHA_RESPONSE_PATTERN` only, so the rest of the page's traffic
+    never crosses the driver into Python. The responses are observed, never re-issued: the
+    route falls back to the page's own network stack and proxy, then reads the response
+    the page received and dispatches it to the handler registered for that page. Like any
+    route, it turns off the HTTP cache of the context.
+
+    With an `AssetCache`, static hCaptcha assets are routed too: hits are served from disk,
+    misses go out through the browser and fill the cache.
+    """
+
+    _instances: weakref.WeakKeyDictionary[BrowserContext, ResponseInterceptor] = (
+        weakref.WeakKeyDictionary()
+    )
+
+    def __init__(self, context: BrowserContext, asset_cache: AssetCache | None = None):
+        self.context = context
+        self.asset_cache = asset_cache
+        self._handlers: Dict[Page, ResponseHandler] = {}
+        self._registered: asyncio.Future | None = None
+
+    @classmethod
+    def attach(
+        cls, page: Page, handler: ResponseHandler, asset_cache: AssetCache | None = None
+    ) -> asyncio.Future:
+        """
+        Dispatch the hCaptcha responses of `page` to `handler`, replacing any previous one.
+
+        The routes are registered once per context, `asset_cache` is taken from the first
+        page attached to it. The returned future resolves when the routes are in place.
+        It is scheduled right away, so it is sent to the browser before any later action
+        of the caller, e.g. clicking the checkbox.
+        """
+        context = page.context
+        interceptor = cls._instances.get(context)
+        if interceptor is None:
+            interceptor = cls._instances[context] = cls(context, asset_cache)
+
+        if page not in interceptor._handlers:
+            page.once("close", lambda *_: interceptor._handlers.pop(page, None))
+        interceptor._handlers[page] = handler
+
+        if interceptor._registered is None:
+            interceptor._registered = asyncio.ensure_future(interceptor._register())
+        return interceptor._registered
+
+    async def _register(self):
+        if self.asset_cache is not None:
+            await self.context.route(HCAPTCHA_ASSET_PATTERN, self._on_asset_route)
+        # The latest route runs first, so `hsw.js` is observed even when served from the cache
+        await self.context.route(HCAPTCHA_RESPONSE_PATTERN, self._on_response_route)
+
+    async def _on_response_route(self, route: Route):
+        handler = None
+        with suppress(Exception):
+            handler = self._handlers.get(route.request.frame.page)
+        await route.fallback()
+        if handler is None:
+            return
+
+        if response := await route.request.response():
+            await handler(response)
+
+    async def _on_asset_route(self, route: Route):
+        if not self.asset_cache.accepts(route):
+            await route.fallback()
+            return
+
+        asset = None
+        try:
+            asset = await self.asset_cache.lookup(route.request.url)
+        except Exception as err:
+            logger.warning(
+                f"Failed to read a cached hCaptcha asset - url={route.request.url} {err=}"
+            )
+        if asset is not None:
+            await route.fulfill(status=asset.status, headers=asset.headers, body=await asset.body())
+            return
+
+        # A miss goes out through the browser, the cache is filled from its response
+        await route.fallback()
+        try:
+            if response := await route.request.response():
+                await self.asset_cache.fill(response)
+        except Exception as err:
+            logger.debug(f"Failed to cache an hCaptcha asset - url={route.request.url} {err=}")
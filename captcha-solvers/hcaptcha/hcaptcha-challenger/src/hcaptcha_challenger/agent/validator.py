@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+from typing import List, Tuple, Any, Sequence, Dict
+
+from pydantic import BaseModel, Field
+
+from hcaptcha_challenger.helper.create_coordinate_grid import FloatRect
+from hcaptcha_challenger.models import (
+    CaptchaRequestConfig,
+    CaptchaTask,
+    CaptchaTaskEntity,
+    ImageAreaSelectChallenge,
+    ImageDragDropChallenge,
+)
+
+
+class CanvasGeometry(BaseModel):
+    """
+    Where the challenge canvas is rendered on the page.
+
+    `bbox` is the canvas bounding box in page coordinates (the same space the reasoners answer in),
+    `natural_width` / `natural_height` is the coordinate space of the payload
+    (`CaptchaTaskEntity.coords`, `restrict_to_coords`).
+    """
+
+    bbox: Dict[str, float] = Field(description="FloatRect: x, y, width, height")
+    natural_width: float = Field(gt=0)
+    natural_height: float = Field(gt=0)
+
+    @property
+    def scale_x(self) -> float:
+        return self.bbox["width"] / self.natural_width
+
+    @property
+    def scale_y(self) -> float:
+        return self.bbox["height"] / self.natural_height
+
+    def to_screen(self, x: float, y: float) -> Tuple[float, float]:
+        """Map a point of the payload coordinate space to page coordinates"""
+        return self.bbox["x"] + x * self.scale_x, self.bbox["y"] + y * self.scale_y
+
+    def entity_rect(self, entity: CaptchaTaskEntity) -> FloatRect:
+        """Page-space rectangle of a draggable entity"""
+        x, y = self.to_screen(entity.coords[0], entity.coords[1])
+        return FloatRect(
+            x=x, y=y, width=entity.size[0] * self.scale_x, height=entity.size[1] * self.scale_y
+        )
+
+    def contains(self, x: float, y: float, margin: float = 0) -> bool:
+        return _rect_contains(self.bbox, x, y, margin)
+
+
+def _rect_contains(rect: FloatRect, x: float, y: float, margin: float = 0) -> bool:
+    return (
+        rect["x"] - margin <= x <= rect["x"] + rect["width"] + margin
+        and rect["y"] - margin <= y <= rect["y"] + rect["height"] + margin
+    )
+
+
+def _point_in_polygon(x: float, y: float, polygon: Sequence[Sequence[float]]) -> bool:
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        xi, yi = polygon[i][0], polygon[i][1]
+        xj, yj = polygon[j][0], polygon[j][1]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def _parse_restrict_regions(restrict_to_coords: Any) -> List[List[Tuple[float, float]]]:
+    """
+    Normalizes `restrict_to_coords` into a list of polygons in payload space.
+
+    Accepted shapes:
+    - a flat rectangle `[x1, y1, x2, y2]`
+    - a list of rectangles / corner pairs `[[x1, y1], [x2, y2]]`
+    - a list of polygons `[[[x, y], ...], ...]` or a single polygon `[[x, y], ...]`
+
+    Unknown shapes yield an empty list, i.e. no restriction is applied.
+    """
+
+    def _is_point(v) -> bool:
+        return (
+            isinstance(v, (list, tuple))
+            and len(v) == 2
+            and all(isinstance(i, (int, float)) for i in v)
+        )
+
+    def _to_polygon(region) -> List[Tuple[float, float]] | None:
+        if (
+            isinstance(region, (list, tuple))
+            and len(region) == 4
+            and all(isinstance(i, (int, float)) for i in region)
+        ):
+            x1, y1, x2, y2 = region
+            return [(x1, y1), (x2, y1), (x2, y2), (x1, y2)]
+        if isinstance(region, (list, tuple)) and region and all(_is_point(p) for p in region):
+            if len(region) == 2:
+                (x1, y1), (x2, y2) = region
+                return [(x1, y1), (x2, y1), (x2, y2), (x1, y2)]
+            return [(p[0], p[1]) for p in region]
+        return None
+
+    if not restrict_to_coords or not isinstance(restrict_to_coords, (list, tuple)):
+        return []
+
+    if polygon := _to_polygon(restrict_to_coords):
+        return [polygon]
+
+    polygons = []
+    for region in restrict_to_coords:
+        if polygon := _to_polygon(region):
+            polygons.append(polygon)
+    return polygons
+
+
+def validate_area_select_answer(
+    answer: ImageAreaSelectChallenge,
+    *,
+    canvas: CanvasGeometry | FloatRect,
+    request_config: CaptchaRequestConfig | dict | None = None,
+) -> List[str]:
+    """
+    Checks an `image_label_area_select` answer against the payload and the canvas.
+
+    Args:
+        answer: Reasoner output
+        canvas: Canvas geometry, or only its bounding box when the payload space is unknown
+        request_config: `CaptchaPayload.request_config`
+
+    Returns:
+        A list of human-readable violations, empty when the answer can be executed
+    """
+    problems = []
+    if isinstance(canvas, dict):
+        canvas_rect, geometry = canvas, None
+    else:
+        canvas_rect, geometry = canvas.bbox, canvas
+
+    if not answer.points:
+        problems.append("No points were returned")
+
+    if isinstance(request_config, CaptchaRequestConfig):
+        min_shapes = request_config.min_shapes_per_image
+        max_shapes = request_config.max_shapes_per_image
+        if isinstance(min_shapes, int) and len(answer.points) < min_shapes:
+            problems.append(f"Expected at least {min_shapes} points, got {len(answer.points)}")
+        if isinstance(max_shapes, int) and len(answer.points) > max_shapes:
+            problems.append(f"Expected at most {max_shapes} points, got {len(answer.points)}")
+        restrict_regions = _parse_restrict_regions(request_config.restrict_to_coords)
+    else:
+        restrict_regions = []
+
+    for point in answer.points:
+        if not _rect_contains(canvas_rect, point.x, point.y):
+            problems.append(f"Point ({point.x}, {point.y}) is outside the canvas")
+            continue
+        if restrict_regions and geometry:
+            polygons = [[geometry.to_screen(px, py) for px, py in p] for p in restrict_regions]
+            if not any(_point_in_polygon(point.x, point.y, p) for p in polygons):
+                problems.append(f"Point ({point.x}, {point.y}) is outside `restrict_to_coords`")
+
+    return problems
+
+
+def validate_drag_drop_answer(
+    answer: ImageDragDropChallenge,
+    *,
+    canvas: CanvasGeometry | FloatRect,
+    task: CaptchaTask | None = None,
+    entity_margin: float = 8,
+) -> List[str]:
+    """
+    Checks an `image_drag_drop` answer against the payload and the canvas.
+
+    Args:
+        answer: Reasoner output
+        canvas: Canvas geometry, or only its bounding box when the payload space is unknown
+        task: The `CaptchaTask` of the current crumb, provides the draggable entities
+        entity_margin: Tolerance in page pixels around each entity
+
+    Returns:
+        A list of human-readable violations, empty when the answer can be executed
+    """
+    problems = []
+    if isinstance(canvas, dict):
+        canvas_rect, geometry = canvas, None
+    else:
+        canvas_rect, geometry = canvas.bbox, canvas
+
+    if not answer.paths:
+        problems.append("No paths were returned")
+
+    entities = task.entities if task else []
+    if entities and len(answer.paths) != len(entities):
+        problems.append(f"Expected {len(entities)} paths, got {len(answer.paths)}")
+
+    entity_rects = [geometry.entity_rect(e) for e in entities] if geometry else []
+    used_entities = set()
+
+    for path in answer.paths:
+        start, end = path.start_point, path.end_point
+        if not _rect_contains(canvas_rect, start.x, start.y):
+            problems.append(f"Start point ({start.x}, {start.y}) is outside the canvas")
+        elif entity_rects:
+            hits = [
+                i
+                for i, rect in enumerate(entity_rects)
+                if _rect_contains(rect, start.x, start.y, entity_margin)
+            ]
+            if not hits:
+                problems.append(
+                    f"Start point ({start.x}, {start.y}) does not hit any draggable entity"
+                )
+            elif all(i in used_entities for i in hits):
+                problems.append(f"Start point ({start.x}, {start.y}) drags an entity twice")
+            else:
+                used_entities.add(next(i for i in hits if i not in used_entities))
+
+        if not _rect_contains(canvas_rect, end.x, end.y):
+            problems.append(f"End point ({end.x}, {end.y}) is outside the canvas")
+
+    return problems
@@ -0,0 +1,16 @@
+from hcaptcha_challenger.bench.harness import BenchReport, SolveSample, run_bench
+from hcaptcha_challenger.bench.load import JobApiTarget, LoadReport, find_knee, run_load
+from hcaptcha_challenger.bench.mock_gemini import MockGemini
+from hcaptcha_challenger.bench.standin import StandIn
+
+__all__ = [
+    "BenchReport",
+    "JobApiTarget",
+    "LoadReport",
+    "MockGemini",
+    "SolveSample",
+    "StandIn",
+    "find_knee",
+    "run_bench",
+    "run_load",
+]
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+from loguru import logger
+from playwright.async_api import Browser, async_playwright
+from pydantic import BaseModel, Field
+
+from hcaptcha_challenger.agent.challenger import AgentConfig, AgentV
+from hcaptcha_challenger.bench.mock_gemini import DEFAULT_ANSWERS, MockGemini
+from hcaptcha_challenger.bench.standin import StandIn
+from hcaptcha_challenger.models import ChallengeSignal
+from hcaptcha_challenger.tools.common import configure_genai_client
+from hcaptcha_challenger.utils import Deadline, percentile
+
+DEFAULT_JOBS_DIR = Path("examples/jobs")
+
+# Room for the challenge frame below the checkbox, so that nothing scrolls
+BENCH_VIEWPORT = {"width": 1280, "height": 900}
+
+
+class SolveSample(BaseModel):
+    job: str
+    signal: str
+    duration: float
+    error: str | None = None
+    phases: Dict[str, float] = Field(default_factory=dict)
+
+    @property
+    def succeeded(self) -> bool:
+        return self.signal == ChallengeSignal.SUCCESS.value
+
+
+def _latency_of(samples: Sequence[SolveSample]) -> Dict[str, float | None]:
+    return _percentiles_of([s.duration for s in samples])
+
+
+def _percentiles_of(durations: List[float]) -> Dict[str, float | None]:
+    return {
+        "p50": percentile(durations, 0.5),
+        "p95": percentile(durations, 0.95),
+        "p99": percentile(durations, 0.99),
+        "max": round(max(durations), 3) if durations else None,
+    }
+
+
+class BenchReport(BaseModel):
+    solves: int
+    succeeded: int
+    concurrency: int
+    elapsed: float
+    throughput_per_min: float
+    latency: Dict[str, float | None]
+    errors: Dict[str, int]
+    jobs: Dict[str, Dict[str, Any]]
+    phases: Dict[str, Dict[str, float | None]] = Field(default_factory=dict)
+    samples: List[SolveSample]
+
+    @property
+    def error_rate(self) -> float:
+        return round(1 - self.succeeded / self.solves, 3) if self.solves else 0
+
+    @classmethod
+    def from_samples(
+        cls, samples: List[SolveSample], *, concurrency: int, elapsed: float
+    ) -> BenchReport:
+        by_job: Dict[str, List[SolveSample]] = defaultdict(list)
+        by_phase: Dict[str, List[float]] = defaultdict(list)
+        for sample in samples:
+            by_job[sample.job].append(sample)
+            for phase, duration in sample.phases.items():
+                by_phase[phase].append(duration)
+
+        succeeded = [s for s in samples if s.succeeded]
+        return cls(
+            solves=len(samples),
+            succeeded=len(succeeded),
+            concurrency=concurrency,
+            elapsed=round(elapsed, 3),
+            throughput_per_min=round(len(succeeded) / elapsed * 60, 2) if elapsed else 0,
+            latency=_latency_of(samples),
+            errors=dict(Counter(s.error or s.signal for s in samples if not s.succeeded)),
+            jobs={
+                job: {
+                    "solves": len(job_samples),
+                    "succeeded": sum(s.succeeded for s in job_samples),
+                    **_latency_of(job_samples),
+                }
+                for job, job_samples in sorted(by_job.items())
+            },
+            phases={phase: _percentiles_of(durations) for phase, durations in by_phase.items()},
+            samples=samples,
+        )
+
+
+async def _solve_once(
+    browser: Browser,
+    stand_in: StandIn,
+    agent_config: AgentConfig,
+    job: str,
+    timeout: float,
+) -> SolveSample:
+    started = time.perf_counter()
+    phases: Dict[str, float] = {}
+    mark = started
+
+    def _phase(name: str):
+        nonlocal mark
+        now = time.perf_counter()
+        phases[name] = round(now - mark, 3)
+        mark = now
+
+    context = await browser.new_context(viewport=BENCH_VIEWPORT)
+    try:
+        await stand_in.route(context)
+        page = await context.new_page()
+        agent = AgentV(page=page, agent_config=agent_config)
+        _phase("context")
+
+        deadline = Deadline(timeout)
+        await page.goto(stand_in.site_url(job), timeout=deadline.cap_ms(30000))
+        _phase("goto")
+        await agent.robotic_arm.click_checkbox()
+        _phase("checkbox")
+        signal = await agent.wait_for_challenge(deadline=deadline)
+        _phase("challenge")
+        return SolveSample(
+            job=job, signal=signal.value, duration=time.perf_counter() - started, phases=phases
+        )
+    except Exception as err:
+        logger.warning(f"Bench solve failed - {job=} {err=}")
+        return SolveSample(
+            job=job,
+            signal=ChallengeSignal.FAILURE.value,
+            duration=time.perf_counter() - started,
+            error=type(err).__name__,
+            phases=phases,
+        )
+    finally:
+        await context.close()
+
+
+async def run_bench(
+    *,
+    jobs_dir: Path | str = DEFAULT_JOBS_DIR,
+    jobs: Sequence[str] | None = None,
+    solves: int = 20,
+    concurrency: int = 4,
+    agent_config: AgentConfig | None = None,
+    answers: Path | str = DEFAULT_ANSWERS,
+    gemini_latency: float = 0.8,
+    gemini_jitter: float = 0.2,
+    fail_rate: float = 0,
+    timeout: float = 120,
+    headless: bool = True,
+) -> BenchReport:
+    """
+    Run `solves` solves of the job fixtures against the local stand-ins, `concurrency` at a time.
+
+    Every solve gets its own browser context on one shared browser, like `BrowserSolver`.
+    No request leaves the machine: hCaptcha is served by `StandIn`, Gemini by `MockGemini`.
+
+    Args:
+        jobs_dir: Directory of `CaptchaPayload` fixtures, e.g. `examples/jobs`
+        jobs: Fixture names to run, in turn, all of them by default
+        solves: Number of solves
+        concurrency: Solves running at the same time
+        agent_config: Configuration of the agents, the API key is not used
+        answers: Recorded reasoner answers replayed by the mock Gemini endpoint
+        gemini_latency: Mean latency of a generate request in seconds
+        gemini_jitter: Uniform jitter around `gemini_latency` in seconds
+        fail_rate: Share of answers the stand-in rejects
+        timeout: Budget of each solve in seconds
+        headless: Launch the browser headless
+    """
+    agent_config = agent_config or AgentConfig(GEMINI_API_KEY="offline-bench")
+    # The stand-in serves the hCaptcha assets, a cache miss would go to the network
+    agent_config = agent_config.model_copy(update={"ASSET_CACHE": False})
+
+    with (
+        StandIn.from_dir(jobs_dir, fail_rate=fail_rate) as stand_in,
+        MockGemini.from_file(answers, latency=gemini_latency, jitter=gemini_jitter) as mock,
+    ):
+        names = list(jobs or stand_in.jobs)
+        if unknown := set(names) - set(stand_in.jobs):
+            raise ValueError(f"Unknown job fixtures: {sorted(unknown)}")
+
+        configure_genai_client(mock.http_options)
+        try:
+            async with async_playwright() as playwright:
+                browser = await playwright.chromium.launch(headless=headless)
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def _run(job: str) -> SolveSample:
+                    async with semaphore:
+                        return await _solve_once(browser, stand_in, agent_config, job, timeout)
+
+                started = time.perf_counter()
+                samples = await asyncio.gather(
+                    *[_run(job) for job in itertools.islice(itertools.cycle(names), solves)]
+                )
+                elapsed = time.perf_counter() - started
+                await browser.close()
+        finally:
+            configure_genai_client(None)
+
+        if mock.unmatched:
+            logger.warning(f"Reasoner requests without a recorded answer - {mock.unmatched=}")
+
+    return BenchReport.from_samples(list(samples), concurrency=concurrency, elapsed=elapsed)
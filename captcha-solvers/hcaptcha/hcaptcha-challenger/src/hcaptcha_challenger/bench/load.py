@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Sequence
+
+import httpx
+from loguru import logger
+from pydantic import BaseModel
+
+from hcaptcha_challenger.bench.harness import BenchReport, SolveSample
+from hcaptcha_challenger.models import ChallengeSignal
+
+# Runs `solves` solves at a concurrency level and reports on them
+StepRunner = Callable[[int, int], Awaitable[BenchReport]]
+
+# Minimum lift of the normalized throughput curve over its chord for a knee to count
+KNEE_SENSITIVITY = 0.05
+
+
+class LoadReport(BaseModel):
+    steps: List[BenchReport]
+    knee: int | None = None
+    stopped: str | None = None
+
+    @property
+    def knee_step(self) -> BenchReport | None:
+        return next((s for s in self.steps if s.concurrency == self.knee), None)
+
+
+def find_knee(levels: Sequence[int], throughputs: Sequence[float]) -> int | None:
+    """
+    The concurrency level past which more concurrency stops paying off.
+
+    Kneedle on the throughput curve: both axes are normalized to [0, 1] and the knee is
+    the level where the curve rises highest above the chord from the first level to the
+    last one. A curve that is still close to linear has no knee, capacity was not reached.
+    """
+    if len(levels) < 3:
+        return None
+    x0, x1 = levels[0], levels[-1]
+    y0, y1 = min(throughputs), max(throughputs)
+    if x1 == x0 or y1 == y0:
+        return None
+
+    lifts = [(y - y0) / (y1 - y0) - (x - x0) / (x1 - x0) for x, y in zip(levels, throughputs)]
+    best = max(range(len(lifts)), key=lifts.__getitem__)
+    return levels[best] if lifts[best] >= KNEE_SENSITIVITY else None
+
+
+async def run_load(
+    run_step: StepRunner,
+    levels: Sequence[int],
+    *,
+    solves_per_level: int | None = None,
+    max_error_rate: float = 0.5,
+    min_throughput_ratio: float = 0.8,
+) -> LoadReport:
+    """
+    Ramp the concurrency through `levels` and locate the knee of the throughput curve.
+
+    The ramp stops early once a level fails more than `max_error_rate` of its solves, or
+    its throughput falls below `min_throughput_ratio` of the best level so far: the
+    deployment is past saturation and more load only measures the overload.
+
+    Args:
+        run_step: Runs a number of solves at a concurrency level, e.g. `bench_endpoint`
+        levels: Increasing concurrency levels, e.g. `[1, 2, 4, 8, 16]`
+        solves_per_level: Solves per level, four per concurrent solver by default
+        max_error_rate: Stop the ramp beyond this share of failed solves
+        min_throughput_ratio: Stop the ramp below this share of the best throughput
+    """
+    steps: List[BenchReport] = []
+    stopped = None
+    for level in sorted(set(levels)):
+        solves = solves_per_level or level * 4
+        logger.info(f"Load step - concurrency={level} {solves=}")
+        step = await run_step(level, solves)
+        steps.append(step)
+
+        best = max(s.throughput_per_min for s in steps)
+        if step.error_rate > max_error_rate:
+            stopped = f"error rate {step.error_rate:.0%} at concurrency {level}"
+        elif best and step.throughput_per_min < best * min_throughput_ratio:
+            stopped = f"throughput fell to {step.throughput_per_min}/min at concurrency {level}"
+        if stopped:
+            logger.warning(f"Load ramp stopped - {stopped}")
+            break
+
+    knee = find_knee([s.concurrency for s in steps], [s.throughput_per_min for s in steps])
+    return LoadReport(steps=steps, knee=knee, stopped=stopped)
+
+
+def _error_class_of(job: dict) -> str:
+    # Job errors are free text, the challenge signal is the stable class when there is one
+    if job.get("signal"):
+        return f"signal_{job['signal']}"
+    return (job.get("error") or "failure")[:80]
+
+
+class JobApiTarget:
+    """
+    Drives the job API of `hc solver serve`: submit a solve, then long-poll it to the end.
+
+    A sample records the phases `submit` (the POST round trip), `queue` and `solve`
+    (from the job's timestamps). Errors are classified as `http_<status>` for refused
+    submissions, the exception class for transport errors, or the signal of a failed job.
+
+    Args:
+        url: Base URL of the solver service, e.g. http://127.0.0.1:8000
+        website_url: Page the hCaptcha widget is embedded in
+        website_key: hCaptcha site key
+        timeout: Budget of each job in seconds, queueing included
+        poll_wait: Long-poll seconds of each status request
+        transport: httpx transport, the network by default
+    """
+
+    def __init__(
+        self,
+        url: str,
+        website_url: str,
+        website_key: str | None = None,
+        *,
+        timeout: float = 180,
+        poll_wait: float = 30,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.url = url.rstrip("/")
+        self.website_url = website_url
+        self.website_key = website_key
+        self.timeout = timeout
+        self.poll_wait = poll_wait
+        self._transport = transport
+
+    @property
+    def job_name(self) -> str:
+        return self.website_key or self.website_url
+
+    def _failed(self, started: float, error: str, phases: dict | None = None) -> SolveSample:
+        return SolveSample(
+            job=self.job_name,
+            signal=ChallengeSignal.FAILURE.value,
+            duration=time.perf_counter() - started,
+            error=error,
+            phases=phases or {},
+        )
+
+    async def solve_once(self, client: httpx.AsyncClient) -> SolveSample:
+        started = time.perf_counter()
+        request = {
+            "website_url": self.website_url,
+            "website_key": self.website_key,
+            "timeout": self.timeout,
+        }
+        try:
+            response = await client.post(f"{self.url}/jobs", json=request)
+            phases = {"submit": round(time.perf_counter() - started, 3)}
+            if response.status_code != 202:
+                return self._failed(started, f"http_{response.status_code}", phases)
+
+            job = response.json()
+            # The job finishes within its budget, the margin covers the last poll
+            poll_until = started + self.timeout + self.poll_wait
+            while job["status"] in ("queued", "running"):
+                if time.perf_counter() > poll_until:
+                    # Give the worker back rather than let it finish a solve nobody waits for
+                    await client.delete(f"{self.url}/jobs/{job['job_id']}")
+                    return self._failed(started, "TimeoutError", phases)
+                response = await client.get(
+                    f"{self.url}/jobs/{job['job_id']}", params={"wait": self.poll_wait}
+                )
+                if response.status_code != 200:
+                    return self._failed(started, f"http_{response.status_code}", phases)
+                job = response.json()
+        except httpx.HTTPError as err:
+            return self._failed(started, type(err).__name__)
+
+        if job.get("started_at"):
+            phases["queue"] = round(job["started_at"] - job["created_at"], 3)
+            phases["solve"] = round(job["finished_at"] - job["started_at"], 3)
+        if job["status"] != "success":
+            return self._failed(started, _error_class_of(job), phases)
+        return SolveSample(
+            job=self.job_name,
+            signal=ChallengeSignal.SUCCESS.value,
+            duration=time.perf_counter() - started,
+            phases=phases,
+        )
+
+    async def run_step(self, concurrency: int, solves: int) -> BenchReport:
+        """Run `solves` jobs, `concurrency` in flight at any time"""
+        remaining = iter(range(solves))
+        samples: List[SolveSample] = []
+
+        # Long polls hold a connection each, on top of the submissions
+        limits = httpx.Limits(max_connections=concurrency * 2)
+        timeout = httpx.Timeout(30, read=self.poll_wait + 30)
+        async with httpx.AsyncClient(
+            transport=self._transport, limits=limits, timeout=timeout
+        ) as client:
+
+            async def _client_loop():
+                for _ in remaining:
+                    samples.append(await self.solve_once(client))
+
+            started = time.perf_counter()
+            await asyncio.gather(*[_client_loop() for _ in range(concurrency)])
+            elapsed = time.perf_counter() - started
+
+        return BenchReport.from_samples(samples, concurrency=concurrency, elapsed=elapsed)
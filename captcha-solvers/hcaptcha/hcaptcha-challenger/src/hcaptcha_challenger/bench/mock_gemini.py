@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List
+from urllib.parse import urlsplit
+
+from google.genai import types
+from loguru import logger
+
+DEFAULT_ANSWERS = Path(__file__).parent.joinpath("answers.json")
+
+# Gemini bills an image as 258 tokens
+_IMAGE_TOKENS = 258
+
+
+class MockGemini:
+    """
+    Local stand-in for the Gemini API endpoints used by the reasoners.
+
+    Implements the resumable file upload and `models/{model}:generateContent`. Each
+    generate request is answered with the first recorded answer whose `match` string
+    occurs in the request (system instruction, prompts, response schema), after a
+    simulated latency. Point the reasoners at it with `configure_genai_client(mock.http_options)`.
+
+    Args:
+        answers: Recorded answers, `[{"match": "...", "answer": {...}}, ...]`
+        latency: Mean seconds before a generate request is answered
+        jitter: Uniform jitter in seconds around `latency`
+        host: Interface to listen on
+        port: Port to listen on, 0 picks a free one
+    """
+
+    def __init__(
+        self,
+        answers: List[Dict[str, Any]],
+        *,
+        latency: float = 0,
+        jitter: float = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.answers = answers
+        self.latency = latency
+        self.jitter = jitter
+
+        self._server = ThreadingHTTPServer((host, port), _handler_of(self))
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+        self.uploads = 0
+        self.requests = 0
+        self.unmatched = 0
+
+    @classmethod
+    def from_file(cls, path: Path | str = DEFAULT_ANSWERS, **kwargs) -> MockGemini:
+        return cls(json.loads(Path(path).read_text(encoding="utf8")), **kwargs)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def http_options(self) -> types.HttpOptions:
+        return types.HttpOptions(base_url=self.url)
+
+    def start(self) -> MockGemini:
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="mock-gemini", daemon=True
+        )
+        self._thread.start()
+        logger.debug(f"Started the mock Gemini endpoint - url={self.url}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> MockGemini:
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def answer(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """A `GenerateContentResponse` for the request body"""
+        text = json.dumps(request, ensure_ascii=False)
+        answer = next((a["answer"] for a in self.answers if a["match"] in text), None)
+        with self._lock:
+            self.requests += 1
+            self.unmatched += answer is None
+
+        output = json.dumps(answer if answer is not None else {}, ensure_ascii=False)
+        generation_config = request.get("generationConfig") or {}
+        if "responseSchema" not in generation_config:
+            # Without constrained decoding the reasoners parse a fenced JSON block
+            output = f"```json\n{output}\n```"
+
+        images = text.count('"fileData"') + text.count('"inlineData"')
+        return {
+            "candidates": [
+                {"content": {"role": "model", "parts": [{"text": output}]}, "finishReason": "STOP"}
+            ],
+            "usageMetadata": {
+                "promptTokenCount": images * _IMAGE_TOKENS + len(text) // 4,
+                "candidatesTokenCount": len(output) // 4,
+                "totalTokenCount": images * _IMAGE_TOKENS + (len(text) + len(output)) // 4,
+            },
+            "modelVersion": "mock-gemini",
+        }
+
+    def delay(self) -> float:
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+
+def _handler_of(mock: MockGemini) -> type[BaseHTTPRequestHandler]:
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args):
+            return
+
+        def _send_json(self, data: Dict[str, Any], headers: Dict[str, str] | None = None):
+            body = json.dumps(data).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            path = urlsplit(self.path).path
+
+            # Resumable upload, 1. start the session
+            if path.endswith("/files") and self.headers.get("X-Goog-Upload-Command") == "start":
+                session = f"{mock.url}/upload/sessions/{uuid.uuid4().hex}"
+                return self._send_json({}, headers={"X-Goog-Upload-URL": session})
+
+            # 2. upload and finalize in one request
+            if path.startswith("/upload/sessions/"):
+                with mock._lock:
+                    mock.uploads += 1
+                name = f"files/{path.rsplit('/', 1)[-1]}"
+                mime_type = self.headers.get("X-Goog-Upload-Header-Content-Type", "image/png")
+                file = {
+                    "name": name,
+                    "uri": f"{mock.url}/v1beta/{name}",
+                    "mimeType": mime_type,
+                    "sizeBytes": str(len(body)),
+                    "state": "ACTIVE",
+                }
+                return self._send_json({"file": file}, headers={"X-Goog-Upload-Status": "final"})
+
+            if path.endswith(":generateContent"):
+                time.sleep(mock.delay())
+                return self._send_json(mock.answer(json.loads(body or b"{}")))
+
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    return _Handler
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import json
+import random
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict
+from urllib.parse import parse_qs, urlsplit
+
+from loguru import logger
+from playwright.async_api import APIResponse, BrowserContext, Route
+
+STATIC_DIR = Path(__file__).parent.joinpath("static")
+
+HCAPTCHA_URL_PATTERN = re.compile(r"^https://(?:[\w-]+\.)*hcaptcha\.com/")
+
+FRAME_PATH = "/captcha/v1/stand-in/static/hcaptcha.html"
+
+
+class StandIn:
+    """
+    Local HTTP stand-in for the hCaptcha widget and API.
+
+    Serves a site page embedding the checkbox and challenge frames, and answers
+    `/getcaptcha/` with the job fixtures and `/checkcaptcha/` with a verdict, using
+    the URL shapes of hCaptcha. `route` sends a browser context's hCaptcha requests
+    here, so `AgentV` runs unchanged against it.
+
+    Args:
+        jobs: `CaptchaPayload` fixtures by name, e.g. the stems of `examples/jobs/*.json`
+        fail_rate: Share of `/checkcaptcha/` calls rejected, hCaptcha then serves a new challenge
+        host: Interface to listen on
+        port: Port to listen on, 0 picks a free one
+    """
+
+    def __init__(
+        self,
+        jobs: Dict[str, Dict[str, Any]],
+        *,
+        fail_rate: float = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        if not jobs:
+            raise ValueError("The stand-in needs at least one job fixture")
+        self.jobs = jobs
+        self.fail_rate = fail_rate
+
+        self._server = ThreadingHTTPServer((host, port), _handler_of(self))
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+        self.served = 0
+        self.checked = 0
+        self.passed = 0
+
+    @classmethod
+    def from_dir(cls, jobs_dir: Path | str, **kwargs) -> StandIn:
+        jobs = {
+            path.stem: json.loads(path.read_text(encoding="utf8"))
+            for path in sorted(Path(jobs_dir).glob("*.json"))
+        }
+        return cls(jobs, **kwargs)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def site_url(self, job: str, sitekey: str = "stand-in") -> str:
+        return f"{self.url}/?job={job}&sitekey={sitekey}"
+
+    def start(self) -> StandIn:
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="hcaptcha-stand-in", daemon=True
+        )
+        self._thread.start()
+        logger.debug(f"Started the hCaptcha stand-in - url={self.url} jobs={list(self.jobs)}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> StandIn:
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def local_url(self, url: str) -> str:
+        """The stand-in URL serving an hCaptcha URL"""
+        parts = urlsplit(url)
+        return f"{self.url}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+    async def fetch(self, route: Route) -> APIResponse:
+        return await route.fetch(url=self.local_url(route.request.url))
+
+    async def route(self, context: BrowserContext):
+        """
+        Serve the hCaptcha requests of `context` from the stand-in.
+
+        The agent observes the responses of this route like those of the real hCaptcha,
+        run it with `ASSET_CACHE` off, the asset cache would fetch from the network.
+        """
+
+        async def _on_route(route: Route):
+            try:
+                response = await self.fetch(route)
+            except Exception as err:
+                logger.warning(f"Stand-in fetch failed - url={route.request.url} {err=}")
+                await route.abort()
+                return
+            try:
+                await route.fulfill(response=response)
+            finally:
+                await response.dispose()
+
+        await context.route(HCAPTCHA_URL_PATTERN, _on_route)
+
+    def next_payload(self, job: str | None) -> Dict[str, Any]:
+        name = job if job in self.jobs else random.choice(list(self.jobs))
+        with self._lock:
+            self.served += 1
+        return {**self.jobs[name], "key": f"E0_stand-in.{uuid.uuid4().hex}"}
+
+    def verdict(self, key: str) -> Dict[str, Any]:
+        token = {"type": "hsw", "req": f"stand-in.{key}"}
+        passed = random.random() >= self.fail_rate
+        with self._lock:
+            self.checked += 1
+            self.passed += passed
+        if not passed:
+            return {"c": token, "pass": False, "error": "invalid-data"}
+        return {
+            "c": token,
+            "pass": True,
+            "generated_pass_UUID": f"P1_stand-in.{uuid.uuid4().hex}",
+            "expiration": 120,
+        }
+
+
+def _handler_of(stand_in: StandIn) -> type[BaseHTTPRequestHandler]:
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args):
+            return
+
+        def _send(self, status: int, body: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, data: Dict[str, Any]):
+            # The agent decodes `/getcaptcha/` as JSON only for this exact content type
+            self._send(200, json.dumps(data).encode(), "application/json")
+
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            if path == "/":
+                body = STATIC_DIR.joinpath("site.html").read_bytes()
+                return self._send(200, body, "text/html; charset=utf-8")
+            if path == FRAME_PATH:
+                body = STATIC_DIR.joinpath("hcaptcha.html").read_bytes()
+                return self._send(200, body, "text/html; charset=utf-8")
+            self._send(404, b"", "text/plain")
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            parts = urlsplit(self.path)
+            if "/getcaptcha/" in parts.path:
+                job = parse_qs(parts.query).get("job", [None])[0]
+                return self._send_json(stand_in.next_payload(job))
+            if "/checkcaptcha/" in parts.path:
+                return self._send_json(stand_in.verdict(parts.path.rstrip("/").rsplit("/", 1)[-1]))
+            self._send(404, b"", "text/plain")
+
+    return _Handler
@@ -2,6 +2,7 @@ import asyncio
 import json
 import sys
 from pathlib import Path
+from typing import Callable, List, Tuple
 
 import typer
 from playwright.async_api import async_playwright
@@ -19,7 +20,8 @@ from rich.panel import Panel
 from rich.table import Table
 from rich import box
 
-from hcaptcha_challenger.agent.collector import CollectorConfig, Collector, check_dataset
+from hcaptcha_challenger.agent.artifact_store import ArtifactStore
+from hcaptcha_challenger.agent.collector import CollectorConfig, Collector, check_dataset_files
 from hcaptcha_challenger.models import CaptchaPayload
 from hcaptcha_challenger.utils import SiteKey
 
@@ -155,6 +157,9 @@ def collect(
     ] = 2000,
     headless: Annotated[bool, typer.Option(help="Headless mode")] = True,
     locale: Annotated[str, typer.Option(help="Locale setting")] = "en-US",
+    packed: Annotated[
+        bool, typer.Option(help="Pack samples into segment files", envvar="PACKED_STORE")
+    ] = False,
 ):
     """Launch hCaptcha challenge data collector"""
     config = CollectorConfig(
@@ -163,6 +168,7 @@ def collect(
         MAX_LOOP_COUNT=max_loop_count,
         MAX_RUNNING_TIME=max_running_time,
         WAIT_FOR_TIMEOUT_CHALLENGE_VIEW=wait_for_timeout_challenge_view,
+        PACKED_STORE=packed,
     )
 
     try:
@@ -193,6 +199,33 @@ def auto_labeling(
     typer.echo("🤯 Not implemented yet.")
 
 
+DatasetEntry = Tuple[str, Callable[[], bytes], Callable[[], List[str]]]
+
+
+def _collect_dataset_entries(dataset_dir: Path) -> List[DatasetEntry]:
+    """(label, payload loader, sample file names) of every sample, packed or not"""
+    entries: List[DatasetEntry] = []
+
+    for store in ArtifactStore.discover(dataset_dir):
+        for group, records in store.groups().items():
+            names = [r.name for r in records]
+            for record in records:
+                if record.name.endswith("_captcha.json"):
+                    label = f"{store.directory}/{record.segment}@{record.offset}:{group}"
+                    entries.append((label, lambda s=store, r=record: s.read(r), lambda n=names: n))
+
+    for captcha_json in dataset_dir.rglob("*_captcha.json"):
+        entries.append(
+            (
+                str(captcha_json.resolve()),
+                captcha_json.read_bytes,
+                lambda p=captcha_json: [i.name for i in p.parent.iterdir()],
+            )
+        )
+
+    return entries
+
+
 @app.command(name="check")
 def check(
     dataset_dir: Annotated[
@@ -203,7 +236,7 @@ def check(
     Check dataset integrity and generate analysis report
     """
     console = Console()
-    captcha_files = list(dataset_dir.rglob("*_captcha.json"))
+    captcha_files = _collect_dataset_entries(dataset_dir)
 
     if not captcha_files:
         console.print(Panel("[bold red]No dataset files found", title="Dataset Check"))
@@ -223,10 +256,10 @@ def check(
     ) as progress:
         task_id = progress.add_task("[cyan]Checking dataset", total=len(captcha_files))
 
-        for i, captcha_json in enumerate(captcha_files):
+        for i, (label, load_payload, list_names) in enumerate(captcha_files):
             try:
                 # Load JSON file to get type information for statistics
-                cp = CaptchaPayload.model_validate_json(captcha_json.read_bytes())
+                cp = CaptchaPayload.model_validate_json(load_payload())
                 request_type = cp.request_type.value if cp.request_type else "unknown"
 
                 # Update type statistics
@@ -235,7 +268,7 @@ def check(
                 dataset_stats["types"][request_type]["total"] += 1
 
                 # Perform check
-                check_dataset(captcha_json)
+                check_dataset_files(cp, list_names())
 
                 # Check passed, update statistics
                 dataset_stats["valid"] += 1
@@ -244,7 +277,7 @@ def check(
             except Exception as e:
                 # Check failed, record error
                 error_info = {
-                    "file": str(captcha_json.resolve()),
+                    "file": label,
                     "error": str(e),
                     "type": request_type if 'request_type' in locals() else "unknown",
                 }
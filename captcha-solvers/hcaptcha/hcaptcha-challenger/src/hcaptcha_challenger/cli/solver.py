@@ -1,5 +1,6 @@
+import asyncio
 from pathlib import Path
-from typing import Annotated, Optional
+from typing import Annotated, List, Optional
 
 import typer
 from rich import box
@@ -44,6 +45,15 @@ def check_cost(
         int,
         typer.Option(help="Minimum usage count to show detailed model stats", show_default=True),
     ] = 5,
+    loose_files: Annotated[
+        Optional[bool],
+        typer.Option(
+            "--loose-files/--no-loose-files",
+            help="Walk the directory for loose *_model_answer.json files. "
+            "By default only when it holds no packed artifact store",
+            show_default=False,
+        ),
+    ] = None,
 ):
     """
     Calculate and display model usage costs for challenges
@@ -63,13 +73,11 @@ def check_cost(
             )
             raise typer.Exit(1)
 
-        # Use a more comprehensive search pattern to find all model answer files
-        # regardless of nested structure
-        search_pattern = "**/*_model_answer.json"
+        # Calculate model usage statistics, in a single pass over the model answers
+        with console.status(f"[bold blue]Analyzing model answers in {challenge_path}..."):
+            stats = export_stats(challenge_path, loose_files=loose_files)
 
-        # Count model answer files to check if any exist
-        answer_files = list(challenge_path.glob(search_pattern))
-        if not answer_files:
+        if not stats.total_files:
             console.print(
                 Panel(
                     f"[bold yellow]No model answer files found in {challenge_path}[/bold yellow]\n"
@@ -79,10 +87,8 @@ def check_cost(
                 )
             )
             raise typer.Exit(1)
-
-        with console.status(f"[bold blue]Analyzing {len(answer_files)} model answer files..."):
-            # Calculate model usage statistics
-            stats = export_stats(challenge_path, output_file)
+        if output_file:
+            stats.save_to_json(output_file)
 
         # Create a compact, integrated summary table
         summary_table = Table(
@@ -190,3 +196,365 @@ def check_cost(
     except Exception as e:
         console.print(Panel(f"[bold red]Error: {str(e)}", title="Error", border_style="red"))
         raise typer.Exit(1)
+
+
+@app.command(name="serve")
+def serve(
+    host: Annotated[str, typer.Option(help="Bind address", envvar="HOST")] = "127.0.0.1",
+    port: Annotated[int, typer.Option(help="Bind port", envvar="PORT")] = 8000,
+    workers: Annotated[
+        int, typer.Option(help="Number of warm browsers solving jobs concurrently")
+    ] = 2,
+    queue_size: Annotated[
+        int, typer.Option(help="Maximum number of waiting jobs, beyond it submit answers 429")
+    ] = 64,
+    job_ttl: Annotated[
+        float, typer.Option(help="Seconds a finished job stays available for polling")
+    ] = 600,
+    job_timeout: Annotated[
+        float, typer.Option(help="Default budget of a job in seconds, queueing included")
+    ] = 180,
+    per_key_concurrency: Annotated[
+        Optional[int], typer.Option(help="Maximum number of running jobs per site key or tenant")
+    ] = None,
+    per_key_queue: Annotated[
+        Optional[int], typer.Option(help="Maximum number of waiting jobs per site key or tenant")
+    ] = None,
+    queue_slo: Annotated[
+        Optional[float], typer.Option(help="Target queue time in seconds, reported in /health")
+    ] = None,
+    max_solves_per_browser: Annotated[
+        Optional[int], typer.Option(help="Replace a worker's browser after this many jobs")
+    ] = None,
+    max_browser_rss_mb: Annotated[
+        Optional[float],
+        typer.Option(help="Replace a worker's browser once its processes use more memory (MB)"),
+    ] = None,
+    max_process_rss_mb: Annotated[
+        Optional[float],
+        typer.Option(
+            help="Finish the queued jobs and exit once the server process uses more memory (MB). "
+            "Run the server under a process manager that restarts it."
+        ),
+    ] = None,
+    queue_url: Annotated[
+        Optional[str],
+        typer.Option(
+            help="Share the job queue with other nodes through Redis, e.g. redis://host:6379/0. "
+            "The shared queue orders jobs by priority only, it can't be combined with "
+            "--per-key-concurrency, --per-key-queue, --queue-slo or --max-per-proxy.",
+            envvar="QUEUE_URL",
+        ),
+    ] = None,
+    node_id: Annotated[
+        Optional[str], typer.Option(help="Name of this node in a cluster, the hostname by default")
+    ] = None,
+    visibility_timeout: Annotated[
+        float, typer.Option(help="Seconds before a job of a silent node is delivered again")
+    ] = 60,
+    cluster_budget: Annotated[
+        Optional[int],
+        typer.Option(help="Solves started per minute per Gemini API key across the cluster"),
+    ] = None,
+    max_per_proxy: Annotated[
+        Optional[int], typer.Option(help="Maximum number of jobs running through one proxy")
+    ] = None,
+    max_idle_contexts: Annotated[
+        int, typer.Option(help="Warm browser contexts kept per worker, 0 for a fresh one per job")
+    ] = 2,
+    adaptive: Annotated[
+        bool,
+        typer.Option(
+            help="Adapt the jobs solved at once to the Gemini 429s and latency, event loop lag "
+            "and host CPU, between --min-workers and --workers"
+        ),
+    ] = False,
+    min_workers: Annotated[
+        int, typer.Option(help="Lowest number of jobs solved at once with --adaptive")
+    ] = 1,
+    callback_host: Annotated[
+        Optional[List[str]],
+        typer.Option(
+            help="Host that job callbacks may be posted to, e.g. hooks.example.com or "
+            "*.example.com. Repeat it for several hosts, callbacks are refused without one."
+        ),
+    ] = None,
+    headless: Annotated[bool, typer.Option(help="Headless mode")] = True,
+):
+    """
+    Serve an HTTP job API: submit a solve, then poll, long-poll or receive a webhook
+    """
+    local_only = {
+        "--per-key-concurrency": per_key_concurrency,
+        "--per-key-queue": per_key_queue,
+        "--queue-slo": queue_slo,
+        "--max-per-proxy": max_per_proxy,
+    }
+    if queue_url and (ignored := [name for name, value in local_only.items() if value is not None]):
+        typer.echo(f"{', '.join(ignored)} apply to local queues only, not with --queue-url")
+        raise typer.Exit(1)
+
+    try:
+        import uvicorn
+
+        from hcaptcha_challenger.server.app import create_app
+    except ImportError:
+        typer.echo(
+            "The server requires extra dependencies: pip install hcaptcha-challenger[server]"
+        )
+        raise typer.Exit(1)
+
+    from hcaptcha_challenger.agent.challenger import AgentConfig
+    from hcaptcha_challenger.server.jobs import JobManager
+    from hcaptcha_challenger.server.limiter import AdaptiveLimiter, LimitPolicy
+    from hcaptcha_challenger.server.proxies import ProxyHealth
+    from hcaptcha_challenger.server.scheduler import FairScheduler
+    from hcaptcha_challenger.server.supervisor import RecyclePolicy, Supervisor
+    from hcaptcha_challenger.server.worker import BrowserSolver
+
+    agent_config = AgentConfig()
+    proxy_health = ProxyHealth()
+
+    async def _solver_factory():
+        return await BrowserSolver.create(
+            agent_config,
+            headless=headless,
+            proxy_health=proxy_health,
+            max_idle_contexts=max_idle_contexts,
+        )
+
+    options = dict(
+        workers=workers,
+        job_ttl=job_ttl,
+        default_timeout=job_timeout,
+        scheduler=FairScheduler(
+            maxsize=queue_size,
+            max_queued_per_key=per_key_queue,
+            max_running_per_key=per_key_concurrency,
+            max_running_per_proxy=max_per_proxy,
+            queue_slo=queue_slo,
+        ),
+        supervisor=Supervisor(
+            RecyclePolicy(
+                max_solves=max_solves_per_browser,
+                max_browser_rss_mb=max_browser_rss_mb,
+                max_process_rss_mb=max_process_rss_mb,
+            )
+        ),
+        proxy_health=proxy_health,
+        limiter=(
+            AdaptiveLimiter(LimitPolicy(min_limit=min(min_workers, workers), max_limit=workers))
+            if adaptive
+            else None
+        ),
+        callback_hosts=callback_host,
+    )
+    if queue_url:
+        from hcaptcha_challenger.server.cluster import ClusterManager, RedisQueue, budget_key_of
+
+        try:
+            backend = RedisQueue(queue_url)
+        except ImportError as err:
+            typer.echo(str(err))
+            raise typer.Exit(1)
+        manager = ClusterManager(
+            _solver_factory,
+            backend,
+            node_id=node_id,
+            visibility_timeout=visibility_timeout,
+            budget=cluster_budget,
+            budget_key=budget_key_of(agent_config.GEMINI_API_KEY.get_secret_value()),
+            **options,
+        )
+    else:
+        manager = JobManager(_solver_factory, **options)
+    uvicorn.run(create_app(manager), host=host, port=port)
+
+
+@app.command(name="harness")
+def harness(
+    jobs_dir: Annotated[
+        Path, typer.Option(help="Directory of CaptchaPayload fixtures", show_default=True)
+    ] = Path("examples/jobs"),
+    job: Annotated[
+        Optional[List[str]],
+        typer.Option(help="Fixture names to run (e.g. image_drag_drop), all by default"),
+    ] = None,
+    solves: Annotated[int, typer.Option(help="Number of solves")] = 20,
+    concurrency: Annotated[int, typer.Option(help="Solves running at the same time")] = 4,
+    gemini_latency: Annotated[
+        float, typer.Option(help="Mean latency of the mock Gemini endpoint in seconds")
+    ] = 0.8,
+    gemini_jitter: Annotated[
+        float, typer.Option(help="Uniform jitter around the mock latency in seconds")
+    ] = 0.2,
+    answers: Annotated[
+        Optional[Path], typer.Option(help="Recorded reasoner answers, the bundled ones by default")
+    ] = None,
+    fail_rate: Annotated[
+        float, typer.Option(help="Share of answers the stand-in rejects", min=0, max=1)
+    ] = 0,
+    timeout: Annotated[float, typer.Option(help="Budget of each solve in seconds")] = 120,
+    output_file: Annotated[
+        Optional[Path], typer.Option(help="Save the report to a JSON file (optional)")
+    ] = None,
+    headless: Annotated[bool, typer.Option(help="Headless mode")] = True,
+):
+    """
+    Benchmark AgentV offline against a local hCaptcha stand-in and a mock Gemini endpoint
+    """
+    from hcaptcha_challenger.bench import run_bench
+    from hcaptcha_challenger.bench.mock_gemini import DEFAULT_ANSWERS
+
+    console = Console()
+    report = asyncio.run(
+        run_bench(
+            jobs_dir=jobs_dir,
+            jobs=job,
+            solves=solves,
+            concurrency=concurrency,
+            answers=answers or DEFAULT_ANSWERS,
+            gemini_latency=gemini_latency,
+            gemini_jitter=gemini_jitter,
+            fail_rate=fail_rate,
+            timeout=timeout,
+            headless=headless,
+        )
+    )
+
+    table = Table(title="Offline bench", box=ROUNDED)
+    for column in ("job", "solves", "succeeded", "p50 (s)", "p95 (s)", "p99 (s)", "max (s)"):
+        table.add_column(column, justify="left" if column == "job" else "right")
+    for name, stats in report.jobs.items():
+        table.add_row(
+            name,
+            *[str(stats[k]) for k in ("solves", "succeeded", "p50", "p95", "p99", "max")],
+        )
+    table.add_row(
+        "[bold]all",
+        str(report.solves),
+        str(report.succeeded),
+        *[str(report.latency[k]) for k in ("p50", "p95", "p99", "max")],
+    )
+    console.print(table)
+    console.print(
+        f"concurrency={report.concurrency} elapsed={report.elapsed}s "
+        f"throughput={report.throughput_per_min} solves/min errors={report.errors or '-'}"
+    )
+
+    if output_file:
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        output_file.write_text(report.model_dump_json(indent=2), encoding="utf8")
+        console.print(f"Report saved to {output_file}")
+
+
+@app.command(name="bench")
+def bench(
+    url: Annotated[
+        Optional[str],
+        typer.Option(
+            help="Solver service to load, e.g. http://127.0.0.1:8000, "
+            "the local stand-in harness when omitted"
+        ),
+    ] = None,
+    website_url: Annotated[
+        Optional[str], typer.Option(help="Page the hCaptcha widget is embedded in (with --url)")
+    ] = None,
+    website_key: Annotated[
+        Optional[str], typer.Option(help="hCaptcha site key (with --url)")
+    ] = None,
+    levels: Annotated[
+        str, typer.Option(help="Concurrency levels to ramp through, comma separated")
+    ] = "1,2,4,8,16",
+    solves_per_level: Annotated[
+        Optional[int], typer.Option(help="Solves per level, four per concurrent solve by default")
+    ] = None,
+    max_error_rate: Annotated[
+        float, typer.Option(help="Stop the ramp beyond this share of failed solves", min=0, max=1)
+    ] = 0.5,
+    timeout: Annotated[float, typer.Option(help="Budget of each solve in seconds")] = 180,
+    jobs_dir: Annotated[
+        Path, typer.Option(help="Directory of CaptchaPayload fixtures (stand-in)")
+    ] = Path("examples/jobs"),
+    gemini_latency: Annotated[
+        float, typer.Option(help="Mean latency of the mock Gemini endpoint in seconds (stand-in)")
+    ] = 0.8,
+    output_file: Annotated[
+        Optional[Path], typer.Option(help="Save the report to a JSON file (optional)")
+    ] = None,
+):
+    """
+    Load-test a solver service, or the local stand-in harness, with ramping concurrency
+    """
+    from hcaptcha_challenger.bench import JobApiTarget, run_bench, run_load
+
+    console = Console()
+    try:
+        concurrency_levels = [int(level) for level in levels.split(",") if level.strip()]
+    except ValueError:
+        console.print(f"[bold red]Invalid concurrency levels: {levels}")
+        raise typer.Exit(1)
+
+    if url:
+        if not website_url:
+            console.print("[bold red]--website-url is required with --url")
+            raise typer.Exit(1)
+        target = JobApiTarget(url, website_url, website_key, timeout=timeout)
+        run_step = target.run_step
+    else:
+
+        async def run_step(concurrency: int, solves: int):
+            return await run_bench(
+                jobs_dir=jobs_dir,
+                solves=solves,
+                concurrency=concurrency,
+                gemini_latency=gemini_latency,
+                timeout=timeout,
+            )
+
+    report = asyncio.run(
+        run_load(
+            run_step,
+            concurrency_levels,
+            solves_per_level=solves_per_level,
+            max_error_rate=max_error_rate,
+        )
+    )
+
+    table = Table(title=f"Load test - {url or 'local stand-in'}", box=ROUNDED)
+    columns = ("concurrency", "solves", "succeeded", "solves/min", "p50 (s)", "p95 (s)", "p99 (s)")
+    for column in (*columns, "errors"):
+        table.add_column(column, justify="left" if column == "errors" else "right")
+    for step in report.steps:
+        marker = " *" if step.concurrency == report.knee else ""
+        errors = ", ".join(f"{name}={count}" for name, count in step.errors.items())
+        table.add_row(
+            f"{step.concurrency}{marker}",
+            str(step.solves),
+            str(step.succeeded),
+            str(step.throughput_per_min),
+            *[str(step.latency[k]) for k in ("p50", "p95", "p99")],
+            errors or "-",
+        )
+    console.print(table)
+
+    if knee_step := report.knee_step:
+        console.print(
+            f"Knee at concurrency {report.knee}: {knee_step.throughput_per_min} solves/min, "
+            f"p95 {knee_step.latency['p95']}s"
+        )
+        phases = Table(title=f"Phases at concurrency {report.knee}", box=ROUNDED)
+        for column in ("phase", "p50 (s)", "p95 (s)", "p99 (s)", "max (s)"):
+            phases.add_column(column, justify="left" if column == "phase" else "right")
+        for phase, stats in knee_step.phases.items():
+            phases.add_row(phase, *[str(stats[k]) for k in ("p50", "p95", "p99", "max")])
+        console.print(phases)
+    else:
+        console.print("No knee found, throughput still grows with concurrency: ramp further")
+    if report.stopped:
+        console.print(f"[yellow]Ramp stopped early: {report.stopped}")
+
+    if output_file:
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        output_file.write_text(report.model_dump_json(indent=2), encoding="utf8")
+        console.print(f"Report saved to {output_file}")
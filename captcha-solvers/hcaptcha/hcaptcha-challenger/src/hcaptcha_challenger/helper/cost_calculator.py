@@ -3,16 +3,19 @@ https://ai.google.dev/gemini-api/docs/pricing
 """
 
 import json
+import os
 import pathlib
 import re
 from collections import defaultdict
 from statistics import median
-from typing import TypedDict, List, Dict, Union, Optional
+from typing import TypedDict, List, Dict, Union, Optional, Iterator, Tuple
 from pathlib import Path
 
 from google.genai import types
 from pydantic import BaseModel, Field
 
+from hcaptcha_challenger.agent.artifact_store import STORE_DIRNAME, ArtifactStore
+
 # Price per million tokens
 UNIT_1_M = 0.000001
 # Price per thousand tokens
@@ -81,8 +84,39 @@ class ModelUsageStats(BaseModel):
         print(f"Stats saved to {file_path}")
 
 
+def iter_model_answers(
+    challenge_root: pathlib.Path, *, loose_files: Optional[bool] = None
+) -> Iterator[Tuple[str, str, bytes]]:
+    """
+    Yield `(challenge_id, source, content)` of every model answer under `challenge_root`.
+
+    Packed `ArtifactStore`s are read through their index. Loose `*_model_answer.json` files
+    of the file tree layout take a walk of the whole tree, so by default they are only
+    collected when no store was found; set `loose_files` to force or skip that walk.
+    """
+    stores = ArtifactStore.discover(challenge_root)
+    for store in stores:
+        for record in store.records(suffix="_model_answer.json"):
+            source = f"{store.directory}/{record.segment}@{record.offset}:{record.name}"
+            yield f"{store.root}/{record.group}", source, store.read(record)
+
+    if loose_files is None:
+        loose_files = not stores
+    if not loose_files:
+        return
+
+    for dirpath, dirnames, filenames in os.walk(challenge_root):
+        dirnames[:] = [d for d in dirnames if d != STORE_DIRNAME]
+        for filename in filenames:
+            if filename.endswith("_model_answer.json"):
+                item_file = Path(dirpath, filename)
+                yield dirpath, str(item_file), item_file.read_bytes()
+
+
 def calculate_model_cost(
-    challenge_path: Union[str, pathlib.Path], detailed: bool = False
+    challenge_path: Union[str, pathlib.Path],
+    detailed: bool = False,
+    loose_files: Optional[bool] = None,
 ) -> Union[float, ModelUsageStats]:
     """
     Calculate the cost of model usage for all challenges in the specified path
@@ -90,6 +124,7 @@ def calculate_model_cost(
     Args:
         challenge_path: Path to challenge data directory
         detailed: Whether to return detailed cost breakdown
+        loose_files: Whether to walk the tree for loose answer files, see `iter_model_answers`
 
     Returns:
         If detailed=False: Returns total cost as float
@@ -108,15 +143,16 @@ def calculate_model_cost(
     challenge_files = defaultdict(list)
 
     # Process all model answer files
-    for item_file in challenge_root.rglob("*_model_answer.json"):
+    for challenge_dir, item_file, content in iter_model_answers(
+        challenge_root, loose_files=loose_files
+    ):
         try:
             stats.total_files += 1
 
             # Track this file under its parent challenge directory
-            challenge_dir = str(item_file.parent)
             challenge_files[challenge_dir].append(item_file)
 
-            record = types.GenerateContentResponse.model_validate_json(item_file.read_bytes())
+            record = types.GenerateContentResponse.model_validate_json(content)
 
             if record.model_version not in model_cost_mapping:
                 continue
@@ -192,7 +228,9 @@ def calculate_model_cost(
 
 
 def export_stats(
-    challenge_path: Union[str, pathlib.Path], output_file: Optional[Union[str, pathlib.Path]] = None
+    challenge_path: Union[str, pathlib.Path],
+    output_file: Optional[Union[str, pathlib.Path]] = None,
+    loose_files: Optional[bool] = None,
 ) -> ModelUsageStats:
     """
     Calculate and export detailed statistics for model usage
@@ -200,11 +238,12 @@ def export_stats(
     Args:
         challenge_path: Path to challenge data directory
         output_file: Path to save JSON output (optional)
+        loose_files: Whether to walk the tree for loose answer files, see `iter_model_answers`
 
     Returns:
         ModelUsageStats object with complete statistics
     """
-    stats = calculate_model_cost(challenge_path, detailed=True)
+    stats = calculate_model_cost(challenge_path, detailed=True, loose_files=loose_files)
 
     if isinstance(stats, float):
         # This shouldn't happen as we specified detailed=True
@@ -77,7 +77,7 @@ def _create_adaptive_contrast_grid(
     ax.grid(True, color=grid_color, alpha=0.7, linestyle='-', linewidth=1.0)
 
     n_colors = x_line_space_num * y_line_space_num
-    colors = plt.cm.get_cmap(cmap_name, n_colors)
+    colors = plt.colormaps[cmap_name].resampled(n_colors)
 
     for i, x_val in enumerate(x_ticks[:-1]):
         for j, y_val in enumerate(y_ticks[:-1]):
@@ -113,7 +113,7 @@ def _create_adaptive_contrast_grid(
 
 
 def create_coordinate_grid(
-    image: Union[str, np.ndarray, Path],
+    image: Union[str, np.ndarray, Path, bytes],
     bbox: Union[FloatRect, Tuple[float, float, float, float], List[float]],
     **kwargs,
 ) -> np.ndarray:
@@ -121,7 +121,7 @@ def create_coordinate_grid(
     Convert a web image to a scientific-style coordinate system image.
 
     Args:
-        image: Input image (path or numpy array)
+        image: Input image (path, encoded image bytes or numpy array)
         bbox: Bounding box (x, y, width, height) of the image in the webpage
         **kwargs: Additional parameters including:
           - x_line_space_num: Number of vertical grid lines (default: 11)
@@ -137,6 +137,11 @@ def create_coordinate_grid(
         if img is None:
             raise FileNotFoundError(f"Could not load image from {image}")
         img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    elif isinstance(image, (bytes, bytearray)):
+        img = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError("Could not decode image bytes")
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
     else:
         img = image.copy()
 
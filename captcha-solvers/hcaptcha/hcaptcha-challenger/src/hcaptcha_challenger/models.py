@@ -54,6 +54,7 @@ class ChallengeSignal(str, Enum):
       SUCCESS: The challenge was completed successfully.
       FAILURE: The challenge failed or encountered an error.
       START: The challenge has been initiated or started.
+      CANCELLED: The caller cancelled the challenge before it finished.
     """
 
     SUCCESS = "success"
@@ -63,6 +64,7 @@ class ChallengeSignal(str, Enum):
     QR_DATA_NOT_FOUND = "qr_data_not_found"
     EXECUTION_TIMEOUT = "challenge_execution_timeout"
     RESPONSE_TIMEOUT = "challenge_response_timeout"
+    CANCELLED = "cancelled"
 
 
 class Token(BaseModel):
@@ -368,6 +370,31 @@ class ImageDragDropChallenge(BaseModel):
         return [path]
 
 
+class DragDestinationCountError(ValueError):
+    """The destinations cannot be paired one to one with the draggable elements"""
+
+
+class ImageDragDestinationChallenge(BaseModel):
+    """
+    Destinations only, the start points are derived from the payload entities.
+    `end_points[i]` is where the i-th draggable element has to be dropped.
+    """
+
+    challenge_prompt: str
+    end_points: List[PointCoordinate]
+
+    def to_drag_drop_challenge(self, start_points: List[PointCoordinate]) -> ImageDragDropChallenge:
+        if len(self.end_points) != len(start_points):
+            raise DragDestinationCountError(
+                f"Expected {len(start_points)} destinations, got {len(self.end_points)}"
+            )
+        paths = [
+            SpatialPath(start_point=start, end_point=end)
+            for start, end in zip(start_points, self.end_points, strict=True)
+        ]
+        return ImageDragDropChallenge(challenge_prompt=self.challenge_prompt, paths=paths)
+
+
 class SpatialBbox(BaseModel):
     top_left_x: int = Field(description="No more than 65% of width")
     top_left_y: int
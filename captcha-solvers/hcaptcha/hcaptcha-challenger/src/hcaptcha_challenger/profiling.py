@@ -0,0 +1,198 @@
+"""
+Sampling profiler for a single thread, usually the one running the event loop.
+
+A background thread reads the target thread's stack every `interval` seconds, so the
+profiled code is not instrumented and its overhead does not depend on call counts.
+Two views are collected:
+
+- wall: one sample per tick, time spent waiting (`select`, sleeps) included
+- cpu: every tick weighted by the CPU time the target thread consumed since the previous one
+
+Both are exported in the folded stack format (`frame;frame;frame weight`), which
+flamegraph.pl, speedscope and inferno read directly.
+
+Started from a coroutine, the profiler keeps only the samples of the calling task and
+of the tasks created from it meanwhile, so the other solves sharing the event loop do not
+show up. The samples taken while the loop waits for I/O stay in the wall view: that
+waiting time is shared by every task in flight.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import Counter
+from contextvars import ContextVar, Token
+from types import FrameType
+from typing import Callable, Literal
+
+ProfileView = Literal["wall", "cpu"]
+
+MAX_STACK_DEPTH = 128
+
+_active_profiler: ContextVar[SamplingProfiler | None] = ContextVar(
+    "hcaptcha_active_profiler", default=None
+)
+
+
+def _track_tasks(loop: asyncio.AbstractEventLoop):
+    """
+    Hand every task created under an active profiler to that profiler.
+
+    The task factory runs in the creating task, where the context variable is readable,
+    the sampling thread cannot read a task's context on every Python version.
+    """
+    factory = loop.get_task_factory()
+    if getattr(factory, "_tracks_profiled_tasks", False):
+        return
+
+    def _factory(loop, coro, **kwargs):
+        if factory is None:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        else:
+            task = factory(loop, coro, **kwargs)
+        if (profiler := _active_profiler.get()) is not None:
+            profiler._tasks.add(task)
+        return task
+
+    _factory._tracks_profiled_tasks = True
+    loop.set_task_factory(_factory)
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _fold(frame: FrameType | None) -> str:
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def _thread_cpu_clock(thread_id: int) -> Callable[[], float] | None:
+    """CPU time of another thread, None where the platform cannot read it"""
+    try:
+        clock_id = time.pthread_getcpuclockid(thread_id)
+        time.clock_gettime(clock_id)
+    except (AttributeError, OSError):
+        return None
+    return lambda: time.clock_gettime(clock_id)
+
+
+class SamplingProfiler:
+    """
+    Args:
+        interval: Seconds between two samples
+        thread_id: Thread to profile, the calling thread by default
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: int | None = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+
+        self.wall: Counter[str] = Counter()
+        self.cpu: Counter[str] = Counter()
+        self.samples = 0
+        self.skipped = 0
+        self.cpu_available = False
+        self.started_at: float | None = None
+        self.elapsed = 0.0
+
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._token: Token | None = None
+        self._tasks: weakref.WeakSet[asyncio.Task] = weakref.WeakSet()
+
+    def start(self) -> SamplingProfiler:
+        self._stop.clear()
+        try:
+            task = asyncio.current_task() if self.thread_id == threading.get_ident() else None
+        except RuntimeError:
+            # No event loop is running
+            task = None
+        if task is not None:
+            self._loop = task.get_loop()
+            _track_tasks(self._loop)
+            self._tasks.add(task)
+            # Inherited by the tasks created from here on
+            self._token = _active_profiler.set(self)
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="hcaptcha-challenger-profiler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.started_at is not None:
+            self.elapsed = time.perf_counter() - self.started_at
+        if self._token is not None:
+            try:
+                _active_profiler.reset(self._token)
+            except ValueError:
+                # Stopped from another context than the one it was started in
+                pass
+            self._token = None
+
+    def __enter__(self) -> SamplingProfiler:
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        cpu_clock = _thread_cpu_clock(self.thread_id)
+        self.cpu_available = cpu_clock is not None
+        last_cpu = cpu_clock() if cpu_clock else 0.0
+
+        while not self._stop.wait(self.interval):
+            task = asyncio.current_task(self._loop) if self._loop is not None else None
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                # The profiled thread has exited
+                return
+            if task is not None and task not in self._tasks:
+                del frame
+                self.skipped += 1
+                if cpu_clock:
+                    last_cpu = cpu_clock()
+                continue
+            stack = _fold(frame)
+            del frame
+
+            self.wall[stack] += 1
+            self.samples += 1
+            if cpu_clock:
+                now = cpu_clock()
+                # Microseconds, the folded format expects integer weights
+                if used := int((now - last_cpu) * 1e6):
+                    self.cpu[stack] += used
+                last_cpu = now
+
+    def folded(self, view: ProfileView = "wall") -> str:
+        """The profile in folded stack format, heaviest stacks first"""
+        counter = self.wall if view == "wall" else self.cpu
+        return "".join(f"{stack} {weight}\n" for stack, weight in counter.most_common())
+
+    def top(self, n: int = 10, view: ProfileView = "wall") -> list[tuple[str, float]]:
+        """Functions with the most self time, as a share of all samples of the view"""
+        counter = self.wall if view == "wall" else self.cpu
+        total = sum(counter.values())
+        if not total:
+            return []
+        leaves: Counter[str] = Counter()
+        for stack, weight in counter.items():
+            leaves[stack.rsplit(";", 1)[-1]] += weight
+        return [(label, weight / total) for label, weight in leaves.most_common(n)]
@@ -0,0 +1,44 @@
+from hcaptcha_challenger.server.cluster import (
+    ClusterManager,
+    InMemoryQueue,
+    QueueBackend,
+    RedisQueue,
+)
+from hcaptcha_challenger.server.jobs import (
+    BaseJobManager,
+    CallbackRejectedError,
+    DrainingError,
+    Job,
+    JobManager,
+    JobStatus,
+    QueueFullError,
+    SolveRequest,
+    SolveResult,
+)
+from hcaptcha_challenger.server.limiter import AdaptiveLimiter, LimitPolicy
+from hcaptcha_challenger.server.proxies import ContextPool, ProxyHealth
+from hcaptcha_challenger.server.scheduler import FairScheduler
+from hcaptcha_challenger.server.supervisor import RecyclePolicy, Supervisor
+
+__all__ = [
+    "AdaptiveLimiter",
+    "BaseJobManager",
+    "CallbackRejectedError",
+    "ClusterManager",
+    "ContextPool",
+    "DrainingError",
+    "FairScheduler",
+    "InMemoryQueue",
+    "Job",
+    "JobManager",
+    "JobStatus",
+    "LimitPolicy",
+    "ProxyHealth",
+    "QueueBackend",
+    "QueueFullError",
+    "RecyclePolicy",
+    "RedisQueue",
+    "SolveRequest",
+    "SolveResult",
+    "Supervisor",
+]
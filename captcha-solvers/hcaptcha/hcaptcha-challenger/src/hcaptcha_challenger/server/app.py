@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Query, status
+from loguru import logger
+
+from hcaptcha_challenger.server.jobs import (
+    BaseJobManager,
+    CallbackRejectedError,
+    DrainingError,
+    Job,
+    QueueFullError,
+    SolveRequest,
+)
+
+MAX_LONG_POLL = 60
+
+
+def create_app(manager: BaseJobManager) -> FastAPI:
+    """
+    HTTP job API in front of `manager`.
+
+    - `POST /jobs` queues a solve and answers `202` with the job, `429` when the queue is full,
+      `422` when `callback_url` is not on an allowed callback host
+    - `GET /jobs/{job_id}?wait=30` returns the job, waiting up to `wait` seconds for it to finish
+    - `DELETE /jobs/{job_id}` cancels the job, e.g. once the client gave up on it
+    - `GET /health` reports the queue depth and job counts
+
+    Once the manager has drained (see `Supervisor`), the server shuts down gracefully,
+    run it under a process manager that restarts it.
+    """
+
+    async def _exit_when_drained():
+        await manager.drained.wait()
+        logger.warning("Solver drained, shutting down for a restart")
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    @asynccontextmanager
+    async def lifespan(_: FastAPI):
+        await manager.start()
+        watcher = asyncio.create_task(_exit_when_drained())
+        try:
+            yield
+        finally:
+            watcher.cancel()
+            await manager.stop()
+
+    app = FastAPI(title="hcaptcha-challenger", lifespan=lifespan)
+
+    @app.post("/jobs", status_code=status.HTTP_202_ACCEPTED, response_model=Job)
+    async def submit_job(request: SolveRequest) -> Job:
+        try:
+            return await manager.submit_async(request)
+        except QueueFullError as err:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=str(err),
+                headers={"Retry-After": "5"},
+            )
+        except DrainingError as err:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(err),
+                headers={"Retry-After": "30"},
+            )
+        except CallbackRejectedError as err:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(err))
+
+    @app.get("/jobs/{job_id}", response_model=Job)
+    async def get_job(
+        job_id: str,
+        wait: float = Query(default=0, ge=0, le=MAX_LONG_POLL, description="Long-poll seconds"),
+    ) -> Job:
+        job = await manager.wait(job_id, timeout=wait)
+        if job is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        return job
+
+    @app.delete("/jobs/{job_id}", response_model=Job)
+    async def cancel_job(job_id: str) -> Job:
+        job = await manager.cancel_async(job_id)
+        if job is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        return job
+
+    @app.get("/health")
+    async def health():
+        return await manager.stats_async()
+
+    return app
@@ -0,0 +1,475 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import socket
+import time
+import uuid
+from typing import Any, Dict, List, Protocol, Tuple
+
+from loguru import logger
+
+from hcaptcha_challenger.server.jobs import (
+    BaseJobManager,
+    DrainingError,
+    Job,
+    JobStatus,
+    SolverFactory,
+)
+from hcaptcha_challenger.server.scheduler import QueueFullError
+from hcaptcha_challenger.utils import Deadline
+
+# Score of a redelivered job in the pending set, ahead of every new job
+_REDELIVERY_SCORE = -1e15
+
+
+def dump_job(job: Job) -> str:
+    """Serialize a queued job, including the proxy that the job API never echoes back"""
+    data = job.model_dump(mode="json")
+    data["request"]["proxy"] = job.request.proxy
+    return json.dumps(data)
+
+
+def load_job(raw: str | bytes) -> Job:
+    return Job.model_validate_json(raw)
+
+
+def budget_key_of(api_key: str) -> str:
+    """Budget key of a Gemini API key, the key itself never leaves the node"""
+    return f"gemini:{hashlib.sha256(api_key.encode()).hexdigest()[:16]}"
+
+
+def _pending_score(job: Job, priority: int | None) -> float:
+    # Higher priority first, then first come first served
+    priority = job.request.priority if priority is None else priority
+    return -priority * 1e10 + job.created_at
+
+
+class QueueBackend(Protocol):
+    """
+    Job queue and result store shared by the solver nodes of a cluster.
+
+    A leased job is invisible to other nodes until its lease expires, it is then
+    delivered again, so a job survives the crash of the node solving it.
+    """
+
+    async def enqueue(self, job: Job, *, maxsize: int, ttl: float, priority: int | None = None):
+        """Queue a job at `priority`, the priority of its request by default"""
+
+    async def lease(self, visibility_timeout: float) -> Job | None: ...
+
+    async def extend(self, job_id: str, visibility_timeout: float) -> bool: ...
+
+    async def complete(self, job: Job, *, ttl: float): ...
+
+    async def get(self, job_id: str) -> Job | None: ...
+
+    async def acquire(self, key: str, limit: int, window: float) -> float: ...
+
+    async def stats(self) -> Dict[str, Any]: ...
+
+    async def close(self): ...
+
+
+class InMemoryQueue:
+    """
+    `QueueBackend` of the nodes of one process, e.g. in tests.
+
+    Jobs are stored serialized, like in Redis, so nodes never share job objects.
+    """
+
+    def __init__(self):
+        self._pending: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._leases: Dict[str, float] = {}
+        self._records: Dict[str, Tuple[str, float]] = {}
+        self._windows: Dict[str, Tuple[int, int]] = {}
+
+    def _read(self, job_id: str) -> Job | None:
+        raw, expires_at = self._records.get(job_id, (None, 0))
+        if raw is None or expires_at < time.time():
+            self._records.pop(job_id, None)
+            return None
+        return load_job(raw)
+
+    def _write(self, job: Job, ttl: float):
+        self._records[job.job_id] = (dump_job(job), time.time() + ttl)
+
+    async def enqueue(self, job: Job, *, maxsize: int, ttl: float, priority: int | None = None):
+        if len(self._pending) >= maxsize:
+            raise QueueFullError(f"{len(self._pending)} jobs are already waiting")
+        self._write(job, ttl)
+        score = _pending_score(job, priority)
+        heapq.heappush(self._pending, (score, next(self._seq), job.job_id))
+
+    async def lease(self, visibility_timeout: float) -> Job | None:
+        now = time.time()
+        for job_id, expires_at in list(self._leases.items()):
+            if expires_at <= now:
+                del self._leases[job_id]
+                heapq.heappush(self._pending, (_REDELIVERY_SCORE, next(self._seq), job_id))
+
+        while self._pending:
+            _, _, job_id = heapq.heappop(self._pending)
+            job = self._read(job_id)
+            if job is None or job.status.finished:
+                continue
+            self._leases[job_id] = now + visibility_timeout
+            job.status, job.started_at = JobStatus.RUNNING, now
+            _, expires_at = self._records[job_id]
+            self._write(job, expires_at - now)
+            return job
+        return None
+
+    async def extend(self, job_id: str, visibility_timeout: float) -> bool:
+        if job_id not in self._leases:
+            return False
+        self._leases[job_id] = time.time() + visibility_timeout
+        return True
+
+    async def complete(self, job: Job, *, ttl: float):
+        self._leases.pop(job.job_id, None)
+        self._write(job, ttl)
+
+    async def get(self, job_id: str) -> Job | None:
+        return self._read(job_id)
+
+    async def acquire(self, key: str, limit: int, window: float) -> float:
+        now = time.time()
+        index = int(now // window)
+        start, count = self._windows.get(key, (index, 0))
+        if start != index:
+            count = 0
+        if count >= limit:
+            return (index + 1) * window - now
+        self._windows[key] = (index, count + 1)
+        return 0
+
+    async def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", "pending": len(self._pending), "leased": len(self._leases)}
+
+    async def close(self):
+        return
+
+
+# Requeue the expired leases, then move the next pending job to the leases
+_LEASE_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, job_id in ipairs(expired) do
+    redis.call('ZREM', KEYS[2], job_id)
+    redis.call('ZADD', KEYS[1], ARGV[3], job_id)
+end
+local popped = redis.call('ZPOPMIN', KEYS[1])
+if #popped == 0 then
+    return false
+end
+redis.call('ZADD', KEYS[2], ARGV[2], popped[1])
+return popped[1]
+"""
+
+
+# Queue a job unless the pending set is full, returns the pending count when it is
+_ENQUEUE_SCRIPT = """
+local pending = redis.call('ZCARD', KEYS[1])
+if pending >= tonumber(ARGV[1]) then
+    return pending
+end
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+redis.call('ZADD', KEYS[1], ARGV[4], ARGV[5])
+return -1
+"""
+
+
+class RedisQueue:
+    """
+    `QueueBackend` on Redis, or a Redis-compatible server (Valkey, KeyDB, Dragonfly).
+
+    - `<prefix>:pending` sorted set of queued job ids, by priority then submission time
+    - `<prefix>:leases` sorted set of leased job ids, by lease expiry
+    - `<prefix>:job:<job_id>` the job as JSON, expiring `ttl` seconds after its last write
+    - `<prefix>:budget:<key>:<window>` requests of a budget key in a fixed window
+
+    Queueing and leasing run as scripts: concurrent submissions never overshoot `maxsize`,
+    and a job is never lost or delivered twice between the sets.
+
+    Args:
+        url: e.g. redis://localhost:6379/0
+        prefix: Namespace of the keys, one per cluster
+    """
+
+    def __init__(self, url: str, *, prefix: str = "hcaptcha-challenger"):
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as err:
+            raise ImportError(
+                "The Redis queue requires extra dependencies: "
+                "pip install hcaptcha-challenger[cluster]"
+            ) from err
+
+        self._redis = aioredis.from_url(url)
+        self._prefix = prefix
+        self._pending = f"{prefix}:pending"
+        self._leases = f"{prefix}:leases"
+        self._enqueue_script = self._redis.register_script(_ENQUEUE_SCRIPT)
+        self._lease_script = self._redis.register_script(_LEASE_SCRIPT)
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self._prefix}:job:{job_id}"
+
+    async def enqueue(self, job: Job, *, maxsize: int, ttl: float, priority: int | None = None):
+        score = _pending_score(job, priority)
+        pending = await self._enqueue_script(
+            keys=[self._pending, self._job_key(job.job_id)],
+            args=[maxsize, dump_job(job), max(int(ttl), 1), score, job.job_id],
+        )
+        if pending >= 0:
+            raise QueueFullError(f"{pending} jobs are already waiting")
+
+    async def lease(self, visibility_timeout: float) -> Job | None:
+        while True:
+            now = time.time()
+            job_id = await self._lease_script(
+                keys=[self._pending, self._leases],
+                args=[now, now + visibility_timeout, _REDELIVERY_SCORE],
+            )
+            if not job_id:
+                return None
+            job_id = job_id.decode() if isinstance(job_id, bytes) else job_id
+
+            raw = await self._redis.get(self._job_key(job_id))
+            job = load_job(raw) if raw else None
+            if job is None or job.status.finished:
+                await self._redis.zrem(self._leases, job_id)
+                continue
+
+            job.status, job.started_at = JobStatus.RUNNING, now
+            await self._redis.set(self._job_key(job_id), dump_job(job), keepttl=True)
+            return job
+
+    async def extend(self, job_id: str, visibility_timeout: float) -> bool:
+        expires_at = time.time() + visibility_timeout
+        return bool(await self._redis.zadd(self._leases, {job_id: expires_at}, xx=True, ch=True))
+
+    async def complete(self, job: Job, *, ttl: float):
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.set(self._job_key(job.job_id), dump_job(job), ex=max(int(ttl), 1))
+            pipe.zrem(self._leases, job.job_id)
+            pipe.zrem(self._pending, job.job_id)
+            await pipe.execute()
+
+    async def get(self, job_id: str) -> Job | None:
+        raw = await self._redis.get(self._job_key(job_id))
+        return load_job(raw) if raw else None
+
+    async def acquire(self, key: str, limit: int, window: float) -> float:
+        now = time.time()
+        index = int(now // window)
+        counter = f"{self._prefix}:budget:{key}:{index}"
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.incr(counter)
+            pipe.expire(counter, max(int(window * 2), 1))
+            count, _ = await pipe.execute()
+        return 0 if count <= limit else (index + 1) * window - now
+
+    async def stats(self) -> Dict[str, Any]:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.zcard(self._pending)
+            pipe.zcard(self._leases)
+            pending, leased = await pipe.execute()
+        return {"backend": "redis", "pending": pending, "leased": leased}
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+class ClusterManager(BaseJobManager):
+    """
+    A solver node pulling jobs from a queue shared with the other nodes of a cluster.
+
+    Any node accepts jobs and answers polls for any job, the results live in the backend.
+    A job is leased for `visibility_timeout` seconds and the lease is renewed while it is
+    solved, a job whose node died is delivered to another node once its lease expires.
+    Capacity grows with every node, while `budget` caps the solves started per minute
+    for the Gemini API key across the whole cluster.
+
+    The shared queue orders jobs by priority only, the `scheduler` options other than its
+    `maxsize` (per-key and per-proxy caps, queue SLO) apply to `JobManager` alone. Jobs of
+    proxies penalized by this node's `proxy_health` are queued one priority lower.
+
+    Args:
+        solver_factory: Creates the solver of a worker
+        backend: Queue and result store shared by the nodes
+        node_id: Name of the node in logs and stats
+        visibility_timeout: Seconds a job stays leased without a renewal
+        budget: Solves per minute per Gemini API key across the cluster, None for no limit
+        budget_key: Key the budget is counted under, see `budget_key_of`
+        poll_interval: Seconds between two lease attempts on an empty queue
+        **kwargs: See `BaseJobManager`
+    """
+
+    def __init__(
+        self,
+        solver_factory: SolverFactory,
+        backend: QueueBackend,
+        *,
+        node_id: str | None = None,
+        visibility_timeout: float = 60,
+        budget: int | None = None,
+        budget_key: str = "gemini",
+        poll_interval: float = 0.5,
+        **kwargs,
+    ):
+        super().__init__(solver_factory, **kwargs)
+        self.backend = backend
+        self.node_id = node_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:6]}"
+        self.visibility_timeout = visibility_timeout
+        self.budget = budget
+        self.budget_key = budget_key
+        self.poll_interval = poll_interval
+
+    async def stop(self):
+        await super().stop()
+        await self.backend.close()
+
+    # == Client API == #
+
+    async def submit_async(self, request) -> Job:
+        if self.draining:
+            raise DrainingError("The node is draining before a restart")
+        self._check_callback(request)
+        job = Job(job_id=uuid.uuid4().hex, request=request)
+        # Kept past the job's budget, so that a late result can still be polled
+        ttl = self._timeout_of(job) + self.job_ttl
+        priority = request.priority
+        if self.proxy_health is not None:
+            priority -= self.proxy_health.penalty(request.proxy)
+        await self.backend.enqueue(job, maxsize=self.scheduler.maxsize, ttl=ttl, priority=priority)
+        return job
+
+    async def wait(self, job_id: str, timeout: float | None = None) -> Job | None:
+        deadline = Deadline(timeout or 0)
+        while True:
+            job = await self.backend.get(job_id)
+            if job is None or job.status.finished or deadline.expired:
+                return job
+            await asyncio.sleep(deadline.cap(self.poll_interval))
+
+    async def cancel_async(
+        self, job_id: str, reason: str = "Cancelled by the client", *, timeout: float = 10
+    ) -> Job | None:
+        """
+        Cancel a job, whichever node holds it.
+
+        The job is marked cancelled in the backend, so it is never leased again, and the node
+        solving it cancels the solve at its next heartbeat.
+        """
+        job = await self.backend.get(job_id)
+        if job is None or job.status.finished:
+            return job
+        if task := self._solving.get(job_id):
+            self._cancelled[job_id] = reason
+            task.cancel()
+            return await self.wait(job_id, timeout=timeout)
+
+        job.status, job.finished_at, job.error = JobStatus.CANCELLED, time.time(), reason
+        await self.backend.complete(job, ttl=self.job_ttl)
+        return job
+
+    async def stats_async(self) -> Dict[str, Any]:
+        return {
+            "node_id": self.node_id,
+            "workers": self.workers,
+            "running": self._running,
+            "draining": self.draining,
+            "recycled": self.supervisor.recycled if self.supervisor else 0,
+            "queue_size": self.scheduler.maxsize,
+            "concurrency": self.limiter.stats() if self.limiter else {},
+            **await self.backend.stats(),
+        }
+
+    # == Workers == #
+
+    def _timeout_of(self, job: Job) -> float:
+        return job.request.timeout or self.default_timeout
+
+    async def _worker(self, worker_id: int):
+        solver = await self._start_solver(worker_id)
+        logger.debug(f"Cluster worker started - node_id={self.node_id} {worker_id=}")
+        try:
+            while True:
+                if self.draining:
+                    # Leave the queue to the other nodes
+                    if not self._running:
+                        self.drained.set()
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+
+                # Leave the jobs to the other nodes while the limiter holds this one back
+                if self.limiter and not self.limiter.has_room():
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+
+                # Or while this worker has no solver
+                if solver is None and (solver := await self._start_solver(worker_id)) is None:
+                    await self._solver_backoff(worker_id)
+                    continue
+
+                job = await self.backend.lease(self.visibility_timeout)
+                if job is None:
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+
+                self._running += 1
+                try:
+                    await self._run_leased(solver, job)
+                finally:
+                    self._running -= 1
+                solver = await self._supervise(solver, worker_id)
+        finally:
+            if solver is not None:
+                await solver.close()
+
+    async def _run_leased(self, solver, job: Job):
+        # The budget starts at submission, whichever node the job lands on
+        deadline = Deadline(job.created_at + self._timeout_of(job) - time.time())
+        heartbeat = asyncio.create_task(self._heartbeat(job.job_id))
+        try:
+            await self._acquire_budget(deadline)
+            async with self._capacity():
+                if job.job_id in self._cancelled:
+                    self._finish_cancelled(job)
+                else:
+                    await self._solve(solver, job, deadline)
+        finally:
+            heartbeat.cancel()
+        await self.backend.complete(job, ttl=self.job_ttl)
+        self._callback(job)
+
+    async def _heartbeat(self, job_id: str):
+        """Renew the lease of a running job, until the job is cancelled in the backend"""
+        while True:
+            await asyncio.sleep(min(self.poll_interval, self.visibility_timeout / 3))
+            try:
+                stored = await self.backend.get(job_id)
+                if stored is not None and stored.status == JobStatus.CANCELLED:
+                    self._cancelled[job_id] = stored.error or "Cancelled"
+                    if task := self._solving.get(job_id):
+                        task.cancel()
+                    return
+                if not await self.backend.extend(job_id, self.visibility_timeout):
+                    logger.warning(f"Lost the lease of a running job - {job_id=}")
+            except Exception as err:
+                logger.warning(f"Failed to renew a job lease - {job_id=} {err=}")
+
+    async def _acquire_budget(self, deadline: Deadline):
+        if not self.budget:
+            return
+        while not deadline.expired:
+            retry_after = await self.backend.acquire(self.budget_key, self.budget, 60)
+            if not retry_after:
+                return
+            logger.debug(f"Cluster budget spent, waiting - {self.budget_key=} {retry_after=:.1f}")
+            await asyncio.sleep(deadline.cap(retry_after))
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import asyncio
+import statistics
+from contextlib import asynccontextmanager, suppress
+from typing import Any, AsyncIterator, Callable, Dict, List, Tuple
+
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from hcaptcha_challenger.tools.common import add_reasoner_listener, remove_reasoner_listener
+
+
+def is_throttled(error: BaseException | None) -> bool:
+    """Gemini answered 429 RESOURCE_EXHAUSTED"""
+    return error is not None and getattr(error, "code", None) == 429
+
+
+def _read_host_cpu() -> Tuple[int, int] | None:
+    """Busy and total jiffies of all CPUs, None where `/proc` is not available"""
+    try:
+        with open("/proc/stat", "rb") as fp:
+            fields = [int(value) for value in fp.readline().split()[1:]]
+    except (OSError, ValueError):
+        return None
+    if len(fields) < 4:
+        return None
+    # idle and iowait
+    idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+    return sum(fields) - idle, sum(fields)
+
+
+class HostCpu:
+    """Share of the host CPU used since the previous call, from `/proc/stat`"""
+
+    def __init__(self):
+        self._last = _read_host_cpu()
+
+    def __call__(self) -> float | None:
+        current = _read_host_cpu()
+        last, self._last = self._last, current
+        if current is None or last is None or current[1] <= last[1]:
+            return None
+        return (current[0] - last[0]) / (current[1] - last[1])
+
+
+class LimitPolicy(BaseModel):
+    min_limit: int = Field(default=1, ge=1, description="Lowest number of concurrent solves")
+    max_limit: int = Field(default=8, ge=1, description="Highest number of concurrent solves")
+    initial_limit: int | None = Field(
+        default=None, ge=1, description="Concurrent solves at start, `min_limit` by default"
+    )
+    window: float = Field(
+        default=10, gt=0, description="Seconds of observations behind each adjustment"
+    )
+    backoff: float = Field(
+        default=0.75, gt=0, lt=1, description="Multiplier of the limit once overloaded"
+    )
+    latency_tolerance: float = Field(
+        default=2.0,
+        gt=1,
+        description="Overloaded once the median reasoner latency of a window exceeds this "
+        "multiple of the baseline",
+    )
+    max_throttle_rate: float = Field(
+        default=0.05, ge=0, le=1, description="Overloaded once this share of reasoner calls is 429"
+    )
+    max_loop_lag: float = Field(
+        default=0.25,
+        gt=0,
+        description="Overloaded once the event loop is late by this many seconds",
+    )
+    max_cpu: float = Field(
+        default=0.9, gt=0, le=1, description="Overloaded once the host CPU is busier than this"
+    )
+
+
+class AdaptiveLimiter:
+    """
+    Number of solves running at once, adjusted to what the host and the Gemini quota sustain.
+
+    Additive increase, multiplicative decrease: at the end of every window the limit
+    grows by one if the solves used all of it and nothing was overloaded, and shrinks by
+    `backoff` if Gemini answered too many 429s, reasoner calls slowed down from their
+    baseline, the event loop fell behind, or the host CPU was saturated.
+
+    The baseline is the lowest median reasoner latency seen so far, rising slowly so that
+    it follows a model that got slower for everyone.
+
+    Args:
+        policy: Bounds and thresholds
+        cpu_usage: Returns the share of the host CPU used since its previous call
+    """
+
+    def __init__(
+        self,
+        policy: LimitPolicy | None = None,
+        *,
+        cpu_usage: Callable[[], float | None] | None = None,
+    ):
+        self.policy = policy or LimitPolicy()
+        self.cpu_usage = cpu_usage or HostCpu()
+        self.limit = max(
+            min(self.policy.initial_limit or self.policy.min_limit, self.policy.max_limit),
+            self.policy.min_limit,
+        )
+        self.in_flight = 0
+        self.baseline: float | None = None
+        self.last_reason: str | None = None
+        self.increased = 0
+        self.decreased = 0
+
+        self._released = asyncio.Event()
+        self._saturated = False
+        self._latencies: List[float] = []
+        self._calls = 0
+        self._throttled = 0
+        self._loop_lag = 0.0
+        self._monitor: asyncio.Task | None = None
+
+    async def start(self):
+        add_reasoner_listener(self.observe)
+        self._monitor = asyncio.create_task(self._run_monitor(), name="hcaptcha-limiter")
+
+    async def stop(self):
+        remove_reasoner_listener(self.observe)
+        if self._monitor:
+            self._monitor.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._monitor
+            self._monitor = None
+
+    def has_room(self) -> bool:
+        """Whether one more solve may start now, a solve held back counts as saturation"""
+        if self.in_flight < self.limit:
+            return True
+        self._saturated = True
+        return False
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Wait until fewer solves than the limit are running"""
+        while self.in_flight >= self.limit:
+            self._saturated = True
+            self._released.clear()
+            await self._released.wait()
+
+        self.in_flight += 1
+        if self.in_flight >= self.limit:
+            self._saturated = True
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._released.set()
+
+    def observe(self, duration: float, error: BaseException | None):
+        """Record a reasoner attempt, see `add_reasoner_listener`"""
+        self._calls += 1
+        if is_throttled(error):
+            self._throttled += 1
+        elif error is None:
+            self._latencies.append(duration)
+
+    def adjust(self, *, loop_lag: float = 0.0, cpu: float | None = None) -> int:
+        """Close the current window, returns the new limit"""
+        policy = self.policy
+        latency = statistics.median(self._latencies) if self._latencies else None
+        throttle_rate = self._throttled / self._calls if self._calls else 0.0
+
+        reason = None
+        if self._calls and throttle_rate > policy.max_throttle_rate:
+            reason = f"throttle_rate={throttle_rate:.2f}"
+        elif latency and self.baseline and latency > policy.latency_tolerance * self.baseline:
+            reason = f"latency={latency:.1f}s baseline={self.baseline:.1f}s"
+        elif loop_lag > policy.max_loop_lag:
+            reason = f"loop_lag={loop_lag:.2f}s"
+        elif cpu is not None and cpu > policy.max_cpu:
+            reason = f"cpu={cpu:.2f}"
+
+        if latency is not None and reason is None:
+            if self.baseline is None or latency < self.baseline:
+                self.baseline = latency
+            else:
+                self.baseline += 0.05 * (latency - self.baseline)
+
+        previous = self.limit
+        if reason is not None:
+            self.limit = max(int(self.limit * policy.backoff), policy.min_limit)
+            self.last_reason = reason
+        elif self._saturated:
+            self.limit = min(self.limit + 1, policy.max_limit)
+
+        if self.limit > previous:
+            self.increased += 1
+            self._released.set()
+        elif self.limit < previous:
+            self.decreased += 1
+            logger.info(f"Lowering the concurrency - limit={self.limit} {reason}")
+
+        self._latencies.clear()
+        self._calls = self._throttled = 0
+        self._saturated = self.in_flight >= self.limit
+        return self.limit
+
+    async def _run_monitor(self):
+        tick = min(self.policy.window / 10, 0.5)
+        loop = asyncio.get_running_loop()
+        window_end = loop.time() + self.policy.window
+        while True:
+            before = loop.time()
+            await asyncio.sleep(tick)
+            now = loop.time()
+            self._loop_lag = max(self._loop_lag, now - before - tick)
+            if now < window_end:
+                continue
+
+            self.adjust(loop_lag=self._loop_lag, cpu=self.cpu_usage())
+            self._loop_lag, window_end = 0.0, now + self.policy.window
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "baseline_latency": None if self.baseline is None else round(self.baseline, 3),
+            "increased": self.increased,
+            "decreased": self.decreased,
+            "last_reason": self.last_reason,
+        }
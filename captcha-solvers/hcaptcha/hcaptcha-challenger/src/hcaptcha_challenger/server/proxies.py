@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from collections import OrderedDict
+from contextlib import suppress
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urlsplit
+
+from loguru import logger
+from playwright.async_api import Browser, BrowserContext
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+DIRECT = "direct"
+
+# Everything an origin keeps apart from its cookies and the HTTP cache
+_ORIGIN_STORAGE = "local_storage,indexeddb,websql,service_workers,cache_storage,file_systems"
+
+
+def proxy_identity(proxy: str | None) -> str:
+    """The proxy a job goes through, without its password, e.g. `http://user@host:8080`"""
+    if not proxy:
+        return DIRECT
+    parts = urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+    user = f"{parts.username}@" if parts.username else ""
+    port = f":{parts.port}" if parts.port else ""
+    return f"{parts.scheme}://{user}{parts.hostname}{port}"
+
+
+def context_proxy_of(proxy: str | None) -> Dict[str, str] | None:
+    """Playwright `proxy` option, with the credentials passed apart from the server"""
+    if not proxy:
+        return None
+    parts = urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+    port = f":{parts.port}" if parts.port else ""
+    options = {"server": f"{parts.scheme}://{parts.hostname}{port}"}
+    if parts.username:
+        options["username"] = parts.username
+        options["password"] = parts.password or ""
+    return options
+
+
+def is_network_error(error: BaseException | None) -> bool:
+    """The proxy could not be reached, or a page load or a wait through it timed out"""
+    if error is None:
+        return False
+    if isinstance(error, (asyncio.TimeoutError, PlaywrightTimeoutError)):
+        return True
+    # e.g. net::ERR_PROXY_CONNECTION_FAILED or net::ERR_TUNNEL_CONNECTION_FAILED
+    return isinstance(error, PlaywrightError) and "net::ERR_" in error.message
+
+
+class _ProxyState:
+    def __init__(self):
+        self.solves = 0
+        self.failures = 0
+        self.success_rate: float | None = None
+        self.latency: float | None = None
+
+
+class ProxyHealth:
+    """
+    Success rate and latency per proxy.
+
+    Both are moving averages over the recent solves of a proxy. Only network errors and
+    timeouts count as failures of the proxy, a solve that failed for another reason, e.g.
+    a wrong answer, is not held against it. A proxy that mostly fails, or is much slower
+    than the others, gets a `penalty`: its jobs are queued at a lower priority, so a bad
+    proxy stops taking workers from the healthy ones. The number of jobs running through
+    a proxy is capped by the `FairScheduler`.
+
+    Args:
+        alpha: Weight of the latest solve in the moving averages
+        min_solves: Solves of a proxy before it can be penalized
+        failure_threshold: Penalize a proxy below this success rate
+        slow_factor: Penalize a proxy slower than this multiple of the median proxy latency
+    """
+
+    _shared: ProxyHealth | None = None
+
+    def __init__(
+        self,
+        *,
+        alpha: float = 0.2,
+        min_solves: int = 5,
+        failure_threshold: float = 0.5,
+        slow_factor: float = 2.0,
+    ):
+        self.alpha = alpha
+        self.min_solves = min_solves
+        self.failure_threshold = failure_threshold
+        self.slow_factor = slow_factor
+        self._proxies: Dict[str, _ProxyState] = {}
+
+    @classmethod
+    def shared(cls) -> ProxyHealth:
+        """The instance shared by the workers of the process"""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def _state(self, proxy: str | None) -> _ProxyState:
+        identity = proxy_identity(proxy)
+        if identity not in self._proxies:
+            self._proxies[identity] = _ProxyState()
+        return self._proxies[identity]
+
+    def record(
+        self,
+        proxy: str | None,
+        *,
+        success: bool,
+        duration: float,
+        error: BaseException | None = None,
+    ):
+        """Record a solve through the proxy, `error` is what it raised if it did not finish"""
+        if not success and not is_network_error(error):
+            return
+        state = self._state(proxy)
+        state.solves += 1
+        state.failures += not success
+
+        outcome = 1.0 if success else 0.0
+        if state.success_rate is None:
+            state.success_rate = outcome
+        else:
+            state.success_rate += self.alpha * (outcome - state.success_rate)
+        # Failures often end at a timeout, only successes tell how fast a proxy is
+        if success:
+            if state.latency is None:
+                state.latency = duration
+            else:
+                state.latency += self.alpha * (duration - state.latency)
+
+    def penalty(self, proxy: str | None) -> int:
+        """0 for a healthy or unknown proxy, 1 for a failing or slow one"""
+        state = self._proxies.get(proxy_identity(proxy))
+        if state is None or state.solves < self.min_solves:
+            return 0
+        if state.success_rate is not None and state.success_rate < self.failure_threshold:
+            return 1
+
+        latencies = [
+            s.latency
+            for s in self._proxies.values()
+            if s.latency is not None and s.solves >= self.min_solves
+        ]
+        if state.latency is not None and len(latencies) > 1:
+            if state.latency > self.slow_factor * statistics.median(latencies):
+                return 1
+        return 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            identity: {
+                "solves": state.solves,
+                "failures": state.failures,
+                "success_rate": (
+                    None if state.success_rate is None else round(state.success_rate, 3)
+                ),
+                "latency": None if state.latency is None else round(state.latency, 3),
+                "penalty": self.penalty(identity if identity != DIRECT else None),
+            }
+            for identity, state in self._proxies.items()
+        }
+
+
+class ContextPool:
+    """
+    Warm browser contexts of one browser, partitioned by proxy.
+
+    A context is bound to its proxy for life, so contexts are only reused for jobs going
+    through the same proxy. A released context keeps its open proxy connections and its
+    routes, but loses its pages, its cookies and the storage of the origins its pages were
+    on (localStorage, IndexedDB, service workers...), so jobs stay isolated. Clearing the
+    storage takes a CDP session, contexts of other browsers are never reused. The routes of
+    the agents turn off the HTTP cache, see `ASSET_CACHE` for the hCaptcha assets. Idle
+    contexts are closed after `idle_ttl` seconds, or the least recently used ones beyond
+    `max_idle`.
+
+    Args:
+        browser: Browser the contexts are created on
+        max_idle: Idle contexts kept across all proxies, 0 disables reuse
+        idle_ttl: Seconds an idle context is kept
+        context_options: Extra `browser.new_context` options
+    """
+
+    def __init__(
+        self,
+        browser: Browser,
+        *,
+        max_idle: int = 4,
+        idle_ttl: float = 300,
+        context_options: Dict[str, Any] | None = None,
+    ):
+        self.browser = browser
+        self.max_idle = max_idle
+        self.idle_ttl = idle_ttl
+        self.context_options = context_options or {}
+
+        # proxy identity -> idle contexts with the time they were released, oldest first
+        self._idle: OrderedDict[str, List[Tuple[BrowserContext, float]]] = OrderedDict()
+
+        self.created = 0
+        self.reused = 0
+
+    @property
+    def idle(self) -> int:
+        return sum(len(contexts) for contexts in self._idle.values())
+
+    async def acquire(self, proxy: str | None) -> BrowserContext:
+        await self.evict_idle()
+        identity = proxy_identity(proxy)
+        if contexts := self._idle.get(identity):
+            context, _ = contexts.pop()
+            if not contexts:
+                del self._idle[identity]
+            self.reused += 1
+            return context
+
+        self.created += 1
+        return await self.browser.new_context(proxy=context_proxy_of(proxy), **self.context_options)
+
+    async def release(self, context: BrowserContext, proxy: str | None, *, reuse: bool = True):
+        """Return a context to the pool, or close it if it is not reusable"""
+        if not reuse or self.max_idle <= 0:
+            await self._close(context)
+            return
+        try:
+            await self._reset(context)
+        except Exception as err:
+            logger.debug(f"Dropping a context that failed to reset - {err=}")
+            await self._close(context)
+            return
+
+        identity = proxy_identity(proxy)
+        self._idle.setdefault(identity, []).append((context, time.monotonic()))
+        self._idle.move_to_end(identity)
+        while self.idle > self.max_idle:
+            oldest = next(iter(self._idle))
+            stale, _ = self._idle[oldest].pop(0)
+            if not self._idle[oldest]:
+                del self._idle[oldest]
+            await self._close(stale)
+
+    @staticmethod
+    async def _reset(context: BrowserContext):
+        origins = {
+            f"{parts.scheme}://{parts.netloc}"
+            for page in context.pages
+            for frame in page.frames
+            if (parts := urlsplit(frame.url)).scheme in ("http", "https")
+        }
+        if origins:
+            session = await context.new_cdp_session(context.pages[0])
+            for origin in sorted(origins):
+                await session.send(
+                    "Storage.clearDataForOrigin",
+                    {"origin": origin, "storageTypes": _ORIGIN_STORAGE},
+                )
+            await session.detach()
+        for page in list(context.pages):
+            await page.close()
+        await context.clear_cookies()
+
+    async def evict_idle(self):
+        """Close the contexts idle for longer than `idle_ttl`, e.g. of proxies no longer used"""
+        expired_before = time.monotonic() - self.idle_ttl
+        for identity in list(self._idle):
+            contexts = self._idle[identity]
+            while contexts and contexts[0][1] < expired_before:
+                context, _ = contexts.pop(0)
+                await self._close(context)
+            if not contexts:
+                del self._idle[identity]
+
+    async def close(self):
+        for contexts in self._idle.values():
+            for context, _ in contexts:
+                await self._close(context)
+        self._idle.clear()
+
+    @staticmethod
+    async def _close(context: BrowserContext):
+        with suppress(Exception):
+            await context.close()
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from hcaptcha_challenger.utils import percentile
+
+SLO_WINDOW = 256
+
+_Entry = Tuple[float, int, str, Any, float, Optional[str]]
+
+
+class QueueFullError(Exception):
+    """No room for another job, globally or for its key, the client should retry later"""
+
+
+class _KeyState:
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.last_finish = 0.0
+        self.running = 0
+        self.queued = 0
+        self.waits: Deque[float] = deque(maxlen=SLO_WINDOW)
+        self.slo_violations = 0
+
+
+class FairScheduler:
+    """
+    Priority queue with weighted fair queuing between keys (site keys or tenants).
+
+    - Higher `priority` is served first. Within a priority, keys share the workers in
+      proportion to their weight (start-time fair queuing), so a key flooding the queue
+      only delays its own jobs.
+    - A key at its concurrency cap is skipped until one of its jobs is released, and so is
+      a job whose proxy is at its cap, the workers take the jobs of other proxies meanwhile.
+    - Queue time is recorded per key and compared against `queue_slo`.
+
+    Args:
+        maxsize: Maximum number of queued jobs
+        max_queued_per_key: Maximum number of queued jobs of one key
+        max_running_per_key: Default concurrency cap of a key, None for no cap
+        concurrency: Concurrency cap per key, overrides `max_running_per_key`
+        max_running_per_proxy: Concurrency cap of a proxy, None for no cap
+        weights: Fair share per key, default 1
+        queue_slo: Target queue time in seconds
+    """
+
+    def __init__(
+        self,
+        *,
+        maxsize: int = 64,
+        max_queued_per_key: int | None = None,
+        max_running_per_key: int | None = None,
+        concurrency: Dict[str, int] | None = None,
+        max_running_per_proxy: int | None = None,
+        weights: Dict[str, float] | None = None,
+        queue_slo: float | None = None,
+    ):
+        self.maxsize = max(maxsize, 1)
+        self.max_queued_per_key = max_queued_per_key
+        self.max_running_per_key = max_running_per_key
+        self.concurrency = concurrency or {}
+        self.max_running_per_proxy = max_running_per_proxy
+        self.weights = weights or {}
+        self.queue_slo = queue_slo
+
+        # priority -> heap of (finish_tag, seq, key, item, enqueued_at, proxy)
+        self._levels: Dict[int, List[_Entry]] = defaultdict(list)
+        self._keys: Dict[str, _KeyState] = {}
+        self._proxies: Dict[str, int] = defaultdict(int)
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        self._size = 0
+        self._changed = asyncio.Event()
+
+    def qsize(self) -> int:
+        return self._size
+
+    def _key(self, key: str) -> _KeyState:
+        if key not in self._keys:
+            self._keys[key] = _KeyState(max(self.weights.get(key, 1.0), 1e-6))
+        return self._keys[key]
+
+    def _cap(self, key: str) -> int | None:
+        return self.concurrency.get(key, self.max_running_per_key)
+
+    def _eligible(self, entry: _Entry) -> bool:
+        key, proxy = entry[2], entry[5]
+        cap = self._cap(key)
+        if cap is not None and self._keys[key].running >= cap:
+            return False
+        if proxy is None or self.max_running_per_proxy is None:
+            return True
+        return self._proxies[proxy] < self.max_running_per_proxy
+
+    def put_nowait(self, item: Any, key: str, priority: int = 0, proxy: str | None = None):
+        """Queue a job of `key`, going through `proxy` (its identity, without credentials)"""
+        if self._size >= self.maxsize:
+            raise QueueFullError(f"{self._size} jobs are already waiting")
+        state = self._key(key)
+        if self.max_queued_per_key is not None and state.queued >= self.max_queued_per_key:
+            raise QueueFullError(f"{state.queued} jobs of {key!r} are already waiting")
+
+        start = max(self._virtual_time, state.last_finish)
+        state.last_finish = start + 1 / state.weight
+        state.queued += 1
+        entry = (state.last_finish, next(self._seq), key, item, time.monotonic(), proxy)
+        heapq.heappush(self._levels[priority], entry)
+        self._size += 1
+        self._notify()
+
+    async def get(self, ready: Callable[[], bool] | None = None) -> Tuple[Any, str]:
+        """
+        Wait for the next eligible job, the caller must `release` it when done.
+
+        Args:
+            ready: Take a job only while it returns True, e.g. while a limiter has room.
+                It is checked again whenever a job is queued or released.
+        """
+        while True:
+            picked = self._pop_eligible() if ready is None or ready() else None
+            if picked is not None:
+                return picked
+            # No await between the check and `clear`, a change cannot be missed
+            self._changed.clear()
+            await self._changed.wait()
+
+    def release(self, key: str, proxy: str | None = None):
+        """Free the slots taken by a job of `key` going through `proxy`"""
+        state = self._keys.get(key)
+        if state is not None and state.running:
+            state.running -= 1
+        if proxy is not None and self._proxies.get(proxy):
+            self._proxies[proxy] -= 1
+            if not self._proxies[proxy]:
+                del self._proxies[proxy]
+        self._notify()
+
+    def discard(self, item: Any) -> bool:
+        """Drop a queued job, e.g. a cancelled one, False if it is not queued"""
+        for priority, heap in self._levels.items():
+            for index, entry in enumerate(heap):
+                if entry[3] == item:
+                    break
+            else:
+                continue
+            heap[index] = heap[-1]
+            heap.pop()
+            heapq.heapify(heap)
+            if not heap:
+                del self._levels[priority]
+            self._keys[entry[2]].queued -= 1
+            self._size -= 1
+            return True
+        return False
+
+    def _pop_eligible(self) -> Tuple[Any, str] | None:
+        for priority in sorted(self._levels, reverse=True):
+            heap = self._levels[priority]
+            skipped = []
+            picked = None
+            while heap:
+                entry = heapq.heappop(heap)
+                if not self._eligible(entry):
+                    skipped.append(entry)
+                    continue
+                picked = entry
+                break
+            for entry in skipped:
+                heapq.heappush(heap, entry)
+            if not heap:
+                del self._levels[priority]
+            if picked is not None:
+                return self._start(picked)
+        return None
+
+    def _start(self, entry: _Entry) -> Tuple[Any, str]:
+        finish_tag, _, key, item, enqueued_at, proxy = entry
+        state = self._keys[key]
+        state.queued -= 1
+        state.running += 1
+        if proxy is not None:
+            self._proxies[proxy] += 1
+        self._size -= 1
+        self._virtual_time = max(self._virtual_time, finish_tag - 1 / state.weight)
+
+        waited = time.monotonic() - enqueued_at
+        state.waits.append(waited)
+        if self.queue_slo is not None and waited > self.queue_slo:
+            state.slo_violations += 1
+        return item, key
+
+    def _notify(self):
+        self._changed.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, running jobs and queue-time percentiles per key"""
+        keys = {}
+        for key, state in self._keys.items():
+            waits = list(state.waits)
+            keys[key] = {
+                "weight": state.weight,
+                "queued": state.queued,
+                "running": state.running,
+                "queue_time_p50": percentile(waits, 0.5),
+                "queue_time_p95": percentile(waits, 0.95),
+                "slo_violations": state.slo_violations,
+            }
+        return {
+            "queued": self._size,
+            "queue_slo": self.queue_slo,
+            "keys": keys,
+            "running_per_proxy": dict(self._proxies),
+        }
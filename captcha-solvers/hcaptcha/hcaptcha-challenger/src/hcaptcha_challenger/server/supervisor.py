@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import gc
+import os
+from contextlib import suppress
+from typing import Iterable
+
+import matplotlib.pyplot as plt
+from loguru import logger
+from pydantic import BaseModel, Field
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_of(pid: int | str = "self") -> int | None:
+    """Resident set size of a process in bytes, None where `/proc` is not available"""
+    try:
+        with open(f"/proc/{pid}/statm", "rb") as fp:
+            return int(fp.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def total_rss_of(pids: Iterable[int]) -> int | None:
+    sizes = [rss_of(pid) for pid in pids]
+    sizes = [size for size in sizes if size is not None]
+    return sum(sizes) if sizes else None
+
+
+class RecyclePolicy(BaseModel):
+    max_solves: int | None = Field(
+        default=None, gt=0, description="Replace a worker's browser after this many jobs"
+    )
+    max_browser_rss_mb: float | None = Field(
+        default=None,
+        gt=0,
+        description="Replace a worker's browser once its processes (browser, renderers, GPU) "
+        "use more memory than this",
+    )
+    max_process_rss_mb: float | None = Field(
+        default=None,
+        gt=0,
+        description="Drain the whole server once the Python process uses more memory than this, "
+        "so that a process manager can restart it",
+    )
+
+
+class Supervisor:
+    """
+    Decides when a worker's solver is replaced, and when the process should be restarted.
+
+    Checks run between jobs, so a solve is never interrupted. Browser memory can be
+    reclaimed by closing the browser. Python memory (matplotlib figures, OpenCV buffers,
+    fragmentation) only returns with a new process, so crossing `max_process_rss_mb`
+    drains the server instead.
+    """
+
+    def __init__(self, policy: RecyclePolicy):
+        self.policy = policy
+        self.recycled = 0
+
+    async def recycle_reason(self, solver) -> str | None:
+        """Why `solver` should be replaced, None to keep it"""
+        solves = getattr(solver, "solves", 0)
+        if self.policy.max_solves and solves >= self.policy.max_solves:
+            return f"solves={solves}"
+
+        if self.policy.max_browser_rss_mb and hasattr(solver, "browser_rss"):
+            rss = await solver.browser_rss()
+            if rss is not None and rss > self.policy.max_browser_rss_mb * 1024 * 1024:
+                return f"browser_rss={rss / 1024 / 1024:.0f}MB"
+
+        return None
+
+    def process_rss_exceeded(self) -> bool:
+        if not self.policy.max_process_rss_mb:
+            return False
+        rss = rss_of()
+        return rss is not None and rss > self.policy.max_process_rss_mb * 1024 * 1024
+
+    def on_recycled(self, reason: str):
+        self.recycled += 1
+        logger.info(f"Recycled solver worker - {reason=} total={self.recycled}")
+        release_process_memory()
+
+
+def release_process_memory():
+    """Drop the state a long-running process accumulates between solves"""
+    with suppress(Exception):
+        plt.close("all")
+    gc.collect()
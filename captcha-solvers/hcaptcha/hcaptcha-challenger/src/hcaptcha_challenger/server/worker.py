@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Dict
+
+from loguru import logger
+from playwright.async_api import Browser, CDPSession, Playwright, async_playwright
+
+from hcaptcha_challenger.agent.challenger import AgentConfig, AgentV
+from hcaptcha_challenger.models import ChallengeSignal
+from hcaptcha_challenger.server.jobs import SolveRequest, SolveResult
+from hcaptcha_challenger.server.proxies import ContextPool, ProxyHealth
+from hcaptcha_challenger.server.supervisor import total_rss_of
+from hcaptcha_challenger.tracing import configure_file_tracing, span
+from hcaptcha_challenger.utils import Deadline
+
+
+class BrowserSolver:
+    """
+    Solves jobs in a browser launched once per worker.
+
+    Every job runs in a context of its proxy taken from a `ContextPool` on the warm browser,
+    reset between jobs. Reasoners and the Gemini client are shared between the agents,
+    see `_Reasoner.shared`. Solves are recorded per proxy in `proxy_health`, a job that
+    failed on a network error or a timeout is held against its proxy. A cancelled job closes
+    its context, whatever state the page was left in, and is not held against its proxy.
+
+    Args:
+        agent_config: Configuration of every agent created by this solver
+        headless: Launch the browser headless
+        launch_options: Extra `chromium.launch` options
+        proxy_health: Per-proxy statistics shared by the workers, `ProxyHealth.shared()` by default
+        max_idle_contexts: Warm contexts kept between jobs, 0 for a fresh context per job
+        context_idle_ttl: Seconds a warm context is kept without a job of its proxy
+    """
+
+    def __init__(
+        self,
+        agent_config: AgentConfig | None = None,
+        *,
+        headless: bool = True,
+        launch_options: Dict[str, Any] | None = None,
+        proxy_health: ProxyHealth | None = None,
+        max_idle_contexts: int = 2,
+        context_idle_ttl: float = 300,
+    ):
+        self.agent_config = agent_config or AgentConfig()
+        if self.agent_config.TRACE_EXPORT_PATH:
+            configure_file_tracing(self.agent_config.TRACE_EXPORT_PATH)
+        self.headless = headless
+        self.launch_options = launch_options or {}
+        self.proxy_health = proxy_health or ProxyHealth.shared()
+        self.max_idle_contexts = max_idle_contexts
+        self.context_idle_ttl = context_idle_ttl
+
+        self._playwright: Playwright | None = None
+        self._browser: Browser | None = None
+        self._cdp_session: CDPSession | None = None
+        self.contexts: ContextPool | None = None
+
+        self.solves = 0
+
+    @classmethod
+    async def create(cls, *args, **kwargs) -> BrowserSolver:
+        solver = cls(*args, **kwargs)
+        await solver.start()
+        return solver
+
+    async def start(self):
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(
+            headless=self.headless, **self.launch_options
+        )
+        self.contexts = ContextPool(
+            self._browser, max_idle=self.max_idle_contexts, idle_ttl=self.context_idle_ttl
+        )
+
+    async def close(self):
+        if self.contexts:
+            await self.contexts.close()
+        if self._browser:
+            await self._browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+        self._browser = self._playwright = self._cdp_session = self.contexts = None
+
+    async def browser_rss(self) -> int | None:
+        """Memory of the browser, renderer and GPU processes in bytes, Chromium only"""
+        try:
+            if self._cdp_session is None:
+                self._cdp_session = await self._browser.new_browser_cdp_session()
+            info = await self._cdp_session.send("SystemInfo.getProcessInfo")
+        except Exception as err:
+            logger.debug(f"Browser memory is not available - {err=}")
+            return None
+        return total_rss_of(process["id"] for process in info.get("processInfo", []))
+
+    async def solve(self, request: SolveRequest, deadline: Deadline) -> SolveResult:
+        self.solves += 1
+        with span("solver.job", url=request.website_url) as job_span:
+            context = await self.contexts.acquire(request.proxy)
+            started, token, reusable, cancelled = time.monotonic(), None, False, False
+            error: Exception | None = None
+            try:
+                page = await context.new_page()
+                agent = AgentV(page=page, agent_config=self.agent_config)
+
+                with span("page.goto", url=request.website_url):
+                    await page.goto(request.website_url, timeout=deadline.cap_ms(30000))
+                await agent.robotic_arm.click_checkbox()
+                signal = await agent.wait_for_challenge(deadline=deadline)
+                job_span.set_attribute("signal", signal.value)
+
+                if signal == ChallengeSignal.SUCCESS and agent.cr_list:
+                    cr = agent.cr_list[-1]
+                    token = cr.generated_pass_UUID or None
+                # A context that went through the whole solve is sane enough to reuse
+                reusable = True
+                logger.debug(f"Solver job finished - url={request.website_url} {signal=}")
+                return SolveResult(token=token, signal=signal.value)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            except Exception as err:
+                error = err
+                raise
+            finally:
+                if not cancelled:
+                    self.proxy_health.record(
+                        request.proxy,
+                        success=token is not None,
+                        duration=time.monotonic() - started,
+                        error=error,
+                    )
+                await self.contexts.release(context, request.proxy, reuse=reusable)
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import itertools
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Literal, Tuple
+
+import httpx
+from google.genai import types
+from loguru import logger
+
+CassetteMode = Literal["record", "replay"]
+
+# Canonical statuses of the Google API error body, by HTTP status
+_ERROR_STATUSES = {
+    400: "INVALID_ARGUMENT",
+    403: "PERMISSION_DENIED",
+    404: "NOT_FOUND",
+    429: "RESOURCE_EXHAUSTED",
+    500: "INTERNAL",
+    503: "UNAVAILABLE",
+    504: "DEADLINE_EXCEEDED",
+}
+
+# Headers that no longer describe a response once httpx has read and decoded its body
+_STALE_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class CassetteMiss(LookupError):
+    """A generate request without a recorded response"""
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class GeminiCassette(httpx.AsyncBaseTransport):
+    """
+    Record and replay the Gemini requests of the reasoners, below the `genai` client.
+
+    In `record` mode requests go to the real endpoint and every successful generate
+    response is written to `root/<model>/<prompt hash>_<image hash>.json`. The prompt
+    hash covers the request body with the uploaded file URIs left out (instructions,
+    prompts, response schema, generation config), the image hash the bytes of the
+    uploaded images, so a fixture is found again whatever URI the upload got.
+
+    In `replay` mode nothing leaves the process: uploads are answered locally, generate
+    requests from the fixtures, after `latency` seconds. `faults` is consumed once per
+    generate request, a status code answers that request with the Google error body of
+    the status instead, e.g. `[429, 500]` fails the first two requests and replays the rest.
+
+    Point the reasoners at it with `configure_genai_client(cassette.http_options)`.
+
+    Args:
+        root: Directory of the fixtures
+        mode: `record` or `replay`
+        latency: Seconds before a replayed response, or a callable returning them
+        faults: Status codes to answer generate requests with, `None` replays the fixture
+        base_url: Endpoint to record from, the Gemini API by default
+    """
+
+    def __init__(
+        self,
+        root: Path | str,
+        *,
+        mode: CassetteMode = "replay",
+        latency: float | Callable[[], float] = 0,
+        faults: Iterable[int | None] = (),
+        base_url: str | None = None,
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.root = Path(root)
+        self.mode = mode
+        self.latency = latency
+        self.base_url = base_url
+
+        self._faults: Iterator[int | None] = iter(faults)
+        # Image hash of every file uploaded through the cassette, by file URI
+        self._files: Dict[str, str] = {}
+        self._upload_ids = itertools.count(1)
+
+        self.recorded = 0
+        self.replayed = 0
+        self.faulted = 0
+
+    @property
+    def http_options(self) -> types.HttpOptions:
+        # A custom transport also makes the client use httpx rather than aiohttp
+        return types.HttpOptions(base_url=self.base_url, async_client_args={"transport": self})
+
+    def fixture_path(self, model: str, body: Dict[str, Any]) -> Path:
+        prompt_hash, image_hash = self._key_of(body)
+        return self.root.joinpath(model, f"{prompt_hash[:16]}_{image_hash[:16]}.json")
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        content = await request.aread()
+        path = request.url.path
+
+        if path.endswith(":generateContent"):
+            model = path.rsplit("/", 1)[-1].split(":", 1)[0]
+            body = json.loads(content or b"{}")
+            if self.mode == "record":
+                return await self._record(request, model, body)
+            return await self._replay(request, model, body)
+
+        command = request.headers.get("X-Goog-Upload-Command", "")
+        if self.mode == "record":
+            response = await self._forward(request)
+            if "finalize" in command and response.is_success:
+                uri = response.json().get("file", {}).get("uri")
+                if uri:
+                    self._files[uri] = _sha256(content)
+            return response
+
+        if command == "start":
+            upload_id = f"replay-{next(self._upload_ids)}"
+            upload_url = f"{self._origin(request)}/upload/v1beta/files?upload_id={upload_id}"
+            return httpx.Response(
+                200, headers={"X-Goog-Upload-URL": upload_url}, json={}, request=request
+            )
+        if "finalize" in command:
+            return self._replayed_upload(request, content)
+
+        raise CassetteMiss(f"The cassette does not replay {request.method} {request.url}")
+
+    async def _forward(self, request: httpx.Request) -> httpx.Response:
+        # A transport per request: recording is not on a hot path, and a pool would be
+        # bound to the event loop it was first used on
+        async with httpx.AsyncHTTPTransport() as upstream:
+            response = await upstream.handle_async_request(request)
+            try:
+                content = await response.aread()
+            finally:
+                await response.aclose()
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _STALE_HEADERS]
+        return httpx.Response(
+            response.status_code, headers=headers, content=content, request=request
+        )
+
+    def _replayed_upload(self, request: httpx.Request, content: bytes) -> httpx.Response:
+        image_hash = _sha256(content)
+        name = f"files/{image_hash[:16]}"
+        uri = f"{self._origin(request)}/v1beta/{name}"
+        self._files[uri] = image_hash
+        file = {
+            "name": name,
+            "uri": uri,
+            "mimeType": request.headers.get("X-Goog-Upload-Header-Content-Type", "image/png"),
+            "sizeBytes": str(len(content)),
+            "state": "ACTIVE",
+        }
+        return httpx.Response(
+            200, headers={"X-Goog-Upload-Status": "final"}, json={"file": file}, request=request
+        )
+
+    async def _record(
+        self, request: httpx.Request, model: str, body: Dict[str, Any]
+    ) -> httpx.Response:
+        response = await self._forward(request)
+        if not response.is_success:
+            logger.warning(f"Not recording a failed response - {model=} {response.status_code=}")
+            return response
+
+        path = self.fixture_path(model, body)
+        prompt_hash, image_hash = self._key_of(body)
+        fixture = {
+            "model": model,
+            "prompt_sha256": prompt_hash,
+            "image_sha256": image_hash,
+            "request": self._without_uris(body),
+            "response": {"status_code": response.status_code, "body": response.json()},
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(fixture, indent=2, ensure_ascii=False), encoding="utf8")
+        self.recorded += 1
+        logger.debug(f"Recorded a Gemini response - path={path}")
+        return response
+
+    async def _replay(
+        self, request: httpx.Request, model: str, body: Dict[str, Any]
+    ) -> httpx.Response:
+        delay = self.latency() if callable(self.latency) else self.latency
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if status := next(self._faults, None):
+            self.faulted += 1
+            error = {
+                "code": status,
+                "message": f"Injected by the Gemini cassette ({status})",
+                "status": _ERROR_STATUSES.get(status, "UNKNOWN"),
+            }
+            return httpx.Response(status, json={"error": error}, request=request)
+
+        path = self.fixture_path(model, body)
+        if not path.is_file():
+            raise CassetteMiss(f"No recorded response for this request - {model=} path={path}")
+        recorded = json.loads(path.read_text(encoding="utf8"))["response"]
+        self.replayed += 1
+        return httpx.Response(recorded["status_code"], json=recorded["body"], request=request)
+
+    @staticmethod
+    def _origin(request: httpx.Request) -> str:
+        return f"{request.url.scheme}://{request.url.netloc.decode()}"
+
+    def _image_hashes(self, body: Dict[str, Any]) -> List[str]:
+        hashes = []
+        for content in body.get("contents") or []:
+            for part in content.get("parts") or []:
+                if uri := (part.get("fileData") or {}).get("fileUri"):
+                    hashes.append(self._files.get(uri, uri))
+                elif data := (part.get("inlineData") or {}).get("data"):
+                    hashes.append(_sha256(data.encode()))
+        return hashes
+
+    def _without_uris(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        body = json.loads(json.dumps(body))
+        for content in body.get("contents") or []:
+            for part in content.get("parts") or []:
+                if "fileData" in part:
+                    part["fileData"]["fileUri"] = ""
+                if "inlineData" in part:
+                    part["inlineData"]["data"] = ""
+        return body
+
+    def _key_of(self, body: Dict[str, Any]) -> Tuple[str, str]:
+        prompt = json.dumps(self._without_uris(body), sort_keys=True, ensure_ascii=False)
+        images = "\n".join(self._image_hashes(body))
+        return _sha256(prompt.encode()), _sha256(images.encode())
@@ -1,11 +1,6 @@
-import os
-from pathlib import Path
-from typing import Union
-
-from google import genai
 from google.genai import types
 from loguru import logger
-from tenacity import retry, stop_after_attempt, wait_fixed
+from tenacity import retry, stop_after_attempt
 
 from hcaptcha_challenger.models import (
     FastShotModelType,
@@ -13,7 +8,15 @@ from hcaptcha_challenger.models import (
     ChallengeTypeEnum,
     DEFAULT_FAST_SHOT_MODEL,
 )
-from hcaptcha_challenger.tools.common import extract_first_json_block
+from hcaptcha_challenger.tools.common import (
+    extract_first_json_block,
+    upload_image,
+    ImageSource,
+    traced_invoke,
+    within_deadline,
+    stop_before_deadline,
+    wait_within_deadline,
+)
 from hcaptcha_challenger.tools.reasoner import _Reasoner
 
 CHALLENGE_CLASSIFIER_INSTRUCTIONS = """
@@ -67,25 +70,25 @@ class ChallengeClassifier(_Reasoner[FastShotModelType]):
     def __init__(self, gemini_api_key: str, model: FastShotModelType = DEFAULT_FAST_SHOT_MODEL):
         super().__init__(gemini_api_key, model)
 
+    @traced_invoke
     @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_fixed(3),
+        stop=stop_after_attempt(3) | stop_before_deadline(3),
+        wait=wait_within_deadline(3),
         before_sleep=lambda retry_state: logger.warning(
-            f"Retry request ({retry_state.attempt_number}/2) - Wait 3 seconds - Exception: {retry_state.outcome.exception()}"
+            f"Retry request ({retry_state.attempt_number}/2) - Wait {retry_state.next_action.sleep:.1f} seconds - Exception: {retry_state.outcome.exception()}"
         ),
     )
-    async def invoke_async(
-        self, challenge_screenshot: Union[str, Path, os.PathLike], **kwargs
-    ) -> ChallengeTypeEnum:
+    @within_deadline
+    async def invoke_async(self, challenge_screenshot: ImageSource, **kwargs) -> ChallengeTypeEnum:
         model_to_use = kwargs.pop("model", self._model)
         if model_to_use is None:
             raise ValueError("Model must be provided either at initialization or via kwargs.")
 
         # Initialize Gemini client with API key
-        client = genai.Client(api_key=self._api_key)
+        client = self._get_client()
 
         # Upload the challenge image file
-        files = [await client.aio.files.upload(file=challenge_screenshot)]
+        files = [await upload_image(client, challenge_screenshot)]
 
         # Handle models that don't support JSON response schema
         if model_to_use in ["gemini-2.0-flash-thinking-exp-01-21"]:
@@ -136,25 +139,27 @@ class ChallengeRouter(_Reasoner[FastShotModelType]):
     def __init__(self, gemini_api_key: str, model: FastShotModelType = DEFAULT_FAST_SHOT_MODEL):
         super().__init__(gemini_api_key, model)
 
+    @traced_invoke
     @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_fixed(3),
+        stop=stop_after_attempt(3) | stop_before_deadline(3),
+        wait=wait_within_deadline(3),
         before_sleep=lambda retry_state: logger.warning(
-            f"Retry request ({retry_state.attempt_number}/2) - Wait 3 seconds - Exception: {retry_state.outcome.exception()}"
+            f"Retry request ({retry_state.attempt_number}/2) - Wait {retry_state.next_action.sleep:.1f} seconds - Exception: {retry_state.outcome.exception()}"
         ),
     )
+    @within_deadline
     async def invoke_async(
-        self, challenge_screenshot: Union[str, Path, os.PathLike], **kwargs
+        self, challenge_screenshot: ImageSource, **kwargs
     ) -> ChallengeRouterResult:
         model_to_use = kwargs.pop("model", self._model)
         if model_to_use is None:
             raise ValueError("Model must be provided either at initialization or via kwargs.")
 
         # Initialize Gemini client with API_KEY
-        client = genai.Client(api_key=self._api_key)
+        client = self._get_client()
 
         # Upload the challenge image file
-        files = [await client.aio.files.upload(file=challenge_screenshot)]
+        files = [await upload_image(client, challenge_screenshot)]
 
         # Handle models that support JSON response schema
         parts = [
@@ -1,12 +1,38 @@
 import asyncio
+import contextlib
+import functools
+import io
 import json
+import os
 import re
-from typing import List, Any, Coroutine, TypeVar
+import time
+import weakref
+from pathlib import Path
+from typing import List, Any, Coroutine, TypeVar, Union, Dict, Callable
 
+from google import genai
+from google.genai import types
 from loguru import logger
+from tenacity import RetryCallState
+
+from hcaptcha_challenger.tracing import current_span, span
+from hcaptcha_challenger.utils import Deadline
 
 T = TypeVar("T")
 
+ImageSource = Union[str, Path, os.PathLike, bytes]
+
+# Called with the duration of every reasoner attempt and its error, None if it succeeded
+ReasonerListener = Callable[[float, Union[Exception, None]], None]
+
+_reasoner_listeners: List[ReasonerListener] = []
+
+_genai_http_options: types.HttpOptions | None = None
+
+_genai_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, genai.Client]] = (
+    weakref.WeakKeyDictionary()
+)
+
 
 def run_sync(coro: Coroutine[Any, Any, T]) -> T:
     """
@@ -38,6 +64,168 @@ def run_sync(coro: Coroutine[Any, Any, T]) -> T:
     return future.result()
 
 
+def traced_invoke(
+    func: Callable[..., Coroutine[Any, Any, T]],
+) -> Callable[..., Coroutine[Any, Any, T]]:
+    """
+    Trace a reasoner's `invoke_async`, including all of its retries.
+
+    Place it above `@retry`, every attempt is recorded by `within_deadline` as a child span.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs) -> T:
+        model = kwargs.get("model", getattr(self, "_model", None))
+        with span("reasoner.invoke", reasoner=type(self).__name__, model=str(model)):
+            return await func(self, *args, **kwargs)
+
+    return wrapper
+
+
+def within_deadline(
+    func: Callable[..., Coroutine[Any, Any, T]],
+) -> Callable[..., Coroutine[Any, Any, T]]:
+    """
+    Bound one attempt of `invoke_async` by its `deadline` keyword argument.
+
+    Uploads and the generate request are cancelled together once the budget is spent.
+    Place it below `@retry`, so that the retry policy can still read the deadline.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args, deadline: Deadline | None = None, **kwargs) -> T:
+        reasoner = args[0] if args and hasattr(args[0], "_response_var") else None
+        attempt = current_span().increment("retry.attempts")
+        with span("reasoner.attempt", attempt=attempt) as attempt_span:
+            started = time.perf_counter()
+            try:
+                result = await _bounded(reasoner, deadline, *args, **kwargs)
+            except Exception as err:
+                _notify_reasoner_listeners(time.perf_counter() - started, err)
+                raise
+            _notify_reasoner_listeners(time.perf_counter() - started, None)
+            if reasoner is not None:
+                _record_usage(attempt_span, reasoner._response)
+            return result
+
+    async def _bounded(reasoner, deadline: Deadline | None, *args, **kwargs) -> T:
+        if deadline is None or deadline.remaining is None:
+            return await func(*args, **kwargs)
+        if deadline.expired:
+            raise TimeoutError("The deadline was exceeded before the request was sent")
+
+        # Before Python 3.12, `wait_for` runs the attempt in a task of its own, so the
+        # reasoner's task-local response is handed back to the caller's context
+        async def _attempt():
+            result = await func(*args, **kwargs)
+            return result, reasoner._response if reasoner else None
+
+        result, response = await asyncio.wait_for(_attempt(), timeout=deadline.remaining)
+        if reasoner is not None:
+            reasoner._response = response
+        return result
+
+    return wrapper
+
+
+def add_reasoner_listener(listener: ReasonerListener):
+    """Observe every reasoner attempt of the process, e.g. its latency and 429 answers"""
+    _reasoner_listeners.append(listener)
+
+
+def remove_reasoner_listener(listener: ReasonerListener):
+    with contextlib.suppress(ValueError):
+        _reasoner_listeners.remove(listener)
+
+
+def _notify_reasoner_listeners(duration: float, error: Exception | None):
+    for listener in list(_reasoner_listeners):
+        try:
+            listener(duration, error)
+        except Exception as err:
+            logger.debug(f"Reasoner listener failed - {err=}")
+
+
+def _record_usage(attempt_span, response):
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    attempt_span.set_attributes(
+        **{
+            "gen_ai.response.model": getattr(response, "model_version", None),
+            "gen_ai.usage.input_tokens": usage.prompt_token_count,
+            "gen_ai.usage.output_tokens": usage.candidates_token_count,
+        }
+    )
+
+
+def _deadline_of(retry_state: RetryCallState) -> Deadline | None:
+    deadline = retry_state.kwargs.get("deadline")
+    return deadline if isinstance(deadline, Deadline) else None
+
+
+def stop_before_deadline(reserve: float) -> Callable[[RetryCallState], bool]:
+    """tenacity stop: give up when less than `reserve` seconds of the caller's deadline are left"""
+
+    def _stop(retry_state: RetryCallState) -> bool:
+        deadline = _deadline_of(retry_state)
+        return deadline is not None and deadline.cap(reserve) < reserve
+
+    return _stop
+
+
+def wait_within_deadline(seconds: float) -> Callable[[RetryCallState], float]:
+    """tenacity wait: a fixed wait, shortened to the caller's remaining budget"""
+
+    def _wait(retry_state: RetryCallState) -> float:
+        deadline = _deadline_of(retry_state)
+        return deadline.cap(seconds) if deadline else seconds
+
+    return _wait
+
+
+def configure_genai_client(http_options: types.HttpOptions | None):
+    """
+    Set the HTTP options of the Gemini clients created from now on, e.g. the `base_url`
+    of a gateway, or of the mock endpoint of the offline bench.
+    """
+    global _genai_http_options
+    _genai_http_options = http_options
+    _genai_clients.clear()
+
+
+def get_genai_client(api_key: str) -> genai.Client:
+    """
+    Return the `genai.Client` shared by every reasoner using `api_key` on the running event loop.
+
+    The async transport keeps a connection pool bound to the loop it runs on,
+    so clients are shared per loop rather than per process.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return genai.Client(api_key=api_key, http_options=_genai_http_options)
+
+    clients = _genai_clients.setdefault(loop, {})
+    if api_key not in clients:
+        clients[api_key] = genai.Client(api_key=api_key, http_options=_genai_http_options)
+    return clients[api_key]
+
+
+async def upload_image(client: genai.Client, image: ImageSource, mime_type: str = "image/png"):
+    """
+    Upload an image from disk or from memory.
+
+    In-memory screenshots skip the round-trip through the local disk, the agent persists them
+    in the background for the dataset.
+    """
+    if isinstance(image, (bytes, bytearray)):
+        return await client.aio.files.upload(
+            file=io.BytesIO(image), config=types.UploadFileConfig(mime_type=mime_type)
+        )
+    return await client.aio.files.upload(file=image)
+
+
 def extract_json_blocks(text: str) -> List[str]:
     """
     Extract the contents of JSON code blocks surrounded by ```json and ``` from the text.
@@ -1,16 +1,22 @@
 import json
+import threading
 from abc import abstractmethod, ABC
+from contextvars import ContextVar
 from pathlib import Path
-from typing import TypeVar, Generic
+from typing import TypeVar, Generic, Dict, Tuple, Any
 
+from google import genai
 from loguru import logger
 
-from hcaptcha_challenger.tools.common import run_sync
+from hcaptcha_challenger.tools.common import run_sync, get_genai_client
 
 M = TypeVar("M")
+R = TypeVar("R", bound="_Reasoner")
 
 
 class _Reasoner(ABC, Generic[M]):
+    _shared_instances: Dict[Tuple[Any, ...], "_Reasoner"] = {}
+    _shared_lock = threading.Lock()
 
     def __init__(
         self, gemini_api_key: str, model: M | None = None, constraint_response_schema: bool = False
@@ -18,15 +24,46 @@ class _Reasoner(ABC, Generic[M]):
         self._api_key: str = gemini_api_key
         self._model: M | None = model
         self._constraint_response_schema = constraint_response_schema
-        self._response = None
+
+        # The latest response is tracked per task, so one instance can serve many pages at once
+        self._response_var: ContextVar[Any] = ContextVar(
+            f"{type(self).__name__}_response", default=None
+        )
+
+    @classmethod
+    def shared(cls: type[R], gemini_api_key: str, **kwargs) -> R:
+        """
+        Return the process-scoped instance for this configuration.
+
+        Reasoners hold no per-challenge state, every `AgentV` of the process can use the same one.
+        """
+        key = (cls, gemini_api_key, tuple(sorted(kwargs.items())))
+        with cls._shared_lock:
+            if key not in cls._shared_instances:
+                cls._shared_instances[key] = cls(gemini_api_key, **kwargs)
+            return cls._shared_instances[key]
+
+    @property
+    def _response(self):
+        return self._response_var.get()
+
+    @_response.setter
+    def _response(self, value):
+        self._response_var.set(value)
+
+    def _get_client(self) -> genai.Client:
+        return get_genai_client(self._api_key)
+
+    def dump_response(self) -> str | None:
+        """The latest response as pretty-printed JSON, None if nothing was answered yet"""
+        if self._response is None:
+            return None
+        return json.dumps(self._response.model_dump(mode="json"), indent=2, ensure_ascii=False)
 
     def cache_response(self, path: Path):
         try:
             path.parent.mkdir(parents=True, exist_ok=True)
-            path.write_text(
-                json.dumps(self._response.model_dump(mode="json"), indent=2, ensure_ascii=False),
-                encoding="utf-8",
-            )
+            path.write_text(self.dump_response(), encoding="utf-8")
         except Exception as e:
             logger.warning(e)
 
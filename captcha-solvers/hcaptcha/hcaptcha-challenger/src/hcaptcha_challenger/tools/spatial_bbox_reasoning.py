@@ -1,15 +1,19 @@
 import asyncio
-import os
-from pathlib import Path
-from typing import Union
 
-from google import genai
 from google.genai import types
 from loguru import logger
-from tenacity import retry, stop_after_attempt, wait_fixed
+from tenacity import retry, stop_after_attempt
 
 from hcaptcha_challenger.models import SCoTModelType, ImageBboxChallenge, DEFAULT_SCOT_MODEL
-from hcaptcha_challenger.tools.common import extract_first_json_block
+from hcaptcha_challenger.tools.common import (
+    extract_first_json_block,
+    upload_image,
+    ImageSource,
+    traced_invoke,
+    within_deadline,
+    stop_before_deadline,
+    wait_within_deadline,
+)
 from hcaptcha_challenger.tools.reasoner import _Reasoner
 
 SYSTEM_INSTRUCTIONS = """
@@ -44,18 +48,20 @@ class SpatialBboxReasoner(_Reasoner[SCoTModelType]):
     ):
         super().__init__(gemini_api_key, model, constraint_response_schema)
 
+    @traced_invoke
     @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_fixed(3),
+        stop=stop_after_attempt(3) | stop_before_deadline(3),
+        wait=wait_within_deadline(3),
         before_sleep=lambda retry_state: logger.warning(
-            f"Retry request ({retry_state.attempt_number}/2) - Wait 3 seconds - Exception: {retry_state.outcome.exception()}"
+            f"Retry request ({retry_state.attempt_number}/2) - Wait {retry_state.next_action.sleep:.1f} seconds - Exception: {retry_state.outcome.exception()}"
         ),
     )
+    @within_deadline
     async def invoke_async(
         self,
-        challenge_screenshot: Union[str, Path, os.PathLike],
+        challenge_screenshot: ImageSource,
         *,
-        grid_divisions: Union[str, Path, os.PathLike],
+        grid_divisions: ImageSource,
         auxiliary_information: str | None = "",
         constraint_response_schema: bool | None = None,
         **kwargs,
@@ -73,12 +79,12 @@ class SpatialBboxReasoner(_Reasoner[SCoTModelType]):
             constraint_response_schema = enable_response_schema
 
         # Initialize Gemini client with API key
-        client = genai.Client(api_key=self._api_key)
+        client = self._get_client()
 
         # Upload the challenge image file
         files = await asyncio.gather(
-            client.aio.files.upload(file=challenge_screenshot),
-            client.aio.files.upload(file=grid_divisions),
+            upload_image(client, challenge_screenshot),
+            upload_image(client, grid_divisions),
         )
 
         # Create content with only the image
@@ -1,15 +1,28 @@
 import asyncio
-import os
 from pathlib import Path
-from typing import Union, List
+from typing import List
 
 from google import genai
 from google.genai import types
 from loguru import logger
-from tenacity import retry, stop_after_attempt, wait_fixed
-
-from hcaptcha_challenger.models import SCoTModelType, ImageDragDropChallenge, DEFAULT_SCOT_MODEL
-from hcaptcha_challenger.tools.common import extract_first_json_block
+from tenacity import retry, stop_after_attempt
+
+from hcaptcha_challenger.models import (
+    SCoTModelType,
+    ImageDragDropChallenge,
+    ImageDragDestinationChallenge,
+    PointCoordinate,
+    DEFAULT_SCOT_MODEL,
+)
+from hcaptcha_challenger.tools.common import (
+    extract_first_json_block,
+    upload_image,
+    ImageSource,
+    traced_invoke,
+    within_deadline,
+    stop_before_deadline,
+    wait_within_deadline,
+)
 from hcaptcha_challenger.tools.reasoner import _Reasoner
 
 THINKING_PROMPT = """
@@ -31,6 +44,22 @@ Finally, solve the challenge, locate the object, output the coordinates of the c
 ```
 """
 
+DESTINATION_PROMPT = """
+**Rule for 'Drag to the Correct Position' Tasks:**
+The draggable elements and their coordinates are given, only decide where each one must be dropped.
+1. Identify challenge prompt about the Challenge Image
+2. Based on the plane rectangular coordinate system, reasoning about the absolute position where each element must be dropped
+
+Output one end point per draggable element, in the given order, as json:
+
+```json
+{
+  "challenge_prompt": "Task description",
+  "end_points": [{"x": x1, "y": y1}]
+}
+```
+"""
+
 USER_PROMPT = """
 请根据教程学习规则、模式和思路，尝试解决新的 image_drag_drop challenge，最后返回正确答案的坐标。
 将右侧的拼图方块移至左侧画布上的正确位置，使得画布上的物体形状完整和连续。
@@ -39,8 +68,8 @@ USER_PROMPT = """
 
 async def draw_speculative_sampling_parts(
     client: genai.Client,
-    challenge_screenshot: Union[str, Path, os.PathLike],
-    grid_divisions: Union[str, Path, os.PathLike],
+    challenge_screenshot: ImageSource,
+    grid_divisions: ImageSource,
     auxiliary_information: str,
 ) -> List[types.Part] | None:
     scot_dir = Path(__file__).parent.joinpath("scot")
@@ -48,8 +77,8 @@ async def draw_speculative_sampling_parts(
     files = await asyncio.gather(
         client.aio.files.upload(file=scot_dir.joinpath("image_drag_drop_few_shot_001.png")),
         client.aio.files.upload(file=scot_dir.joinpath("image_drag_drop_few_shot_002.png")),
-        client.aio.files.upload(file=challenge_screenshot),
-        client.aio.files.upload(file=grid_divisions),
+        upload_image(client, challenge_screenshot),
+        upload_image(client, grid_divisions),
     )
 
     parts = [
@@ -70,14 +99,14 @@ async def draw_speculative_sampling_parts(
 
 async def draw_thoughts_parts(
     client: genai.Client,
-    challenge_screenshot: Union[str, Path, os.PathLike],
-    grid_divisions: Union[str, Path, os.PathLike],
+    challenge_screenshot: ImageSource,
+    grid_divisions: ImageSource,
     auxiliary_information: str,
 ) -> List[types.Part]:
     # Upload the challenge image file
     files = await asyncio.gather(
-        client.aio.files.upload(file=challenge_screenshot),
-        client.aio.files.upload(file=grid_divisions),
+        upload_image(client, challenge_screenshot),
+        upload_image(client, grid_divisions),
     )
 
     # Create content with only the image
@@ -91,6 +120,11 @@ async def draw_thoughts_parts(
     return parts
 
 
+def describe_start_points(start_points: List[PointCoordinate]) -> str:
+    lines = [f"{i + 1}. ({p.x}, {p.y})" for i, p in enumerate(start_points)]
+    return "Draggable elements (start points):\n" + "\n".join(lines)
+
+
 class SpatialPathReasoner(_Reasoner[SCoTModelType]):
 
     def __init__(
@@ -101,22 +135,37 @@ class SpatialPathReasoner(_Reasoner[SCoTModelType]):
     ):
         super().__init__(gemini_api_key, model, constraint_response_schema)
 
+    @traced_invoke
     @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_fixed(3),
+        stop=stop_after_attempt(3) | stop_before_deadline(3),
+        wait=wait_within_deadline(3),
         before_sleep=lambda retry_state: logger.warning(
-            f"Retry request ({retry_state.attempt_number}/2) - Wait 3 seconds - Exception: {retry_state.outcome.exception()}"
+            f"Retry request ({retry_state.attempt_number}/2) - Wait {retry_state.next_action.sleep:.1f} seconds - Exception: {retry_state.outcome.exception()}"
         ),
     )
+    @within_deadline
     async def invoke_async(
         self,
-        challenge_screenshot: Union[str, Path, os.PathLike],
+        challenge_screenshot: ImageSource,
         *,
-        grid_divisions: Union[str, Path, os.PathLike],
+        grid_divisions: ImageSource,
         auxiliary_information: str | None = "",
         constraint_response_schema: bool | None = None,
+        start_points: List[PointCoordinate] | None = None,
         **kwargs,
     ) -> ImageDragDropChallenge:
+        """
+        Args:
+            challenge_screenshot: The challenge-view screenshot
+            grid_divisions: The screenshot with the coordinate grid overlay
+            auxiliary_information: Extra user prompt
+            constraint_response_schema: Whether to enable constraint encoding
+            start_points: Known positions of the draggable elements (page coordinates).
+                When provided, the model is only asked for the destinations.
+
+        Returns:
+            ImageDragDropChallenge
+        """
         model_to_use = kwargs.pop("model", self._model)
         if model_to_use is None:
             raise ValueError("Model must be provided either at initialization or via kwargs.")
@@ -131,11 +180,22 @@ class SpatialPathReasoner(_Reasoner[SCoTModelType]):
         enable_scot = False
 
         system_instruction = THINKING_PROMPT
+        response_schema = ImageDragDropChallenge
+        if start_points:
+            system_instruction = DESTINATION_PROMPT
+            response_schema = ImageDragDestinationChallenge
+            auxiliary_information = "\n".join(
+                filter(None, [auxiliary_information, describe_start_points(start_points)])
+            )
 
         # Initialize Gemini client with API key
-        client = genai.Client(api_key=self._api_key)
+        client = self._get_client()
 
-        if enable_scot and model_to_use not in ["gemini-2.0-flash-thinking-exp-01-21"]:
+        if (
+            enable_scot
+            and not start_points
+            and model_to_use not in ["gemini-2.0-flash-thinking-exp-01-21"]
+        ):
             parts = await draw_speculative_sampling_parts(
                 client, challenge_screenshot, grid_divisions, auxiliary_information
             )
@@ -160,15 +220,27 @@ class SpatialPathReasoner(_Reasoner[SCoTModelType]):
             self._response = await client.aio.models.generate_content(
                 model=model_to_use, contents=contents, config=config
             )
-            return ImageDragDropChallenge(**extract_first_json_block(self._response.text))
+            result = response_schema(**extract_first_json_block(self._response.text))
+            return self._as_drag_drop_challenge(result, start_points)
 
         # Structured output with Constraint encoding
         config.response_mime_type = "application/json"
-        config.response_schema = ImageDragDropChallenge
+        config.response_schema = response_schema
 
         self._response = await client.aio.models.generate_content(
             model=model_to_use, contents=contents, config=config
         )
         if _result := self._response.parsed:
-            return ImageDragDropChallenge(**self._response.parsed.model_dump())
-        return ImageDragDropChallenge(**extract_first_json_block(self._response.text))
+            result = response_schema(**self._response.parsed.model_dump())
+        else:
+            result = response_schema(**extract_first_json_block(self._response.text))
+        return self._as_drag_drop_challenge(result, start_points)
+
+    @staticmethod
+    def _as_drag_drop_challenge(
+        result: ImageDragDropChallenge | ImageDragDestinationChallenge,
+        start_points: List[PointCoordinate] | None,
+    ) -> ImageDragDropChallenge:
+        if isinstance(result, ImageDragDestinationChallenge):
+            return result.to_drag_drop_challenge(start_points)
+        return result
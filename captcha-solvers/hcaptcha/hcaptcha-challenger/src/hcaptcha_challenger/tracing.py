@@ -0,0 +1,269 @@
+"""
+Lightweight tracing with the OpenTelemetry span model.
+
+Tracing is off until `configure_tracing` installs an exporter, `span` then costs one
+context variable lookup. Spans nest through a context variable, so spans opened in
+concurrent tasks are parented to the span that was current when the task was created.
+
+```python
+configure_tracing(JsonlSpanExporter("tmp/.trace/spans.jsonl"))
+
+with span("robotic_arm.crumb", crumb=0) as s:
+    s.set_attribute("model", "gemini-2.5-flash")
+```
+"""
+
+from __future__ import annotations
+
+import atexit
+import functools
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Coroutine, Dict, Iterator, List, Protocol, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+
+class Span:
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_span_id",
+        "start_time_unix_nano",
+        "end_time_unix_nano",
+        "attributes",
+        "status",
+    )
+
+    def __init__(self, name: str, parent: Span | None, attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent.span_id if parent else None
+        self.start_time_unix_nano = time.time_ns()
+        self.end_time_unix_nano: int | None = None
+        self.attributes = attributes
+        self.status = "OK"
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def increment(self, key: str) -> int:
+        """Count occurrences, e.g. retry attempts of the operation this span covers"""
+        self.attributes[key] = self.attributes.get(key, 0) + 1
+        return self.attributes[key]
+
+    def record_exception(self, err: BaseException):
+        self.status = "ERROR"
+        self.attributes["exception.type"] = type(err).__name__
+        self.attributes["exception.message"] = str(err)
+
+    @property
+    def duration_ms(self) -> float | None:
+        if self.end_time_unix_nano is None:
+            return None
+        return (self.end_time_unix_nano - self.start_time_unix_nano) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "start_time_unix_nano": self.start_time_unix_nano,
+            "end_time_unix_nano": self.end_time_unix_nano,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Returned while tracing is off, accepts and drops everything"""
+
+    def set_attribute(self, key: str, value: Any):
+        return
+
+    def set_attributes(self, **attributes: Any):
+        return
+
+    def increment(self, key: str) -> int:
+        return 0
+
+    def record_exception(self, err: BaseException):
+        return
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter(Protocol):
+    def export(self, span: Span): ...
+
+    def close(self): ...
+
+
+_STOP = object()
+
+
+class JsonlSpanExporter:
+    """
+    Append finished spans to a JSON Lines file, one span per line.
+
+    `export` only enqueues the span, a background thread serializes and appends the pending
+    spans in batches, so tracing adds no disk I/O to the event loop. When `maxsize` spans are
+    pending, the caller writes inline instead of growing the queue.
+    """
+
+    def __init__(self, path: Path | str, *, maxsize: int = 4096):
+        self.path = Path(path)
+        self._queue: queue.Queue = queue.Queue(maxsize=max(maxsize, 1))
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._fp_lock = threading.Lock()
+        self._fp = None
+
+    def export(self, span: Span):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="hcaptcha-span-exporter", daemon=True
+                )
+                self._thread.start()
+            try:
+                self._queue.put_nowait(span)
+                return
+            except queue.Full:
+                pass
+
+        # Backpressure: the producer pays for the write instead of growing the queue
+        self._write([span])
+
+    def flush(self):
+        """Block until every pending span has been written"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self, timeout: float | None = 10):
+        """Drain the queue, stop the writer thread and close the file"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+        with self._fp_lock:
+            if self._fp is not None:
+                self._fp.close()
+                self._fp = None
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while batch[-1] is not _STOP:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write([item for item in batch if item is not _STOP])
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if batch[-1] is _STOP:
+                return
+
+    def _write(self, spans: List[Span]):
+        if not spans:
+            return
+        try:
+            lines = "".join(
+                json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n" for s in spans
+            )
+            with self._fp_lock:
+                if self._fp is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._fp = self.path.open("a", encoding="utf8")
+                self._fp.write(lines)
+                self._fp.flush()
+        except Exception as err:
+            logger.error(f"Failed to export spans - path={self.path} {err=}")
+
+
+_exporter: SpanExporter | None = None
+_current_span: ContextVar[Span | None] = ContextVar("hcaptcha_current_span", default=None)
+
+
+@atexit.register
+def _close_exporter():
+    if _exporter is not None:
+        _exporter.close()
+
+
+def configure_tracing(exporter: SpanExporter | None):
+    """Install the process-wide exporter, None turns tracing off"""
+    global _exporter
+    previous, _exporter = _exporter, exporter
+    if previous is not None and previous is not exporter:
+        previous.close()
+
+
+def configure_file_tracing(path: Path | str):
+    """Export spans to a JSON Lines file, keeps the current exporter if it already writes there"""
+    path = Path(path)
+    if isinstance(_exporter, JsonlSpanExporter) and _exporter.path == path:
+        return
+    configure_tracing(JsonlSpanExporter(path))
+
+
+def tracing_enabled() -> bool:
+    return _exporter is not None
+
+
+def current_span() -> Span | _NoopSpan:
+    return _current_span.get() or NOOP_SPAN
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | _NoopSpan]:
+    exporter = _exporter
+    if exporter is None:
+        yield NOOP_SPAN
+        return
+
+    current = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as err:
+        current.record_exception(err)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end_time_unix_nano = time.time_ns()
+        exporter.export(current)
+
+
+def traced(name: str):
+    """Wrap a coroutine function in a span"""
+
+    def decorator(func: Callable[..., Coroutine[Any, Any, T]]):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs) -> T:
+            with span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
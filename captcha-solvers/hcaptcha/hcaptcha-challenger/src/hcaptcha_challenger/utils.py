@@ -8,8 +8,9 @@ from __future__ import annotations
 import os
 import random
 import sys
+import time
 import uuid
-from typing import Literal
+from typing import Iterable, Literal
 
 import pytz
 from loguru import logger
@@ -91,6 +92,14 @@ def init_log(**sink_channel):
     return logger
 
 
+def percentile(values: Iterable[float], q: float) -> float | None:
+    """Nearest-rank percentile, `q` in [0, 1], None if there are no values"""
+    values = sorted(values)
+    if not values:
+        return None
+    return round(values[min(int(q * len(values)), len(values) - 1)], 3)
+
+
 class SiteKey:
     discord = "4c672d35-0701-42b2-88c3-78380b0db560"
     epic = "91e4137f-95af-4bc9-97af-cdcedce21c8c"
@@ -141,3 +150,53 @@ class SiteKey:
         ]
         k = random.choice(ks)
         return f"https://accounts.hcaptcha.com/demo?sitekey={k}"
+
+
+class Deadline:
+    """
+    The point in time a solve must be finished by, shared by every step of it.
+
+    Steps derive their own timeouts from the remaining budget instead of a fixed value,
+    so the solve fails predictably at the deadline rather than at an outer timeout.
+
+    Args:
+        timeout: Budget in seconds from now, None for no limit
+    """
+
+    def __init__(self, timeout: float | None = None):
+        self._expires_at = None if timeout is None else time.monotonic() + max(timeout, 0)
+
+    def __repr__(self):
+        return f"Deadline(remaining={self.remaining})"
+
+    @property
+    def remaining(self) -> float | None:
+        """Seconds left, None for no limit"""
+        if self._expires_at is None:
+            return None
+        return max(self._expires_at - time.monotonic(), 0)
+
+    @property
+    def expired(self) -> bool:
+        return self._expires_at is not None and time.monotonic() >= self._expires_at
+
+    def cap(self, timeout: float | None) -> float | None:
+        """Shrink a timeout in seconds to the remaining budget"""
+        remaining = self.remaining
+        if remaining is None:
+            return timeout
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
+
+    def cap_ms(self, timeout_ms: float) -> float:
+        """
+        Shrink a Playwright timeout in milliseconds to the remaining budget.
+
+        Never returns 0, which Playwright reads as "no timeout".
+        """
+        return max(self.cap(timeout_ms / 1000) * 1000, 1)
+
+    def child(self, timeout: float | None) -> Deadline:
+        """A deadline for a sub-step, never later than this one"""
+        return Deadline(self.cap(timeout))
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from hcaptcha_challenger.agent.artifact_store import ArtifactStore
+from hcaptcha_challenger.agent.artifacts import ArtifactKind, ArtifactWriter
+from hcaptcha_challenger.agent.collector import check_dataset_files
+from hcaptcha_challenger.helper.cost_calculator import calculate_model_cost, iter_model_answers
+from hcaptcha_challenger.models import CaptchaPayload
+
+
+def test_store_append_and_read(tmp_path):
+    store = ArtifactStore(tmp_path)
+    cache_key = tmp_path.joinpath("image_drag_drop", "question", "20250101", "20250101000000")
+
+    store.append(cache_key / "a_captcha.json", '{"k": 1}', kind="payload")
+    store.append(cache_key / "a_0_challenge_view.png", b"\x89PNG", kind="screenshot")
+    store.close()
+
+    records = list(ArtifactStore(tmp_path).records())
+    assert [r.name for r in records] == ["a_captcha.json", "a_0_challenge_view.png"]
+    assert records[0].group == "image_drag_drop/question/20250101/20250101000000"
+    assert store.read(records[0]) == b'{"k": 1}'
+    assert store.read(records[1]) == b"\x89PNG"
+
+    assert [r.name for r in store.records(kind="screenshot")] == ["a_0_challenge_view.png"]
+    assert list(store.groups()) == ["image_drag_drop/question/20250101/20250101000000"]
+
+    # Only the segment directory is created, no per-challenge tree
+    assert [p.name for p in tmp_path.iterdir()] == ["_segments"]
+
+
+def test_store_rotates_segments(tmp_path):
+    store = ArtifactStore(tmp_path, segment_max_bytes=256)
+    for i in range(10):
+        store.append(tmp_path / "g" / f"{i}.bin", bytes(100), kind="screenshot")
+    store.close()
+
+    records = list(store.records())
+    assert len(records) == 10
+    assert len({r.segment for r in records}) > 1
+    assert all(store.read(r) == bytes(100) for r in records)
+
+
+def test_store_discover(tmp_path):
+    ArtifactStore(tmp_path / ".challenge").append(tmp_path / ".challenge" / "x" / "y.json", "{}")
+    (tmp_path / ".cache" / "deep").mkdir(parents=True)
+
+    stores = ArtifactStore.discover(tmp_path)
+    assert [s.root for s in stores] == [tmp_path / ".challenge"]
+
+
+def test_writer_appends_to_store(tmp_path):
+    writer = ArtifactWriter(store=ArtifactStore(tmp_path))
+    writer.submit(ArtifactKind.MODEL_ANSWER, tmp_path / "c" / "c_0_model_answer.json", "{}")
+    writer.close()
+
+    (record,) = ArtifactStore(tmp_path).records(kind=ArtifactKind.MODEL_ANSWER.value)
+    assert record.name == "c_0_model_answer.json"
+
+
+def test_cost_calculator_reads_store(tmp_path):
+    answer = {
+        "model_version": "gemini-2.0-flash",
+        "usage_metadata": {"prompt_token_count": 1_000_000, "candidates_token_count": 1_000_000},
+    }
+    store = ArtifactStore(tmp_path / ".challenge")
+    for challenge in ["a", "b"]:
+        path = tmp_path / ".challenge" / challenge / f"{challenge}_0_model_answer.json"
+        store.append(path, json.dumps(answer), kind="model_answer")
+    store.close()
+
+    stats = calculate_model_cost(tmp_path, detailed=True)
+    assert stats.total_files == 2
+    assert stats.total_challenges == 2
+    assert stats.total_cost == pytest.approx(1.0)
+
+
+def test_cost_calculator_walks_loose_files_only_without_store(tmp_path):
+    answer = json.dumps({"model_version": "gemini-2.0-flash"})
+    loose_file = tmp_path / "image_drag_drop" / "a" / "a_0_model_answer.json"
+    loose_file.parent.mkdir(parents=True)
+    loose_file.write_text(answer)
+    assert [i[1] for i in iter_model_answers(tmp_path)] == [str(loose_file)]
+
+    store = ArtifactStore(tmp_path / ".challenge")
+    store.append(
+        tmp_path / ".challenge" / "b" / "b_0_model_answer.json", answer, kind="model_answer"
+    )
+    store.close()
+
+    assert len(list(iter_model_answers(tmp_path))) == 1
+    assert len(list(iter_model_answers(tmp_path, loose_files=True))) == 2
+
+
+def test_check_dataset_files():
+    cp = CaptchaPayload.model_validate(
+        {
+            "request_type": "image_label_area_select",
+            "requester_question": {"en": "question"},
+            "tasklist": [{"datapoint_uri": "https://example.com/0.png", "task_key": "0"}],
+        }
+    )
+    check_dataset_files(cp, ["x_captcha.json", "x_0_challenge_view.png", "x_0_canvas.png"])
+    with pytest.raises(ValueError):
+        check_dataset_files(cp, ["x_captcha.json", "x_0_challenge_view.png"])
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+
+from hcaptcha_challenger.agent.artifacts import ArtifactKind, ArtifactWriter, ForensicBuffer
+from hcaptcha_challenger.agent.challenger import AgentConfig
+
+
+def test_artifact_writer_write_behind(tmp_path):
+    writer = ArtifactWriter(maxsize=8)
+
+    writer.submit(ArtifactKind.SCREENSHOT, tmp_path / "a" / "view.png", b"\x89PNG")
+    writer.submit(ArtifactKind.MODEL_ANSWER, tmp_path / "a" / "answer.json", lambda: '{"ok": 1}')
+    writer.flush()
+
+    assert (tmp_path / "a" / "view.png").read_bytes() == b"\x89PNG"
+    assert json.loads((tmp_path / "a" / "answer.json").read_text()) == {"ok": 1}
+    assert writer.written == 2
+    writer.close()
+
+
+def test_artifact_writer_sampling(tmp_path):
+    writer = ArtifactWriter(sampling={"screenshot": 0, ArtifactKind.PAYLOAD: 1})
+
+    assert writer.submit(ArtifactKind.SCREENSHOT, tmp_path / "view.png", b"") is False
+    assert writer.submit(ArtifactKind.PAYLOAD, tmp_path / "payload.json", "{}") is True
+    writer.flush()
+
+    assert not (tmp_path / "view.png").exists()
+    assert (tmp_path / "payload.json").exists()
+    assert writer.skipped == 1
+    writer.close()
+
+
+def test_artifact_writer_backpressure(tmp_path):
+    gate = threading.Event()
+    writer = ArtifactWriter(maxsize=1)
+
+    def _blocked():
+        gate.wait(5)
+        return "blocked"
+
+    # The first item occupies the writer thread, the second one fills the queue
+    writer.submit(ArtifactKind.PAYLOAD, tmp_path / "0.json", _blocked)
+    while writer._queue.qsize():
+        pass
+    writer.submit(ArtifactKind.PAYLOAD, tmp_path / "1.json", "1")
+    writer.submit(ArtifactKind.PAYLOAD, tmp_path / "2.json", "2")
+
+    # The third item was written by the caller
+    assert writer.inline == 1
+    assert (tmp_path / "2.json").read_text() == "2"
+
+    gate.set()
+    writer.close()
+    assert {p.name for p in tmp_path.iterdir()} == {"0.json", "1.json", "2.json"}
+
+
+def test_artifact_writer_inline_when_disabled(tmp_path):
+    writer = ArtifactWriter(write_behind=False)
+    writer.submit(ArtifactKind.CAPTCHA_RESPONSE, tmp_path / "cr.json", "{}")
+    assert (tmp_path / "cr.json").exists()
+    assert writer.inline == 1
+
+
+def test_agent_config_artifact_sampling(monkeypatch):
+    monkeypatch.setenv("ARTIFACT_SAMPLING", '{"screenshot": 0.5}')
+    config = AgentConfig(GEMINI_API_KEY="fake")
+    assert config.ARTIFACT_SAMPLING == {ArtifactKind.SCREENSHOT: 0.5}
+
+
+def test_forensic_buffer_commit(tmp_path):
+    writer = ArtifactWriter(write_behind=False, sampling={"spatial_helper": 0})
+    buffer = ForensicBuffer(writer, capacity=2)
+
+    buffer.submit(ArtifactKind.PAYLOAD, tmp_path / "payload.json", "{}")
+    buffer.submit(ArtifactKind.SCREENSHOT, tmp_path / "view.png", b"\x89PNG")
+    buffer.submit(ArtifactKind.SPATIAL_HELPER, tmp_path / "grid.png", b"\x89PNG")
+    # Validated responses are written at once
+    buffer.submit(ArtifactKind.CAPTCHA_RESPONSE, tmp_path / "cr.json", "{}")
+    assert {p.name for p in tmp_path.iterdir()} == {"cr.json"}
+
+    # The payload does not count against the capacity, the writer still samples the others
+    assert buffer.pending == 3 and buffer.dropped == 0
+    assert buffer.commit() == 2
+    assert {p.name for p in tmp_path.iterdir()} == {"cr.json", "payload.json", "view.png"}
+    assert buffer.pending == 0
+
+
+def test_forensic_buffer_keeps_the_start_and_the_end_of_a_long_solve(tmp_path):
+    writer = ArtifactWriter(write_behind=False)
+    buffer = ForensicBuffer(writer, capacity=4)
+
+    buffer.submit(ArtifactKind.PAYLOAD, tmp_path / "payload.json", "{}")
+    for i in range(10):
+        buffer.submit(ArtifactKind.SCREENSHOT, tmp_path / f"view-{i}.png", b"\x89PNG")
+        if i == 5:
+            buffer.submit(ArtifactKind.PAYLOAD, tmp_path / "retry.json", "{}")
+
+    assert buffer.pending == 6 and buffer.dropped == 6
+    assert buffer.commit() == 6
+    assert {p.name for p in tmp_path.iterdir()} == {
+        "payload.json",
+        "retry.json",
+        "view-0.png",
+        "view-1.png",
+        "view-8.png",
+        "view-9.png",
+    }
+
+
+def test_forensic_buffer_discard(tmp_path):
+    evaluated = []
+    writer = ArtifactWriter(write_behind=False)
+    buffer = ForensicBuffer(writer)
+
+    buffer.submit(ArtifactKind.MODEL_ANSWER, tmp_path / "answer.json", lambda: evaluated.append(1))
+    assert buffer.discard() == 1
+    assert buffer.commit() == 0
+    assert not evaluated and not list(tmp_path.iterdir())
+    assert writer.inline == 0
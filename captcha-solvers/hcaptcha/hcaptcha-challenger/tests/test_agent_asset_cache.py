@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import time
+
+import pytest
+
+from hcaptcha_challenger.agent.asset_cache import AssetCache, HCAPTCHA_ASSET_PATTERN
+from hcaptcha_challenger.agent.interception import ResponseInterceptor
+
+HSW_URL = "https://newassets.hcaptcha.com/c/5e2a8d17/hsw.js"
+API_URL = "https://js.hcaptcha.com/1/api.js?render=explicit"
+
+
+class _Response:
+    def __init__(self, url: str, status: int, body: bytes = b"", headers=None):
+        self.url = url
+        self.status = status
+        self.headers = headers or {}
+        self._body = body
+
+    async def all_headers(self):
+        return self.headers
+
+    async def body(self):
+        return self._body
+
+
+class _Request:
+    method = "GET"
+
+    def __init__(self, url: str, response: _Response | None):
+        self.url = url
+        self._response = response
+
+    async def response(self):
+        return self._response
+
+
+class _Route:
+    """Records how the interceptor settled the route, the page answers with `response`"""
+
+    def __init__(self, url: str, response: _Response | None = None):
+        self.request = _Request(url, response)
+        self.settled = []
+
+    async def fallback(self):
+        self.settled.append("fallback")
+
+    async def fulfill(self, status, headers, body):
+        self.settled.append(("fulfill", status, body))
+
+    async def fetch(self, **kwargs):
+        raise AssertionError("The cache never issues requests of its own")
+
+
+def _serve(cache: AssetCache, route: _Route):
+    asyncio.run(ResponseInterceptor(None, cache)._on_asset_route(route))
+    return route.settled
+
+
+@pytest.mark.parametrize(
+    "url, accepted",
+    [
+        (HSW_URL, True),
+        (API_URL, True),
+        ("https://newassets.hcaptcha.com/captcha/v1/5e2a8d17/static/hcaptcha.html", True),
+        ("https://newassets.hcaptcha.com/captcha/v1/5e2a8d17/static/i18n/en.json", True),
+        ("https://api.hcaptcha.com/getcaptcha/a5f74b19", False),
+        ("https://imgs3.hcaptcha.com/tip/f3a7c2.png", False),
+    ],
+)
+def test_asset_pattern(url, accepted):
+    assert bool(HCAPTCHA_ASSET_PATTERN.search(url)) is accepted
+
+
+def test_versioned_asset_served_from_disk(tmp_path):
+    cache = AssetCache(tmp_path, ttl=0)
+    headers = {"content-type": "application/javascript", "set-cookie": "x"}
+
+    # A miss goes out through the browser, the cache is filled from the page's response
+    first = _Route(HSW_URL, _Response(HSW_URL, 200, b"hsw", headers))
+    assert _serve(cache, first) == ["fallback"]
+
+    assert _serve(cache, _Route(HSW_URL)) == [("fulfill", 200, b"hsw")]
+    asset = asyncio.run(cache.lookup(HSW_URL))
+    assert asset.headers == {"content-type": "application/javascript"}
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_stale_or_uncacheable_assets_are_downloaded_by_the_page(tmp_path):
+    cache = AssetCache(tmp_path, ttl=600)
+    _serve(cache, _Route(API_URL, _Response(API_URL, 200, b"api")))
+    assert _serve(cache, _Route(API_URL)) == [("fulfill", 200, b"api")]
+
+    cache.ttl = 0
+    stale = _Route(API_URL, _Response(API_URL, 200, b"api-v2"))
+    assert _serve(cache, stale) == ["fallback"]
+    cache.ttl = 600
+    asset = asyncio.run(cache.lookup(API_URL))
+    assert asyncio.run(asset.body()) == b"api-v2"
+
+    no_store = {"cache-control": "no-store"}
+    _serve(cache, _Route(HSW_URL, _Response(HSW_URL, 200, b"hsw", no_store)))
+    _serve(cache, _Route(HSW_URL.replace("5e2a8d17", "5e2a8d18"), _Response(HSW_URL, 404)))
+    assert cache.load(HSW_URL) is None
+
+
+def test_corrupted_entry_discarded(tmp_path):
+    cache = AssetCache(tmp_path)
+    cache.store(HSW_URL, {}, b"hsw")
+    body_path, _ = cache._paths(HSW_URL)
+    body_path.write_bytes(b"tampered")
+
+    assert cache.load(HSW_URL) is None
+    assert not body_path.exists()
+
+
+def test_lru_eviction(tmp_path):
+    cache = AssetCache(tmp_path, max_bytes=250)
+    for i in range(3):
+        url = f"https://newassets.hcaptcha.com/c/5e2a8d1{i}/hsw.js"
+        cache.store(url, {}, bytes(100))
+        _, meta_path = cache._paths(url)
+        os.utime(meta_path, (time.time() - 10 + i, time.time() - 10 + i))
+
+    cache.store("https://newassets.hcaptcha.com/c/5e2a8d13/hsw.js", {}, bytes(100))
+    assert cache.load("https://newassets.hcaptcha.com/c/5e2a8d10/hsw.js") is None
+    assert cache.load("https://newassets.hcaptcha.com/c/5e2a8d11/hsw.js") is None
+    assert cache.load("https://newassets.hcaptcha.com/c/5e2a8d13/hsw.js") is not None
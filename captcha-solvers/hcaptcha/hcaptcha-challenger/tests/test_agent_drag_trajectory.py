@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from hcaptcha_challenger.agent.challenger import (
+    _generate_bezier_trajectory,
+    _generate_dynamic_delays,
+    _build_drag_input_events,
+)
+
+
+def test_build_drag_input_events_order():
+    steps = 25
+    points = _generate_bezier_trajectory((10, 20), (300, 200), steps)
+    delays = _generate_dynamic_delays(steps, base_delay=15)
+
+    events = [event for event, _ in _build_drag_input_events(points, delays)]
+
+    assert len(events) == len(points) + 2
+    assert events[0]["type"] == "mousePressed"
+    assert events[-1]["type"] == "mouseReleased"
+    assert all(e["type"] == "mouseMoved" for e in events[1:-1])
+    assert (events[0]["x"], events[0]["y"]) == points[0]
+    assert (events[-1]["x"], events[-1]["y"]) == points[-1]
+    # The browser stamps the events on arrival
+    assert not any("timestamp" in e for e in events)
+
+
+def test_build_drag_input_events_keeps_pacing():
+    steps = 25
+    points = _generate_bezier_trajectory((0, 0), (100, 100), steps)
+    delays = _generate_dynamic_delays(steps, base_delay=15)
+
+    waits = [wait for _, wait in _build_drag_input_events(points, delays)]
+
+    # The moves span the same duration as the step-by-step sleeps
+    assert sum(waits[1:-2]) == pytest.approx(sum(delays[:-1]) / 1000)
+    # A short pause before releasing
+    assert 0.05 <= waits[-2] - delays[-1] / 1000 <= 0.1
+    assert waits[0] == waits[-1] == 0
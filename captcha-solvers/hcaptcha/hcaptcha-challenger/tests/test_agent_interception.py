@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pytest
+
+from hcaptcha_challenger.agent.asset_cache import HCAPTCHA_ASSET_PATTERN, AssetCache
+from hcaptcha_challenger.agent.interception import HCAPTCHA_RESPONSE_PATTERN, ResponseInterceptor
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://newassets.hcaptcha.com/c/5e2a8d1/hsw.js",
+        "https://api.hcaptcha.com/getcaptcha/a5f74b19-9e45-40e0-b45d-47ff91b7a6c2",
+        "https://api2.hcaptcha.com/getcaptcha/a5f74b19?s=00000000",
+        "https://api.hcaptcha.com/checkcaptcha/a5f74b19/E0_eyJ0eXAi",
+        "https://hcaptcha.com/getcaptcha/a5f74b19",
+    ],
+)
+def test_pattern_matches_hcaptcha_responses(url):
+    assert HCAPTCHA_RESPONSE_PATTERN.search(url)
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://example.com/getcaptcha/a5f74b19",
+        "https://hcaptcha.com.example.com/getcaptcha/a5f74b19",
+        "https://newassets.hcaptcha.com/captcha/v1/5e2a8d1/static/hcaptcha.html",
+        "https://newassets.hcaptcha.com/c/5e2a8d1/hsw.json",
+        "https://imgs3.hcaptcha.com/tip/f3a7c2.png",
+        "https://accounts.hcaptcha.com/demo?sitekey=x&next=/getcaptcha/",
+    ],
+)
+def test_pattern_skips_other_responses(url):
+    assert not HCAPTCHA_RESPONSE_PATTERN.search(url)
+
+
+class _Context:
+    def __init__(self):
+        self.routes = []
+
+    def on(self, event, callback):
+        raise AssertionError("Every response of the context would cross the driver")
+
+    async def route(self, pattern, handler):
+        self.routes.append((pattern, handler))
+
+
+class _Page:
+    def __init__(self, context):
+        self.context = context
+
+    def once(self, event, callback):
+        return
+
+
+class _Frame:
+    def __init__(self, page):
+        self.page = page
+
+
+class _Request:
+    def __init__(self, url, page):
+        self.url = url
+        self.frame = _Frame(page)
+
+    async def response(self):
+        return self
+
+
+class _Route:
+    def __init__(self, url, page):
+        self.request = _Request(url, page)
+        self.fell_back = False
+
+    async def fallback(self):
+        self.fell_back = True
+
+
+def test_interceptor_routes_only_hcaptcha_responses():
+    context = _Context()
+    page, other = _Page(context), _Page(context)
+    handled = []
+
+    async def _handler(response):
+        handled.append(response.url)
+
+    async def _main():
+        await ResponseInterceptor.attach(page, _handler)
+        [(pattern, on_route)] = context.routes
+        routes = [
+            _Route("https://api.hcaptcha.com/getcaptcha/a5f74b19", page),
+            # No handler is attached for this page
+            _Route("https://api.hcaptcha.com/getcaptcha/a5f74b19", other),
+        ]
+        for route in routes:
+            await on_route(route)
+        return pattern, routes
+
+    pattern, routes = asyncio.run(_main())
+    # The browser intercepts the hCaptcha responses only, the page still fetches them itself
+    assert pattern is HCAPTCHA_RESPONSE_PATTERN
+    assert all(route.fell_back for route in routes)
+    assert handled == ["https://api.hcaptcha.com/getcaptcha/a5f74b19"]
+
+
+def test_response_route_runs_before_the_asset_route(tmp_path):
+    context = _Context()
+
+    async def _handler(response):
+        return
+
+    async def _main():
+        await ResponseInterceptor.attach(_Page(context), _handler, AssetCache(tmp_path))
+
+    asyncio.run(_main())
+    # Playwright runs the latest route first, `hsw.js` is observed before the cache fulfills it
+    assert [pattern for pattern, _ in context.routes] == [
+        HCAPTCHA_ASSET_PATTERN,
+        HCAPTCHA_RESPONSE_PATTERN,
+    ]
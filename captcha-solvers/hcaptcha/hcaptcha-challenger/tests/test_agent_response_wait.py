@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pytest
+
+from hcaptcha_challenger.agent.challenger import AgentV
+from hcaptcha_challenger.models import CaptchaResponse
+
+
+class _Arm:
+    def __init__(self, prompts):
+        self._prompts = iter(prompts)
+
+    async def read_challenge_prompt(self):
+        return next(self._prompts, None)
+
+
+def _agent(prompts=()) -> AgentV:
+    # Only the state used by the response wait, no browser involved
+    agent = AgentV.__new__(AgentV)
+    agent.robotic_arm = _Arm(prompts)
+    agent._captcha_payload_queue = asyncio.Queue()
+    agent._captcha_response_queue = asyncio.Queue()
+    agent._fresh_payload = asyncio.Event()
+    return agent
+
+
+def test_response_arrives():
+    async def _main():
+        agent = _agent()
+        cr = CaptchaResponse.model_validate({"c": {"type": "hsw", "req": "x"}, "pass": True})
+        asyncio.get_running_loop().call_later(0.05, agent._captcha_response_queue.put_nowait, cr)
+        return await agent._wait_for_captcha_response(timeout=5)
+
+    assert asyncio.run(_main()).is_pass
+
+
+def test_fresh_payload_fails_fast():
+    async def _main():
+        agent = _agent()
+        asyncio.get_running_loop().call_later(0.05, agent._put_captcha_payload, None)
+        started = asyncio.get_running_loop().time()
+        cr = await agent._wait_for_captcha_response(timeout=30)
+        return cr, asyncio.get_running_loop().time() - started, agent._captcha_payload_queue
+
+    cr, elapsed, payload_queue = asyncio.run(_main())
+    assert cr is None
+    assert elapsed < 1
+    # The next attempt still consumes the new payload
+    assert payload_queue.qsize() == 1
+
+
+def test_new_prompt_fails_fast():
+    async def _main():
+        agent = _agent(["select the cats", "select the cats", "select the dogs"])
+        return await agent._wait_for_captcha_response(timeout=10)
+
+    assert asyncio.run(_main()) is None
+
+
+def test_response_timeout():
+    async def _main():
+        agent = _agent(["select the cats"] * 10)
+        await agent._wait_for_captcha_response(timeout=0.2)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(_main())
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+from pathlib import Path
+
+from hcaptcha_challenger.agent.validator import (
+    CanvasGeometry,
+    validate_area_select_answer,
+    validate_drag_drop_answer,
+)
+from hcaptcha_challenger.models import (
+    CaptchaPayload,
+    CaptchaRequestConfig,
+    ImageAreaSelectChallenge,
+    ImageDragDropChallenge,
+)
+
+JOBS_DIR = Path(__file__).parent.parent.joinpath("examples/jobs")
+
+BBOX = {"x": 100, "y": 50, "width": 500, "height": 430}
+CANVAS = CanvasGeometry(bbox=BBOX, natural_width=500, natural_height=430)
+
+
+def _area_select(*points):
+    return ImageAreaSelectChallenge(
+        challenge_prompt="click", points=[{"x": x, "y": y} for x, y in points]
+    )
+
+
+def _drag_drop(*paths):
+    return ImageDragDropChallenge(
+        challenge_prompt="drag",
+        paths=[
+            {"start_point": {"x": sx, "y": sy}, "end_point": {"x": ex, "y": ey}}
+            for (sx, sy), (ex, ey) in paths
+        ],
+    )
+
+
+def test_area_select_valid():
+    cp = CaptchaPayload.model_validate_json(
+        JOBS_DIR.joinpath("image_label_area_select.json").read_bytes()
+    )
+    answer = _area_select((300, 200))
+    assert validate_area_select_answer(answer, canvas=BBOX, request_config=cp.request_config) == []
+
+
+def test_area_select_point_count():
+    cp = CaptchaPayload.model_validate_json(
+        JOBS_DIR.joinpath("image_label_area_select.json").read_bytes()
+    )
+    problems = validate_area_select_answer(
+        _area_select((300, 200), (310, 210)), canvas=BBOX, request_config=cp.request_config
+    )
+    assert len(problems) == 1
+
+    assert validate_area_select_answer(_area_select(), canvas=BBOX)
+
+
+def test_area_select_outside_canvas():
+    problems = validate_area_select_answer(_area_select((20, 200)), canvas=CANVAS)
+    assert problems and "outside the canvas" in problems[0]
+
+
+def test_area_select_restrict_to_coords():
+    config = CaptchaRequestConfig(version=0, restrict_to_coords=[[0, 0, 100, 100]])
+    assert (
+        validate_area_select_answer(_area_select((150, 100)), canvas=CANVAS, request_config=config)
+        == []
+    )
+    assert validate_area_select_answer(
+        _area_select((400, 300)), canvas=CANVAS, request_config=config
+    )
+
+
+def test_drag_drop_entities():
+    cp = CaptchaPayload.model_validate_json(JOBS_DIR.joinpath("image_drag_drop.json").read_bytes())
+    task = cp.tasklist[0]
+    canvas = CanvasGeometry(bbox=BBOX, natural_width=600, natural_height=430)
+
+    entity = canvas.entity_rect(task.entities[0])
+    center = (int(entity["x"] + entity["width"] / 2), int(entity["y"] + entity["height"] / 2))
+
+    assert (
+        validate_drag_drop_answer(_drag_drop((center, (250, 250))), canvas=canvas, task=task) == []
+    )
+
+    # Starts on empty space
+    problems = validate_drag_drop_answer(
+        _drag_drop(((150, 400), (250, 250))), canvas=canvas, task=task
+    )
+    assert problems and "does not hit" in problems[0]
+
+    # Wrong path count
+    problems = validate_drag_drop_answer(
+        _drag_drop((center, (250, 250)), (center, (300, 300))), canvas=canvas, task=task
+    )
+    assert any("Expected 1 paths" in p for p in problems)
+
+
+def test_drag_drop_outside_canvas():
+    problems = validate_drag_drop_answer(_drag_drop(((300, 200), (900, 250))), canvas=BBOX)
+    assert problems == ["End point (900, 250) is outside the canvas"]
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import asyncio
+from pathlib import Path
+
+import httpx
+import pytest
+
+from hcaptcha_challenger.bench import BenchReport, MockGemini, SolveSample, StandIn
+from hcaptcha_challenger.models import (
+    CaptchaPayload,
+    CaptchaResponse,
+    ImageBinaryChallenge,
+    ImageDragDropChallenge,
+    PointCoordinate,
+)
+from hcaptcha_challenger.tools import ImageClassifier, SpatialPathReasoner
+from hcaptcha_challenger.tools.common import configure_genai_client
+
+JOBS_DIR = Path(__file__).parent.parent.joinpath("examples", "jobs")
+CHALLENGE_VIEW = Path(__file__).parent.joinpath("challenge_view")
+
+
+@pytest.fixture
+def mock_gemini():
+    with MockGemini.from_file(latency=0.05) as mock:
+        configure_genai_client(mock.http_options)
+        yield mock
+    configure_genai_client(None)
+
+
+def test_stand_in_serves_hcaptcha_url_shapes():
+    with StandIn.from_dir(JOBS_DIR) as stand_in:
+        site = httpx.get(stand_in.site_url("image_drag_drop"))
+        assert site.status_code == 200
+        assert "newassets.hcaptcha.com/captcha/v1/" in site.text
+
+        frame_url = stand_in.local_url(
+            "https://newassets.hcaptcha.com/captcha/v1/stand-in/static/hcaptcha.html"
+        )
+        assert httpx.get(frame_url).status_code == 200
+
+        getcaptcha = stand_in.local_url(
+            "https://api.hcaptcha.com/getcaptcha/stand-in?job=image_drag_drop"
+        )
+        response = httpx.post(getcaptcha, content=b"sitekey=stand-in")
+        # The agent only decodes payloads served with exactly this content type
+        assert response.headers["content-type"] == "application/json"
+        payload = CaptchaPayload(**response.json())
+        assert payload.request_type.value == "image_drag_drop"
+        assert payload.key.startswith("E0_stand-in.")
+
+        checkcaptcha = stand_in.local_url(
+            f"https://api.hcaptcha.com/checkcaptcha/stand-in/{payload.key}"
+        )
+        cr = CaptchaResponse(**httpx.post(checkcaptcha, content=b"{}").json())
+        assert cr.is_pass and cr.generated_pass_UUID.startswith("P1_")
+
+        assert (stand_in.served, stand_in.checked, stand_in.passed) == (1, 1, 1)
+
+
+def test_stand_in_rejects_answers_at_fail_rate():
+    with StandIn.from_dir(JOBS_DIR, fail_rate=1) as stand_in:
+        url = stand_in.local_url("https://api.hcaptcha.com/checkcaptcha/stand-in/E0_key")
+        assert not CaptchaResponse(**httpx.post(url).json()).is_pass
+
+
+def test_mock_gemini_replays_recorded_answers(mock_gemini):
+    screenshot = next(CHALLENGE_VIEW.joinpath("image_drag_drop").glob("*.png")).read_bytes()
+
+    async def _invoke():
+        binary = await ImageClassifier(gemini_api_key="offline").invoke_async(screenshot)
+        drag = await SpatialPathReasoner(gemini_api_key="offline").invoke_async(
+            challenge_screenshot=screenshot, grid_divisions=screenshot
+        )
+        return binary, drag
+
+    binary, drag = asyncio.run(_invoke())
+
+    assert isinstance(binary, ImageBinaryChallenge)
+    assert binary.convert_box_to_boolean_matrix().count(True) == 3
+    assert isinstance(drag, ImageDragDropChallenge)
+    assert drag.paths[0].start_point.x == 499
+    assert mock_gemini.uploads >= 2
+    assert mock_gemini.requests == 2 and mock_gemini.unmatched == 0
+
+
+def test_mock_gemini_answers_drag_destinations(mock_gemini):
+    # DERIVE_DRAG_START_POINTS is on by default, the reasoner then only asks for end points
+    screenshot = next(CHALLENGE_VIEW.joinpath("image_drag_drop").glob("*.png")).read_bytes()
+
+    drag = asyncio.run(
+        SpatialPathReasoner(gemini_api_key="offline").invoke_async(
+            challenge_screenshot=screenshot,
+            grid_divisions=screenshot,
+            start_points=[PointCoordinate(x=499, y=307)],
+        )
+    )
+
+    assert isinstance(drag, ImageDragDropChallenge)
+    assert (drag.paths[0].start_point.x, drag.paths[0].start_point.y) == (499, 307)
+    assert (drag.paths[0].end_point.x, drag.paths[0].end_point.y) == (230, 450)
+    assert mock_gemini.unmatched == 0
+
+
+def test_bench_report():
+    samples = [
+        SolveSample(job="image_label_binary", signal="success", duration=d) for d in (4, 5, 6)
+    ] + [SolveSample(job="image_drag_drop", signal="failure", duration=9, error="TimeoutError")]
+
+    report = BenchReport.from_samples(samples, concurrency=2, elapsed=30)
+
+    assert report.succeeded == 3
+    assert report.throughput_per_min == 6
+    assert report.latency["p50"] == 6
+    assert report.latency["max"] == 9
+    assert report.errors == {"TimeoutError": 1}
+    assert report.jobs["image_label_binary"]["succeeded"] == 3
+    assert report.jobs["image_drag_drop"]["p95"] == 9
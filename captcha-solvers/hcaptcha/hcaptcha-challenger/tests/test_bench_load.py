@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import itertools
+import json
+import time
+
+import httpx
+
+from hcaptcha_challenger.bench import BenchReport, JobApiTarget, SolveSample, find_knee, run_load
+
+
+def test_find_knee():
+    levels = [1, 2, 4, 8, 16]
+    # Saturates at 4 concurrent solves
+    assert find_knee(levels, [10, 20, 38, 40, 39]) == 4
+    # Still linear, capacity not reached
+    assert find_knee(levels, [10, 20, 40, 80, 160]) is None
+    assert find_knee([1, 2], [10, 20]) is None
+
+
+def test_run_load_stops_past_saturation():
+    capacity = {1: 10, 2: 20, 4: 38, 8: 25, 16: 20}
+    ran = []
+
+    async def _run_step(concurrency: int, solves: int) -> BenchReport:
+        ran.append((concurrency, solves))
+        samples = [SolveSample(job="fake", signal="success", duration=1)] * solves
+        return BenchReport.from_samples(
+            samples, concurrency=concurrency, elapsed=solves * 60 / capacity[concurrency]
+        )
+
+    report = asyncio.run(run_load(_run_step, [1, 2, 4, 8, 16]))
+
+    # Throughput fell below 80% of the best level at 8, 16 is never run
+    assert ran == [(1, 4), (2, 8), (4, 16), (8, 32)]
+    assert report.knee == 4 and report.knee_step.throughput_per_min == 38
+    assert "concurrency 8" in report.stopped
+
+
+def test_job_api_target():
+    job_ids = itertools.count()
+    jobs = {}
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "POST":
+            job_id = str(next(job_ids))
+            # Every third submission finds the queue full
+            if int(job_id) % 3 == 2:
+                return httpx.Response(429, json={"detail": "Queue is full"})
+            now = time.time()
+            jobs[job_id] = {
+                "job_id": job_id,
+                "status": "queued",
+                "request": json.loads(request.content),
+                "created_at": now,
+            }
+            return httpx.Response(202, json=jobs[job_id])
+
+        job = jobs[request.url.path.rsplit("/", 1)[-1]]
+        failed = int(job["job_id"]) % 3 == 1
+        job.update(
+            status="failure" if failed else "success",
+            started_at=job["created_at"] + 1,
+            finished_at=job["created_at"] + 3,
+            token=None if failed else "P1_token",
+            signal="retry" if failed else "success",
+        )
+        return httpx.Response(200, json=job)
+
+    target = JobApiTarget(
+        "http://solver.test",
+        "https://accounts.hcaptcha.com/demo",
+        "a5f74b19-9e45-40e0-b45d-47ff91b7a6c2",
+        transport=httpx.MockTransport(_handler),
+    )
+    report = asyncio.run(target.run_step(concurrency=2, solves=6))
+
+    assert report.solves == 6 and report.succeeded == 2
+    assert report.errors == {"http_429": 2, "signal_retry": 2}
+    assert report.phases["queue"]["p50"] == 1
+    assert report.phases["solve"]["max"] == 2
+    assert jobs["0"]["request"]["timeout"] == 180
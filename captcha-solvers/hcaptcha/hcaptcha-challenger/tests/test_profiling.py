@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+
+from hcaptcha_challenger.profiling import SamplingProfiler
+
+
+def _busy(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+
+async def _idle(seconds: float):
+    await asyncio.sleep(seconds)
+
+
+def test_profiler_separates_wall_and_cpu_time():
+    async def _main():
+        _busy(0.2)
+        await _idle(0.2)
+
+    with SamplingProfiler(interval=0.002) as profiler:
+        asyncio.run(_main())
+
+    assert profiler.samples > 20
+    assert profiler.elapsed >= 0.4
+
+    wall = profiler.folded("wall")
+    assert "_busy (test_profiling.py" in wall
+    # Awaiting shows up in the wall view only, blocked in the selector
+    assert any("select" in label for label, _ in profiler.top(5, view="wall"))
+
+    if profiler.cpu_available:
+        cpu_stacks = dict(line.rsplit(" ", 1) for line in profiler.folded("cpu").splitlines())
+        busy = sum(int(w) for stack, w in cpu_stacks.items() if "_busy" in stack)
+        assert busy / sum(int(w) for w in cpu_stacks.values()) > 0.5
+
+
+def test_folded_format():
+    profiler = SamplingProfiler()
+    profiler.wall.update({"main (a.py:1);solve (b.py:2)": 3, "main (a.py:1)": 1})
+
+    assert profiler.folded() == "main (a.py:1);solve (b.py:2) 3\nmain (a.py:1) 1\n"
+    assert profiler.top(1) == [("solve (b.py:2)", 0.75)]
+    assert profiler.folded("cpu") == ""
+
+
+def _busy_profiled(seconds: float):
+    _busy(seconds)
+
+
+def _busy_other(seconds: float):
+    _busy(seconds)
+
+
+def test_profiler_keeps_the_samples_of_its_task():
+    async def _profiled():
+        with SamplingProfiler(interval=0.001) as profiler:
+            # Tasks created by the profiled task are kept too
+            await asyncio.gather(*[_spin(_busy_profiled) for _ in range(2)])
+        return profiler
+
+    async def _spin(work):
+        # Longer than the GIL switch interval, so that the sampler gets to run meanwhile
+        for _ in range(10):
+            work(0.02)
+            await asyncio.sleep(0)
+
+    async def _main():
+        profiler, _ = await asyncio.gather(_profiled(), _spin(_busy_other))
+        return profiler
+
+    profiler = asyncio.run(_main())
+
+    wall = profiler.folded("wall")
+    assert "_busy_profiled" in wall
+    assert "_busy_other" not in wall
+    assert profiler.skipped > 0
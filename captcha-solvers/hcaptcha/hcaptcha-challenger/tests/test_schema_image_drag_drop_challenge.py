@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from hcaptcha_challenger.models import (
+    DragDestinationCountError,
+    ImageDragDestinationChallenge,
+    PointCoordinate,
+)
+
+
+def test_destinations_to_paths():
+    result = ImageDragDestinationChallenge(
+        challenge_prompt="drag the pieces", end_points=[{"x": 100, "y": 120}, {"x": 200, "y": 80}]
+    )
+    start_points = [PointCoordinate(x=460, y=110), PointCoordinate(x=460, y=220)]
+
+    challenge = result.to_drag_drop_challenge(start_points)
+
+    assert challenge.challenge_prompt == "drag the pieces"
+    assert [(p.start_point.x, p.start_point.y) for p in challenge.paths] == [(460, 110), (460, 220)]
+    assert [(p.end_point.x, p.end_point.y) for p in challenge.paths] == [(100, 120), (200, 80)]
+
+
+@pytest.mark.parametrize("destinations", [1, 3])
+def test_destinations_not_matching_start_points(destinations):
+    result = ImageDragDestinationChallenge(
+        challenge_prompt="", end_points=[{"x": 1, "y": 2}] * destinations
+    )
+    with pytest.raises(DragDestinationCountError, match="Expected 2 destinations, got"):
+        result.to_drag_drop_challenge([PointCoordinate(x=5, y=6), PointCoordinate(x=7, y=8)])
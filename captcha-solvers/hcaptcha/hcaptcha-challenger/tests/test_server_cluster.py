@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+
+import pytest
+
+from hcaptcha_challenger.server.cluster import ClusterManager, InMemoryQueue
+from hcaptcha_challenger.server.jobs import (
+    Job,
+    JobStatus,
+    QueueFullError,
+    SolveRequest,
+    SolveResult,
+)
+from hcaptcha_challenger.server.proxies import ProxyHealth
+
+
+class _Solver:
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.solved = []
+        self.cancelled = []
+
+    async def solve(self, request, deadline):
+        self.solved.append(request.proxy)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(request.proxy)
+            raise
+        return SolveResult(token="P1_token", signal="success")
+
+    async def close(self):
+        return
+
+
+def _node(backend, solver: _Solver, workers: int = 1, **kwargs) -> ClusterManager:
+    async def _factory():
+        return solver
+
+    return ClusterManager(_factory, backend, workers=workers, poll_interval=0.01, **kwargs)
+
+
+def test_jobs_are_shared_between_nodes():
+    backend = InMemoryQueue()
+    front, back = _Solver(), _Solver()
+
+    async def _main():
+        # `entry` accepts jobs without solving any, `worker` solves them
+        entry = _node(backend, front)
+        worker = _node(backend, back, workers=2)
+        await worker.start()
+        jobs = [
+            await entry.submit_async(
+                SolveRequest(website_url="https://example.com", proxy=f"http://proxy-{i}")
+            )
+            for i in range(3)
+        ]
+        finished = [await entry.wait(job.job_id, timeout=5) for job in jobs]
+        stats = await worker.stats_async()
+        await worker.stop()
+        return finished, stats
+
+    finished, stats = asyncio.run(_main())
+    assert all(job.status == JobStatus.SUCCESS and job.token == "P1_token" for job in finished)
+    # The proxy travels with the queued job, but is never echoed back
+    assert sorted(back.solved) == ["http://proxy-0", "http://proxy-1", "http://proxy-2"]
+    assert "proxy" not in finished[0].model_dump()["request"]
+    assert front.solved == []
+    assert stats["pending"] == 0 and stats["leased"] == 0
+
+
+def test_queue_backpressure():
+    async def _main():
+        node = _node(InMemoryQueue(), _Solver(), queue_size=1)
+        await node.submit_async(SolveRequest(website_url="https://example.com"))
+        with pytest.raises(QueueFullError):
+            await node.submit_async(SolveRequest(website_url="https://example.com"))
+
+    asyncio.run(_main())
+
+
+def test_jobs_of_penalized_proxies_are_leased_last():
+    health = ProxyHealth(min_solves=1)
+    health.record("http://failing", success=False, duration=180, error=asyncio.TimeoutError())
+    backend = InMemoryQueue()
+
+    async def _main():
+        node = _node(backend, _Solver(), proxy_health=health)
+        bad = await node.submit_async(
+            SolveRequest(website_url="https://example.com", proxy="http://failing")
+        )
+        good = await node.submit_async(
+            SolveRequest(website_url="https://example.com", proxy="http://good")
+        )
+        leased = [(await backend.lease(60)).job_id for _ in range(2)]
+        return leased, [good.job_id, bad.job_id]
+
+    leased, expected = asyncio.run(_main())
+    assert leased == expected
+
+
+def test_expired_lease_is_delivered_again():
+    backend = InMemoryQueue()
+    solver = _Solver()
+
+    async def _main():
+        node = _node(backend, solver, visibility_timeout=0.05)
+        job = await node.submit_async(SolveRequest(website_url="https://example.com"))
+
+        # A node leases the job, then dies without renewing its lease
+        leased = await backend.lease(visibility_timeout=0.05)
+        assert leased.job_id == job.job_id
+        assert await backend.lease(visibility_timeout=0.05) is None
+        assert (await node.wait(job.job_id)).status == JobStatus.RUNNING
+
+        await asyncio.sleep(0.06)
+        await node.start()
+        finished = await node.wait(job.job_id, timeout=5)
+        await node.stop()
+        return finished
+
+    assert asyncio.run(_main()).status == JobStatus.SUCCESS
+    assert len(solver.solved) == 1
+
+
+def test_running_job_keeps_its_lease():
+    backend = InMemoryQueue()
+
+    async def _main():
+        # Solving takes several visibility timeouts, the heartbeat renews the lease
+        node = _node(backend, _Solver(delay=0.3), visibility_timeout=0.1)
+        await node.start()
+        job = await node.submit_async(SolveRequest(website_url="https://example.com"))
+        await asyncio.sleep(0.2)
+        redelivered = await backend.lease(visibility_timeout=0.1)
+        finished = await node.wait(job.job_id, timeout=5)
+        await node.stop()
+        return redelivered, finished
+
+    redelivered, finished = asyncio.run(_main())
+    assert redelivered is None
+    assert finished.status == JobStatus.SUCCESS
+
+
+def test_cluster_budget():
+    backend = InMemoryQueue()
+
+    async def _main():
+        assert await backend.acquire("gemini:key", limit=2, window=60) == 0
+        assert await backend.acquire("gemini:key", limit=2, window=60) == 0
+        retry_after = await backend.acquire("gemini:key", limit=2, window=60)
+        # Other keys have budgets of their own
+        assert await backend.acquire("gemini:other", limit=2, window=60) == 0
+        return retry_after
+
+    assert 0 < asyncio.run(_main()) <= 60
+
+
+def test_budget_spent_fails_the_job_at_its_deadline():
+    backend = InMemoryQueue()
+    solver = _Solver()
+
+    async def _main():
+        node = _node(backend, solver, budget=1, budget_key="gemini:key")
+        await node.start()
+        first = await node.submit_async(SolveRequest(website_url="https://example.com"))
+        second = await node.submit_async(
+            SolveRequest(website_url="https://example.com", timeout=0.2)
+        )
+        started = time.monotonic()
+        results = [await node.wait(job.job_id, timeout=5) for job in (first, second)]
+        await node.stop()
+        return results, time.monotonic() - started
+
+    (first, second), elapsed = asyncio.run(_main())
+    assert first.status == JobStatus.SUCCESS
+    assert second.status == JobStatus.FAILURE and "expired" in second.error
+    assert len(solver.solved) == 1 and elapsed < 5
+
+
+def test_cancel_reaches_the_node_solving_the_job():
+    backend = InMemoryQueue()
+    solver = _Solver(delay=30)
+
+    async def _main():
+        entry = _node(backend, _Solver())
+        worker = _node(backend, solver)
+        await worker.start()
+        running = await entry.submit_async(
+            SolveRequest(website_url="https://example.com", proxy="http://running")
+        )
+        await asyncio.sleep(0.05)
+        queued = await entry.submit_async(
+            SolveRequest(website_url="https://example.com", proxy="http://queued")
+        )
+
+        cancelled = [await entry.cancel_async(job.job_id) for job in (queued, running)]
+        finished = await entry.wait(running.job_id, timeout=5)
+        await asyncio.sleep(0.05)
+        await worker.stop()
+        return cancelled, finished
+
+    cancelled, finished = asyncio.run(_main())
+    assert all(job.status == JobStatus.CANCELLED for job in cancelled)
+    # The worker node cancels the solve at its next heartbeat, the queued job is never leased
+    assert solver.cancelled == ["http://running"]
+    assert solver.solved == ["http://running"]
+    assert finished.status == JobStatus.CANCELLED and finished.finished_at
+
+
+@pytest.fixture
+def redis_queue(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    from redis import asyncio as aioredis
+
+    from hcaptcha_challenger.server.cluster import RedisQueue
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(aioredis, "from_url", lambda url: fakeredis.FakeAsyncRedis(server=server))
+    return lambda: RedisQueue("redis://fake:6379/0", prefix="test")
+
+
+def test_redis_queue_leases_by_priority_and_redelivers(redis_queue):
+    async def _main():
+        queue = redis_queue()
+        low = Job(job_id="low", request=SolveRequest(website_url="https://example.com"))
+        high = Job(
+            job_id="high",
+            request=SolveRequest(website_url="https://example.com", priority=1, proxy="http://p"),
+        )
+        for job in (low, high):
+            await queue.enqueue(job, maxsize=8, ttl=60)
+
+        first = await queue.lease(visibility_timeout=0.05)
+        assert first.job_id == "high" and first.status == JobStatus.RUNNING
+        # The proxy the job API never echoes back reaches the node
+        assert first.request.proxy == "http://p"
+
+        # The lease of `high` expires, it is delivered again ahead of `low`
+        await asyncio.sleep(0.1)
+        again = await queue.lease(visibility_timeout=60)
+        assert again.job_id == "high"
+        assert await queue.extend("high", 60)
+
+        again.status = JobStatus.SUCCESS
+        await queue.complete(again, ttl=60)
+        assert (await queue.get("high")).status == JobStatus.SUCCESS
+        assert not await queue.extend("high", 60)
+
+        last = await queue.lease(visibility_timeout=60)
+        assert last.job_id == "low" and await queue.lease(visibility_timeout=60) is None
+        stats = await queue.stats()
+        await queue.close()
+        return stats
+
+    assert asyncio.run(_main()) == {"backend": "redis", "pending": 0, "leased": 1}
+
+
+def test_redis_queue_maxsize_holds_under_concurrent_submissions(redis_queue):
+    async def _submit(queue, i):
+        job = Job(job_id=f"job-{i}", request=SolveRequest(website_url="https://example.com"))
+        try:
+            await queue.enqueue(job, maxsize=3, ttl=60)
+            return True
+        except QueueFullError:
+            return False
+
+    async def _main():
+        queues = [redis_queue() for _ in range(4)]
+        accepted = await asyncio.gather(*[_submit(queues[i % 4], i) for i in range(12)])
+        stats = await queues[0].stats()
+        for queue in queues:
+            await queue.close()
+        return accepted, stats
+
+    accepted, stats = asyncio.run(_main())
+    assert accepted.count(True) == 3 and stats["pending"] == 3
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pytest
+
+from hcaptcha_challenger.server.jobs import (
+    CallbackRejectedError,
+    JobManager,
+    JobStatus,
+    QueueFullError,
+    SolveRequest,
+    SolveResult,
+    callback_allowed,
+)
+
+
+class _Solver:
+    def __init__(self, delay: float = 0.01, token: str | None = "P1_token"):
+        self.delay = delay
+        self.token = token
+        self.solved = []
+        self.cancelled = []
+        self.closed = False
+
+    async def solve(self, request, deadline):
+        self.solved.append(request.website_url)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(request.website_url)
+            raise
+        return SolveResult(token=self.token, signal="success" if self.token else "failure")
+
+    async def close(self):
+        self.closed = True
+
+
+def _manager(solver: _Solver, **kwargs) -> JobManager:
+    async def _factory():
+        return solver
+
+    return JobManager(_factory, **kwargs)
+
+
+def test_submit_and_long_poll():
+    solver = _Solver()
+
+    async def _main():
+        manager = _manager(solver, workers=1)
+        await manager.start()
+        job = manager.submit(SolveRequest(website_url="https://example.com", proxy="http://p"))
+        assert job.status == JobStatus.QUEUED
+        finished = await manager.wait(job.job_id, timeout=5)
+        await manager.stop()
+        return finished
+
+    job = asyncio.run(_main())
+    assert job.status == JobStatus.SUCCESS
+    assert job.token == "P1_token"
+    assert job.finished_at >= job.started_at >= job.created_at
+    # Proxy credentials are never echoed back
+    assert "proxy" not in job.model_dump()["request"]
+    assert solver.closed
+
+
+def test_queue_backpressure():
+    async def _main():
+        # No worker is started, jobs stay queued
+        manager = _manager(_Solver(), queue_size=2)
+        for _ in range(2):
+            manager.submit(SolveRequest(website_url="https://example.com"))
+        with pytest.raises(QueueFullError):
+            manager.submit(SolveRequest(website_url="https://example.com"))
+        return manager.stats()
+
+    stats = asyncio.run(_main())
+    assert stats["queued"] == 2
+    assert stats["jobs"]["queued"] == 2
+
+
+def test_job_expires_in_queue():
+    solver = _Solver()
+
+    async def _main():
+        manager = _manager(solver, workers=1)
+        job = manager.submit(SolveRequest(website_url="https://example.com", timeout=0.01))
+        await asyncio.sleep(0.05)
+        await manager.start()
+        job = await manager.wait(job.job_id, timeout=5)
+        await manager.stop()
+        return job
+
+    job = asyncio.run(_main())
+    assert job.status == JobStatus.FAILURE
+    assert "expired" in job.error
+    assert solver.solved == []
+
+
+def test_wait_unknown_job():
+    assert asyncio.run(_manager(_Solver()).wait("missing", timeout=0.01)) is None
+
+
+def test_cancel_running_and_queued_jobs():
+    solver = _Solver(delay=30)
+
+    async def _main():
+        manager = _manager(solver, workers=1)
+        await manager.start()
+        running = manager.submit(SolveRequest(website_url="https://running.example.com"))
+        queued = manager.submit(SolveRequest(website_url="https://queued.example.com"))
+        await asyncio.sleep(0.05)
+
+        cancelled = [await manager.cancel_async(queued.job_id)]
+        # The cancelled job leaves the queue at once
+        assert manager.scheduler.qsize() == 0
+        cancelled.append(await manager.cancel_async(running.job_id, "Client disconnected"))
+        # The worker survives the cancellation and takes the next job
+        solver.delay = 0.01
+        follow_up = manager.submit(SolveRequest(website_url="https://example.com"))
+        finished = await manager.wait(follow_up.job_id, timeout=5)
+        stats = manager.stats()
+        await manager.stop()
+        return cancelled, finished, stats
+
+    (queued, running), finished, stats = asyncio.run(_main())
+    assert queued.status == running.status == JobStatus.CANCELLED
+    assert running.error == "Client disconnected" and running.finished_at
+    assert solver.cancelled == ["https://running.example.com"]
+    assert "https://queued.example.com" not in solver.solved
+    assert finished.status == JobStatus.SUCCESS
+    assert stats["jobs"]["cancelled"] == 2
+
+
+def test_worker_survives_a_failing_solver_factory(monkeypatch):
+    monkeypatch.setattr("hcaptcha_challenger.server.jobs.SOLVER_RETRY_MAX", 0)
+    solver = _Solver()
+    attempts = 0
+
+    async def _factory():
+        nonlocal attempts
+        attempts += 1
+        if attempts <= 2:
+            raise RuntimeError("Browser failed to launch")
+        return solver
+
+    async def _main():
+        manager = JobManager(_factory, workers=1)
+        await manager.start()
+        failed = manager.submit(SolveRequest(website_url="https://failed.example.com"))
+        failed = await manager.wait(failed.job_id, timeout=5)
+        # The next job starts the solver again
+        solved = manager.submit(SolveRequest(website_url="https://example.com"))
+        solved = await manager.wait(solved.job_id, timeout=5)
+        await manager.stop()
+        return failed, solved
+
+    failed, solved = asyncio.run(_main())
+    assert failed.status == JobStatus.FAILURE and "could not be started" in failed.error
+    assert solved.status == JobStatus.SUCCESS
+    assert attempts == 3 and solver.solved == ["https://example.com"]
+
+
+@pytest.mark.parametrize(
+    "url, allowed",
+    [
+        ("https://hooks.example.com/solved", True),
+        ("http://api.example.org:8080/hook", True),
+        ("https://HOOKS.example.com./solved", True),
+        ("https://example.com/solved", False),
+        ("https://hooks.example.com.evil.net/solved", False),
+        ("http://169.254.169.254/latest/meta-data", False),
+        ("http://localhost:6379/", False),
+        ("file:///etc/passwd", False),
+        ("gopher://hooks.example.com/", False),
+    ],
+)
+def test_callback_allowed(url, allowed):
+    assert callback_allowed(url, ["hooks.example.com", "*.example.org"]) is allowed
+
+
+def test_callbacks_are_refused_without_allowed_hosts():
+    async def _main():
+        manager = _manager(_Solver())
+        with pytest.raises(CallbackRejectedError):
+            manager.submit(
+                SolveRequest(website_url="https://example.com", callback_url="http://10.0.0.1/")
+            )
+        return manager.submit(SolveRequest(website_url="https://example.com"))
+
+    assert asyncio.run(_main()).status == JobStatus.QUEUED
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pytest
+
+from hcaptcha_challenger.server.jobs import JobManager, JobStatus, SolveRequest, SolveResult
+from hcaptcha_challenger.server.limiter import AdaptiveLimiter, LimitPolicy
+from hcaptcha_challenger.tools.common import within_deadline
+
+
+class _RateLimited(Exception):
+    code = 429
+
+
+def _limiter(**kwargs) -> AdaptiveLimiter:
+    return AdaptiveLimiter(LimitPolicy(**kwargs), cpu_usage=lambda: None)
+
+
+def _saturate(limiter: AdaptiveLimiter):
+    async def _main():
+        async with limiter.slot():
+            pass
+
+    limiter.limit, limit = 1, limiter.limit
+    asyncio.run(_main())
+    limiter.limit = limit
+
+
+def test_limit_grows_only_when_used():
+    limiter = _limiter(min_limit=1, max_limit=3)
+    assert limiter.adjust() == 1
+
+    for expected in (2, 3, 3):
+        _saturate(limiter)
+        limiter.observe(1.0, None)
+        assert limiter.adjust() == expected
+    assert limiter.increased == 2
+
+
+@pytest.mark.parametrize(
+    "overload",
+    [
+        dict(throttled=True),
+        dict(latency=5.0),
+        dict(loop_lag=1.0),
+        dict(cpu=0.99),
+    ],
+)
+def test_limit_backs_off_on_overload(overload):
+    limiter = _limiter(min_limit=2, max_limit=16, initial_limit=8)
+    limiter.observe(1.0, None)
+    limiter.adjust()
+    assert limiter.baseline == 1.0
+
+    _saturate(limiter)
+    limiter.observe(overload.get("latency", 1.0), None)
+    if overload.get("throttled"):
+        limiter.observe(1.0, _RateLimited())
+    limit = limiter.adjust(loop_lag=overload.get("loop_lag", 0.0), cpu=overload.get("cpu"))
+
+    assert limit == 6 and limiter.decreased == 1
+    # The baseline ignores the windows of an overloaded system
+    assert limiter.baseline == 1.0
+
+    for _ in range(10):
+        limiter.observe(1.0, _RateLimited())
+        limiter.adjust()
+    assert limiter.limit == 2
+
+
+def test_slot_waits_for_the_limit():
+    limiter = _limiter(min_limit=1, max_limit=4)
+    peak = 0
+
+    async def _solve():
+        nonlocal peak
+        async with limiter.slot():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    async def _main():
+        await asyncio.gather(*[_solve() for _ in range(4)])
+        # Raising the limit wakes the waiting solves
+        waiting = asyncio.gather(*[_solve() for _ in range(4)])
+        await asyncio.sleep(0)
+        limiter.adjust()
+        await waiting
+
+    asyncio.run(_main())
+    assert peak == 2 and limiter.limit == 2
+
+
+def test_reasoner_attempts_are_observed():
+    limiter = _limiter()
+
+    @within_deadline
+    async def _invoke(fail: bool):
+        if fail:
+            raise _RateLimited()
+        return "ok"
+
+    async def _main():
+        await limiter.start()
+        await _invoke(False)
+        with pytest.raises(_RateLimited):
+            await _invoke(True)
+        await limiter.stop()
+        # Nothing is observed once the limiter is stopped
+        await _invoke(False)
+
+    asyncio.run(_main())
+    assert limiter._calls == 2 and limiter._throttled == 1 and len(limiter._latencies) == 1
+
+
+def test_job_manager_solves_within_the_limit():
+    running, peak = 0, 0
+
+    class _Solver:
+        async def solve(self, request, deadline):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return SolveResult(token="P1_token", signal="success")
+
+        async def close(self):
+            return
+
+    async def _factory():
+        return _Solver()
+
+    async def _main():
+        manager = JobManager(_factory, workers=4, limiter=_limiter(min_limit=1, max_limit=4))
+        await manager.start()
+        jobs = [manager.submit(SolveRequest(website_url="https://example.com")) for _ in range(4)]
+        finished = [await manager.wait(job.job_id, timeout=5) for job in jobs]
+        stats = manager.stats()
+        await manager.stop()
+        return finished, stats
+
+    finished, stats = asyncio.run(_main())
+    assert all(job.status == JobStatus.SUCCESS for job in finished)
+    assert peak == 1
+    assert stats["concurrency"]["limit"] == 1
+
+
+def test_jobs_stay_queued_while_the_limiter_holds_back():
+    started = asyncio.Event()
+
+    class _Solver:
+        async def solve(self, request, deadline):
+            started.set()
+            await asyncio.sleep(0.05)
+            return SolveResult(token="P1_token", signal="success")
+
+        async def close(self):
+            return
+
+    async def _factory():
+        return _Solver()
+
+    async def _main():
+        manager = JobManager(_factory, workers=4, limiter=_limiter(min_limit=1, max_limit=4))
+        await manager.start()
+        jobs = [
+            manager.submit(SolveRequest(website_url="https://example.com", tenant=f"t{i}"))
+            for i in range(3)
+        ]
+        await started.wait()
+        # Idle workers take nothing off the fair queue, no key holds a running slot
+        queued, keys = manager.scheduler.qsize(), manager.scheduler.stats()["keys"]
+        finished = [await manager.wait(job.job_id, timeout=5) for job in jobs]
+        await manager.stop()
+        return queued, keys, finished
+
+    queued, keys, finished = asyncio.run(_main())
+    assert queued == 2
+    assert sum(key["running"] for key in keys.values()) == 1
+    assert all(job.status == JobStatus.SUCCESS for job in finished)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pytest
+
+from hcaptcha_challenger.server.scheduler import FairScheduler, QueueFullError
+
+
+async def _drain(scheduler: FairScheduler, n: int):
+    order = []
+    for _ in range(n):
+        item, key = await scheduler.get()
+        order.append(item)
+        scheduler.release(key)
+    return order
+
+
+def test_fair_share_between_keys():
+    async def _main():
+        scheduler = FairScheduler(maxsize=100)
+        # A noisy key floods the queue before a quiet one submits
+        for i in range(10):
+            scheduler.put_nowait(f"noisy-{i}", "noisy")
+        for i in range(2):
+            scheduler.put_nowait(f"quiet-{i}", "quiet")
+        return await _drain(scheduler, 12)
+
+    order = asyncio.run(_main())
+    # The quiet key is interleaved instead of waiting behind the whole backlog
+    assert order.index("quiet-1") <= 3
+
+
+def test_weights():
+    async def _main():
+        scheduler = FairScheduler(maxsize=100, weights={"gold": 3})
+        for i in range(8):
+            scheduler.put_nowait(f"gold-{i}", "gold")
+            scheduler.put_nowait(f"free-{i}", "free")
+        return await _drain(scheduler, 8)
+
+    first = asyncio.run(_main())
+    assert sum(item.startswith("gold") for item in first) == 6
+
+
+def test_priority_first():
+    async def _main():
+        scheduler = FairScheduler(maxsize=100)
+        for i in range(5):
+            scheduler.put_nowait(f"bulk-{i}", "a")
+        scheduler.put_nowait("urgent", "b", priority=1)
+        return await _drain(scheduler, 6)
+
+    assert asyncio.run(_main())[0] == "urgent"
+
+
+def test_concurrency_cap():
+    async def _main():
+        scheduler = FairScheduler(maxsize=100, concurrency={"a": 1})
+        scheduler.put_nowait("a-0", "a")
+        scheduler.put_nowait("a-1", "a")
+        scheduler.put_nowait("b-0", "b")
+
+        first, _ = await scheduler.get()
+        second, _ = await scheduler.get()
+        # "a" is at its cap until its first job is released
+        blocked = asyncio.ensure_future(scheduler.get())
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        scheduler.release("a")
+        third, _ = await asyncio.wait_for(blocked, 1)
+        return first, second, third, scheduler.stats()
+
+    first, second, third, stats = asyncio.run(_main())
+    assert (first, second, third) == ("a-0", "b-0", "a-1")
+    assert stats["keys"]["a"]["running"] == 1
+    assert stats["keys"]["a"]["queue_time_p95"] is not None
+
+
+def test_proxy_cap_leaves_workers_to_other_proxies():
+    async def _main():
+        scheduler = FairScheduler(maxsize=100, max_running_per_proxy=1)
+        scheduler.put_nowait("a-0", "site", proxy="http://proxy-a")
+        scheduler.put_nowait("a-1", "site", proxy="http://proxy-a")
+        scheduler.put_nowait("b-0", "site", proxy="http://proxy-b")
+
+        first, _ = await scheduler.get()
+        # The job of the busy proxy stays queued, a worker takes the next proxy's job
+        second, _ = await asyncio.wait_for(scheduler.get(), 1)
+        blocked = asyncio.ensure_future(scheduler.get())
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        running = scheduler.stats()["running_per_proxy"]
+        scheduler.release("site", "http://proxy-a")
+        third, _ = await asyncio.wait_for(blocked, 1)
+        return first, second, third, running
+
+    first, second, third, running = asyncio.run(_main())
+    assert (first, second, third) == ("a-0", "b-0", "a-1")
+    assert running == {"http://proxy-a": 1, "http://proxy-b": 1}
+
+
+def test_admission_limits():
+    async def _main():
+        scheduler = FairScheduler(maxsize=3, max_queued_per_key=2)
+        scheduler.put_nowait(0, "a")
+        scheduler.put_nowait(1, "a")
+        with pytest.raises(QueueFullError):
+            scheduler.put_nowait(2, "a")
+        scheduler.put_nowait(3, "b")
+        with pytest.raises(QueueFullError):
+            scheduler.put_nowait(4, "c")
+
+    asyncio.run(_main())
+
+
+def test_discard_frees_the_queue():
+    async def _main():
+        scheduler = FairScheduler(maxsize=2, max_queued_per_key=1)
+        scheduler.put_nowait("a-0", "a")
+        scheduler.put_nowait("b-0", "b", priority=1)
+        assert scheduler.discard("a-0") and not scheduler.discard("a-0")
+        # Room again, globally and for "a"
+        scheduler.put_nowait("a-1", "a")
+        return [(await scheduler.get())[0] for _ in range(2)], scheduler.stats()
+
+    order, stats = asyncio.run(_main())
+    assert order == ["b-0", "a-1"]
+    assert stats["queued"] == 0 and stats["keys"]["a"]["queued"] == 0
+
+
+def test_queue_slo_violations():
+    async def _main():
+        scheduler = FairScheduler(queue_slo=0.01)
+        scheduler.put_nowait(0, "a")
+        await asyncio.sleep(0.03)
+        await scheduler.get()
+        return scheduler.stats()
+
+    assert asyncio.run(_main())["keys"]["a"]["slo_violations"] == 1
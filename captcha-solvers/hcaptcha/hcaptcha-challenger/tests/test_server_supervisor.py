@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+
+import pytest
+
+from hcaptcha_challenger.server.jobs import DrainingError, JobManager, SolveRequest, SolveResult
+from hcaptcha_challenger.server.supervisor import RecyclePolicy, Supervisor, rss_of, total_rss_of
+
+
+class _Solver:
+    def __init__(self, rss: int | None = None):
+        self.solves = 0
+        self.rss = rss
+        self.closed = False
+
+    async def solve(self, request, deadline):
+        self.solves += 1
+        return SolveResult(token="P1_token")
+
+    async def browser_rss(self):
+        return self.rss
+
+    async def close(self):
+        self.closed = True
+
+
+def _run_jobs(manager: JobManager, n: int):
+    async def _main():
+        await manager.start()
+        jobs = [manager.submit(SolveRequest(website_url="https://example.com")) for _ in range(n)]
+        for job in jobs:
+            await manager.wait(job.job_id, timeout=5)
+        await asyncio.sleep(0.01)
+        await manager.stop()
+
+    asyncio.run(_main())
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="Linux only")
+def test_rss_of():
+    assert rss_of() > 0
+    assert total_rss_of([os.getpid(), 2**22 + 1]) == pytest.approx(rss_of(), rel=0.5)
+    assert total_rss_of([2**22 + 1]) is None
+
+
+def test_recycle_by_solve_count():
+    solvers = []
+
+    async def _factory():
+        solvers.append(_Solver())
+        return solvers[-1]
+
+    supervisor = Supervisor(RecyclePolicy(max_solves=2))
+    _run_jobs(JobManager(_factory, workers=1, supervisor=supervisor), 5)
+
+    assert [s.solves for s in solvers] == [2, 2, 1]
+    assert all(s.closed for s in solvers)
+    assert supervisor.recycled == 2
+
+
+def test_recycle_by_browser_rss():
+    supervisor = Supervisor(RecyclePolicy(max_browser_rss_mb=100))
+
+    async def _main():
+        assert await supervisor.recycle_reason(_Solver(rss=50 * 1024 * 1024)) is None
+        assert await supervisor.recycle_reason(_Solver(rss=None)) is None
+        return await supervisor.recycle_reason(_Solver(rss=200 * 1024 * 1024))
+
+    assert asyncio.run(_main()) == "browser_rss=200MB"
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="Linux only")
+def test_drain_on_process_rss():
+    async def _factory():
+        return _Solver()
+
+    # Any real process is above 1 MB
+    manager = JobManager(
+        _factory, workers=1, supervisor=Supervisor(RecyclePolicy(max_process_rss_mb=1))
+    )
+
+    async def _main():
+        await manager.start()
+        job = manager.submit(SolveRequest(website_url="https://example.com"))
+        await manager.wait(job.job_id, timeout=5)
+        await asyncio.wait_for(manager.drained.wait(), timeout=5)
+        with pytest.raises(DrainingError):
+            manager.submit(SolveRequest(website_url="https://example.com"))
+        await manager.stop()
+        return job
+
+    assert asyncio.run(_main()).token == "P1_token"
+    assert manager.stats()["draining"]
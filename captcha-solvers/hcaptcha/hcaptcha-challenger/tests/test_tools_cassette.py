@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from hcaptcha_challenger.bench import MockGemini
+from hcaptcha_challenger.models import ImageBinaryChallenge
+from hcaptcha_challenger.tools import ImageClassifier, SpatialPathReasoner, SpatialPointReasoner
+from hcaptcha_challenger.tools.cassette import CassetteMiss, GeminiCassette
+from hcaptcha_challenger.tools.challenge_classifier import ChallengeRouter
+from hcaptcha_challenger.tools.common import configure_genai_client
+
+CHALLENGE_VIEW = Path(__file__).parent.joinpath("challenge_view")
+
+API_KEY = "offline"
+
+
+def _screenshot(challenge: str) -> bytes:
+    return next(CHALLENGE_VIEW.joinpath(challenge).glob("*.png")).read_bytes()
+
+
+async def _invoke_all():
+    binary = _screenshot("image_label_binary")
+    canvas = _screenshot("image_drag_drop")
+    return [
+        await ImageClassifier(gemini_api_key=API_KEY).invoke_async(binary),
+        await SpatialPointReasoner(gemini_api_key=API_KEY).invoke_async(
+            canvas, grid_divisions=canvas, auxiliary_information="image_label_single_select"
+        ),
+        await SpatialPathReasoner(gemini_api_key=API_KEY).invoke_async(
+            canvas, grid_divisions=canvas
+        ),
+        await ChallengeRouter(gemini_api_key=API_KEY).invoke_async(canvas),
+    ]
+
+
+def _use(cassette: GeminiCassette):
+    configure_genai_client(cassette.http_options)
+    return cassette
+
+
+@pytest.fixture(scope="module")
+def recorded(tmp_path_factory):
+    root = tmp_path_factory.mktemp("cassettes")
+    with MockGemini.from_file() as mock:
+        cassette = _use(GeminiCassette(root, mode="record", base_url=mock.url))
+        try:
+            results = asyncio.run(_invoke_all())
+        finally:
+            configure_genai_client(None)
+    assert cassette.recorded == 4 and mock.requests == 4
+    return root, results
+
+
+@pytest.fixture(autouse=True)
+def _reset_client():
+    yield
+    configure_genai_client(None)
+
+
+def test_replay_matches_the_recording(recorded):
+    root, results = recorded
+    assert len(list(root.glob("*/*.json"))) == 4
+
+    # The mock endpoint is gone, uploads and answers come from the fixtures
+    cassette = _use(GeminiCassette(root))
+    assert asyncio.run(_invoke_all()) == results
+    assert cassette.replayed == 4
+
+
+def test_replay_injects_faults_into_the_retry_policy(recorded):
+    root, results = recorded
+    cassette = _use(GeminiCassette(root, faults=[429, 500]))
+
+    async def _classify():
+        return await ImageClassifier(gemini_api_key=API_KEY).invoke_async(
+            _screenshot("image_label_binary")
+        )
+
+    started = time.perf_counter()
+    result = asyncio.run(_classify())
+
+    # Two failed attempts, the third one is replayed after the reasoner's retry waits
+    assert isinstance(result, ImageBinaryChallenge) and result == results[0]
+    assert (cassette.faulted, cassette.replayed) == (2, 1)
+    assert time.perf_counter() - started >= 2
+
+
+def test_replay_latency(recorded):
+    root, _ = recorded
+    cassette = _use(GeminiCassette(root, latency=0.3))
+
+    started = time.perf_counter()
+    asyncio.run(
+        ChallengeRouter(gemini_api_key=API_KEY).invoke_async(_screenshot("image_drag_drop"))
+    )
+    assert time.perf_counter() - started >= 0.3
+    assert cassette.replayed == 1
+
+
+def test_replay_miss(tmp_path):
+    cassette = GeminiCassette(tmp_path)
+
+    async def _generate():
+        async with httpx.AsyncClient(transport=cassette) as client:
+            await client.post(
+                "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent",
+                json={"contents": [{"role": "user", "parts": [{"text": "unrecorded"}]}]},
+            )
+
+    with pytest.raises(CassetteMiss):
+        asyncio.run(_generate())
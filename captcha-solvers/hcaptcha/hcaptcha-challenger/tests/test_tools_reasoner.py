@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+from hcaptcha_challenger.agent.artifacts import ArtifactWriter
+from hcaptcha_challenger.tools import ImageClassifier, SpatialPathReasoner
+from hcaptcha_challenger.tools.common import get_genai_client
+
+
+def test_shared_reasoner_per_configuration():
+    a = ImageClassifier.shared("fake-key", model="gemini-2.0-flash")
+    b = ImageClassifier.shared("fake-key", model="gemini-2.0-flash")
+    c = ImageClassifier.shared("fake-key", model="gemini-2.5-flash-preview-04-17")
+    d = SpatialPathReasoner.shared("fake-key", model="gemini-2.0-flash")
+
+    assert a is b
+    assert a is not c
+    assert type(d) is SpatialPathReasoner
+
+
+def test_shared_reasoner_response_is_task_local():
+    reasoner = ImageClassifier.shared("fake-key", model="gemini-2.0-flash")
+
+    async def _solve(value: str, delay: float):
+        reasoner._response = value
+        await asyncio.sleep(delay)
+        return reasoner._response
+
+    async def _main():
+        return await asyncio.gather(_solve("page-1", 0.02), _solve("page-2", 0.01))
+
+    assert asyncio.run(_main()) == ["page-1", "page-2"]
+
+
+def test_genai_client_shared_per_loop():
+    async def _get():
+        return get_genai_client("fake-key"), get_genai_client("fake-key")
+
+    first, second = asyncio.run(_get())
+    assert first is second
+
+    other_loop, _ = asyncio.run(_get())
+    assert other_loop is not first
+
+
+def test_shared_artifact_writer(tmp_path):
+    a = ArtifactWriter.shared(sampling={"screenshot": 0.5}, store_root=tmp_path)
+    b = ArtifactWriter.shared(sampling={"screenshot": 0.5}, store_root=tmp_path)
+    c = ArtifactWriter.shared(sampling={"screenshot": 0.5})
+
+    assert a is b
+    assert a.store is not None and a.store is b.store
+    assert c is not a
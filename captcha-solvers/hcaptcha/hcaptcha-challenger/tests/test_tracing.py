@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import threading
+from contextvars import ContextVar
+from types import SimpleNamespace
+
+import pytest
+from tenacity import retry, stop_after_attempt, wait_none
+
+from hcaptcha_challenger.tools.common import traced_invoke, within_deadline
+from hcaptcha_challenger.tracing import (
+    NOOP_SPAN,
+    JsonlSpanExporter,
+    Span,
+    configure_tracing,
+    current_span,
+    span,
+    traced,
+)
+
+
+class _MemoryExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+    def close(self):
+        return
+
+    def named(self, name):
+        return [s for s in self.spans if s.name == name]
+
+
+@pytest.fixture
+def exporter():
+    exporter = _MemoryExporter()
+    configure_tracing(exporter)
+    yield exporter
+    configure_tracing(None)
+
+
+def test_span_is_noop_without_exporter():
+    configure_tracing(None)
+    with span("page.goto", url="https://example.com") as s:
+        assert s is NOOP_SPAN
+        s.set_attribute("status", 200)
+    assert current_span() is NOOP_SPAN
+
+
+def test_spans_nest_across_tasks(exporter):
+    @traced("child")
+    async def _child(index: int):
+        current_span().set_attribute("index", index)
+        await asyncio.sleep(0)
+
+    async def _main():
+        with span("root"):
+            await asyncio.gather(_child(0), asyncio.create_task(_child(1)))
+
+    asyncio.run(_main())
+
+    (root,) = exporter.named("root")
+    children = exporter.named("child")
+    assert len(children) == 2
+    assert root.parent_span_id is None
+    assert {c.parent_span_id for c in children} == {root.span_id}
+    assert {c.trace_id for c in children} == {root.trace_id}
+    assert sorted(c.attributes["index"] for c in children) == [0, 1]
+    assert all(c.duration_ms >= 0 for c in exporter.spans)
+
+
+def test_span_records_exception(exporter):
+    with pytest.raises(ValueError):
+        with span("robotic_arm.click"):
+            raise ValueError("detached")
+
+    (s,) = exporter.spans
+    assert s.status == "ERROR"
+    assert s.attributes["exception.type"] == "ValueError"
+
+
+def test_reasoner_invoke_records_attempts_and_usage(exporter):
+    class _Reasoner:
+        _model = "gemini-2.5-flash"
+
+        def __init__(self):
+            self._response_var = ContextVar("response", default=None)
+            self.calls = 0
+
+        @property
+        def _response(self):
+            return self._response_var.get()
+
+        @_response.setter
+        def _response(self, value):
+            self._response_var.set(value)
+
+        @traced_invoke
+        @retry(stop=stop_after_attempt(3), wait=wait_none())
+        @within_deadline
+        async def invoke_async(self, **kwargs):
+            self.calls += 1
+            if self.calls == 1:
+                raise ConnectionError("reset by peer")
+            usage = SimpleNamespace(prompt_token_count=1290, candidates_token_count=42)
+            self._response = SimpleNamespace(model_version="gemini-2.5-flash", usage_metadata=usage)
+            return "ok"
+
+    assert asyncio.run(_Reasoner().invoke_async()) == "ok"
+
+    (invoke,) = exporter.named("reasoner.invoke")
+    attempts = exporter.named("reasoner.attempt")
+    assert invoke.attributes["reasoner"] == "_Reasoner"
+    assert invoke.attributes["model"] == "gemini-2.5-flash"
+    assert invoke.attributes["retry.attempts"] == 2
+    assert [a.attributes["attempt"] for a in attempts] == [1, 2]
+    assert {a.parent_span_id for a in attempts} == {invoke.span_id}
+    assert attempts[0].status == "ERROR"
+    assert attempts[1].attributes["gen_ai.usage.input_tokens"] == 1290
+    assert attempts[1].attributes["gen_ai.usage.output_tokens"] == 42
+
+
+def test_jsonl_exporter(tmp_path):
+    path = tmp_path.joinpath("trace", "spans.jsonl")
+    configure_tracing(JsonlSpanExporter(path))
+    try:
+        with span("agent.wait_for_challenge"):
+            with span("agent.wait_for_captcha_response") as s:
+                s.set_attribute("outcome", "response")
+    finally:
+        configure_tracing(None)
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf8").splitlines()]
+    assert [line["name"] for line in lines] == [
+        "agent.wait_for_captcha_response",
+        "agent.wait_for_challenge",
+    ]
+    assert lines[0]["parent_span_id"] == lines[1]["span_id"]
+    assert lines[0]["attributes"] == {"outcome": "response"}
+
+
+def test_jsonl_exporter_writes_off_the_calling_thread(tmp_path):
+    exporter = JsonlSpanExporter(tmp_path.joinpath("spans.jsonl"))
+    writers = []
+    write = exporter._write
+
+    def _write(spans):
+        writers.append(threading.current_thread().name)
+        write(spans)
+
+    exporter._write = _write
+    for i in range(100):
+        s = Span("robotic_arm.drag", None, {"step": i})
+        s.end_time_unix_nano = s.start_time_unix_nano
+        exporter.export(s)
+    exporter.flush()
+
+    assert set(writers) == {"hcaptcha-span-exporter"}
+    lines = exporter.path.read_text(encoding="utf8").splitlines()
+    assert [json.loads(line)["attributes"]["step"] for line in lines] == list(range(100))
+    exporter.close()
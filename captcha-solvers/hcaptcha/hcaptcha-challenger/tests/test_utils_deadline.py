@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+
+import pytest
+from tenacity import RetryError, retry, stop_after_attempt
+
+from hcaptcha_challenger.tools import ImageClassifier
+from hcaptcha_challenger.tools.common import (
+    stop_before_deadline,
+    wait_within_deadline,
+    within_deadline,
+)
+from hcaptcha_challenger.utils import Deadline
+
+
+def test_deadline_without_limit():
+    deadline = Deadline()
+    assert deadline.remaining is None
+    assert not deadline.expired
+    assert deadline.cap(3) == 3
+    assert deadline.cap_ms(2000) == 2000
+    assert deadline.child(5).remaining == pytest.approx(5, abs=0.1)
+
+
+def test_deadline_caps_timeouts():
+    deadline = Deadline(1)
+    assert deadline.cap(30) <= 1
+    assert deadline.cap(0.5) == 0.5
+    assert deadline.cap(None) <= 1
+    assert deadline.cap_ms(30000) <= 1000
+
+    # A child never outlives its parent
+    assert deadline.child(60).remaining <= 1
+
+
+def test_expired_deadline():
+    deadline = Deadline(0)
+    assert deadline.expired
+    assert deadline.remaining == 0
+    # Playwright reads 0 as "no timeout"
+    assert deadline.cap_ms(5000) == 1
+
+
+def test_within_deadline_cancels_attempt():
+    @within_deadline
+    async def _invoke(delay: float):
+        await asyncio.sleep(delay)
+        return delay
+
+    assert asyncio.run(_invoke(0, deadline=Deadline(1))) == 0
+    assert asyncio.run(_invoke(0)) == 0
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(_invoke(5, deadline=Deadline(0.05)))
+    with pytest.raises(TimeoutError):
+        asyncio.run(_invoke(0, deadline=Deadline(0)))
+
+
+def test_retry_stops_before_deadline():
+    attempts = []
+
+    @retry(stop=stop_after_attempt(5) | stop_before_deadline(3), wait=wait_within_deadline(3))
+    @within_deadline
+    async def _invoke():
+        attempts.append(time.monotonic())
+        raise ValueError
+
+    started = time.monotonic()
+    with pytest.raises(RetryError):
+        asyncio.run(_invoke(deadline=Deadline(0.2)))
+
+    # One attempt, no 3 second wait that would overrun the budget
+    assert len(attempts) == 1
+    assert time.monotonic() - started < 1
+
+
+def test_within_deadline_keeps_reasoner_response():
+    reasoner = ImageClassifier("fake-key")
+
+    @within_deadline
+    async def _invoke(self):
+        self._response = "answer"
+        return 1
+
+    async def _main():
+        await _invoke(reasoner, deadline=Deadline(5))
+        return reasoner._response
+
+    assert asyncio.run(_main()) == "answer"
@@ -8,7 +8,10 @@ import json
 import sys
 import os
 import random
+import re
+import signal
 from pathlib import Path
+from urllib.parse import urlparse
 from dotenv import load_dotenv
 from playwright.async_api import async_playwright
 
@@ -35,6 +38,8 @@ except ImportError:
     pass
 
 from hcaptcha_challenger import AgentV, AgentConfig
+from hcaptcha_challenger.tracing import configure_file_tracing, span
+from hcaptcha_challenger.utils import Deadline
 
 def get_random_gemini_api_key():
     """
@@ -58,10 +63,55 @@ def get_random_gemini_api_key():
     # 没有配置任何密钥
     raise ValueError("未配置任何Gemini API密钥。请设置GEMINI_API_KEY或GEMINI_API_KEYS环境变量")
 
+# 资源拦截：hCaptcha 的请求不进入拦截路由 (由浏览器端的正则匹配直接放行)
+NON_HCAPTCHA_URL_PATTERN = re.compile(r"^(?!https://(?:[\w-]+\.)*hcaptcha\.com(?:[:/?#]|$))")
+# 目标站点自身也不需要的资源类型
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "texttrack", "eventsource", "websocket", "manifest", "other"}
+
+def _host_allowed(host: str, allowlist) -> bool:
+    return any(host == allowed or host.endswith(f".{allowed}") for allowed in allowlist)
+
+async def block_non_essential_resources(context, website_url: str):
+    """
+    为目标页面加载设置资源拦截 (HCAPTCHA_BLOCK_RESOURCES=true 时启用)
+
+    - hCaptcha 域名：全部放行
+    - 目标站点 (及 HCAPTCHA_BLOCK_ALLOWLIST 中的域名)：拦截图片、媒体、字体等资源
+    - 其他第三方域名 (广告、统计、CDN 等)：全部拦截
+    """
+    target_host = (urlparse(website_url).hostname or "").removeprefix("www.")
+    extra_hosts = os.getenv('HCAPTCHA_BLOCK_ALLOWLIST', '')
+    allowlist = [target_host] + [h.strip() for h in extra_hosts.split(',') if h.strip()]
+
+    async def _route(route):
+        request = route.request
+        host = urlparse(request.url).hostname or ""
+        # 主页面的跳转 (如跳转到其他域名) 始终放行
+        if request.is_navigation_request() and request.frame.parent_frame is None:
+            await route.continue_()
+        elif _host_allowed(host, allowlist):
+            if request.resource_type in BLOCKED_RESOURCE_TYPES:
+                await route.abort("blockedbyclient")
+            else:
+                await route.continue_()
+        else:
+            await route.abort("blockedbyclient")
+
+    await context.route(NON_HCAPTCHA_URL_PATTERN, _route)
+
 async def solve_hcaptcha(website_url: str, website_key: str, proxy: str = None):
     """
     使用原始 hcaptcha-challenger 解决验证码
     """
+    # 整体时间预算：比 endpoint.js 的进程超时 (HCAPTCHA_SOLVER_TIMEOUT) 提前 5 秒结束，
+    # 以便在进程被杀死之前返回结果
+    solver_timeout = int(os.getenv('HCAPTCHA_SOLVER_TIMEOUT', '300000')) / 1000
+    deadline = Deadline(max(solver_timeout - 5, 1))
+
+    # 可选的追踪：与 AgentConfig 使用同一个 TRACE_EXPORT_PATH，以便记录页面导航
+    if os.getenv('TRACE_EXPORT_PATH'):
+        configure_file_tracing(os.getenv('TRACE_EXPORT_PATH'))
+
     try:
         async with async_playwright() as p:
             # 使用简单的浏览器配置
@@ -75,11 +125,14 @@ async def solve_hcaptcha(website_url: str, website_key: str, proxy: str = None):
             
             browser = await p.chromium.launch(**launch_options)
             context = await browser.new_context()
+            if os.getenv('HCAPTCHA_BLOCK_RESOURCES', 'false').lower() == 'true':
+                await block_non_essential_resources(context, website_url)
             page = await context.new_page()
             
             # 导航到目标页面 (使用统一配置的超时时间)
             page_timeout = int(os.getenv('HCAPTCHA_PAGE_TIMEOUT', '30000'))
-            await page.goto(website_url, timeout=page_timeout)
+            with span("page.goto", url=website_url):
+                await page.goto(website_url, timeout=deadline.cap_ms(page_timeout))
             
             # 随机选择一个API密钥
             selected_api_key = get_random_gemini_api_key()
@@ -94,7 +147,7 @@ async def solve_hcaptcha(website_url: str, website_key: str, proxy: str = None):
             
             # 按照官方API流程：点击checkbox -> 等待挑战
             await agent.robotic_arm.click_checkbox()
-            await agent.wait_for_challenge()
+            await agent.wait_for_challenge(deadline=deadline)
             
             await browser.close()
             
@@ -162,7 +215,21 @@ async def main():
             print(json.dumps(result))
             return
         
-        result = await solve_hcaptcha(website_url, website_key, proxy)
+        # endpoint.js 在超时或客户端断开时发送 SIGTERM：取消求解任务，
+        # 中止进行中的 Gemini 调用并关闭浏览器，而不是让进程被直接杀死
+        task = asyncio.ensure_future(solve_hcaptcha(website_url, website_key, proxy))
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+        except NotImplementedError:
+            pass  # Windows 不支持
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            result = {
+                "code": 499,
+                "message": "hCaptcha solving cancelled",
+                "token": None
+            }
         print(json.dumps(result))
         
     except json.JSONDecodeError: